@@ -3,10 +3,15 @@ from typing import List, Dict, Any
 from loguru import logger
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage, SystemMessage
+from app.services.stub_providers import use_stub_providers, StubChatModel
 
 
 class AnswerAgent:
     def __init__(self):
+        if use_stub_providers():
+            self.llm = StubChatModel("answer")
+            return
+
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
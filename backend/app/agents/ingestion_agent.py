@@ -1,18 +1,45 @@
 #D:\DevBuddy\backend\app\agents\ingestion_agent.py
 import os
-from typing import List, Dict, Any
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
 from loguru import logger
-from app.utils.git_utils import GitUtils
+from app.utils.git_utils import GitUtils, EXCLUDE_DIRS
 from app.utils.ast_utils import ASTChunker
+from app.utils.chunk_batch import ChunkBatch
+from app.utils.symbol_graph import SymbolGraph, SymbolGraphStore
 from app.services.embedding_service import EmbeddingService
-from app.services.qdrant_service import QdrantService
+from app.services.symbol_index import SymbolIndex
+from app.utils.vector_utils import mean_vector
+from app.utils.profiling import span
+
+if TYPE_CHECKING:
+    # Only for annotations; the vector backend is chosen at startup
+    from app.services.qdrant_service import QdrantService
+
+def _file_signature(file_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 
 class IngestionAgent:
-    def __init__(self, qdrant_service: QdrantService):
+    def __init__(
+        self, qdrant_service: "QdrantService", graph_store: SymbolGraphStore = None,
+        symbol_index: SymbolIndex = None, lifecycle=None
+    ):
         self.git_utils = GitUtils()
         self.ast_chunker = ASTChunker()
         self.embedding_service = EmbeddingService()
         self.qdrant_service = qdrant_service
+        self.graph_store = graph_store or SymbolGraphStore()
+        self.symbol_index = symbol_index
+        self.lifecycle = lifecycle
+        # Watch mode state: each file's symbols keyed by its (mtime, size)
+        self._file_graphs: Dict[str, Tuple[Optional[Tuple[int, int]], SymbolGraph, Tuple]] = {}
+        self._graph_fingerprint: Optional[Tuple] = None
 
     async def ingest_repo(
         self,
@@ -24,11 +51,12 @@ class IngestionAgent:
         logger.info(f"Ingestion started for {repo_url}")
         
         # 1. Clone repo
-        repo_path = await self.git_utils.clone_repository(
-            str(repo_url),
-            branch=branch,
-            force=True
-        )
+        with span("clone"):
+            repo_path = await self.git_utils.clone_repository(
+                str(repo_url),
+                branch=branch,
+                force=True
+            )
 
         # 2. Find Python files
         py_files = await self.git_utils.get_python_files(
@@ -37,22 +65,48 @@ class IngestionAgent:
             exclude_patterns
         )
 
-        all_chunks = []
-        for file_path in py_files:
-            code = self.git_utils.get_file_content(file_path)
-            chunks = self.ast_chunker.chunk_code(file_path, code)
-            for chunk in chunks:
-                chunk['repo_url'] = str(repo_url)
-                chunk['file_extension'] = '.py'
-            all_chunks.extend(chunks)
+        all_chunks = ChunkBatch(str(repo_url), file_extension='.py', repo_root=repo_path)
+        graph = SymbolGraph()
+        with span("chunk", files=len(py_files)):
+            for file_path in py_files:
+                code = self.git_utils.get_file_content(file_path)
+                self.ast_chunker.chunk_into(all_chunks, file_path, code, graph=graph)
+
+        # 3. Generate embeddings (one float32 row per chunk); a content-addressed
+        #    store only embeds bodies it has never seen in any repo
+        with span("embed", chunks=len(all_chunks)):
+            if hasattr(self.qdrant_service, "embed_missing"):
+                embeddings = await self.qdrant_service.embed_missing(all_chunks, self.embedding_service)
+            else:
+                embeddings = await self.embedding_service.embed_code_chunks(all_chunks)
 
-        # 3. Generate embeddings
-        embeddings = await self.embedding_service.embed_code_chunks(all_chunks)
+        # 4. Drop the repo's earlier points so a re-ingest replaces them instead of adding
+        #    a second copy; the content store swaps its references inside store_chunks and
+        #    only needs its file summaries cleared
+        with span("clear_repo"):
+            if hasattr(self.qdrant_service, "embed_missing"):
+                await self.qdrant_service.base.delete_repo(str(repo_url))
+            else:
+                await self.qdrant_service.delete_repo(str(repo_url))
 
+        # 5. Store in Qdrant (await async method)
+        with span("store_chunks"):
+            await self.qdrant_service.store_chunks(embeddings, all_chunks)
 
-        # 4. Store in Qdrant (await async method)
-        await self.qdrant_service.store_chunks(embeddings, all_chunks)
+        # 6. Store one summary vector per file for file-then-chunk retrieval
+        file_embeddings, file_metadata = self._build_file_summaries(embeddings, all_chunks)
+        with span("store_file_summaries"):
+            await self.qdrant_service.store_file_summaries(file_embeddings, file_metadata)
 
+        # 7. Persist the symbol/call graph for context expansion at retrieval time
+        with span("symbol_graph"):
+            graph.build()
+            self.graph_store.save(str(repo_url), graph)
+
+        # 8. Refresh the in-memory symbol-name index used by the retrieval fast path
+        if self.symbol_index is not None:
+            self.symbol_index.remove_repo(str(repo_url))
+            self.symbol_index.add_chunks(str(repo_url), all_chunks)
 
         logger.info(f"Ingestion completed for {repo_url}")
         return {
@@ -60,3 +114,115 @@ class IngestionAgent:
             "files_processed": len(py_files),
             "chunks_created": len(all_chunks)
         }
+
+    async def update_files(
+        self, repo_url: str, repo_path: str, changed_files: List[str], removed_files: List[str]
+    ) -> Dict[str, Any]:
+        """Re-indexes only the given files of an already ingested repo (watch mode).
+
+        Changed files are re-chunked and re-embedded, then their old points are
+        replaced; removed files just lose their points.
+        """
+        repo_url = str(repo_url)
+        chunks = ChunkBatch(repo_url, file_extension='.py', repo_root=repo_path)
+        for file_path in changed_files:
+            # Stat before reading, so a write racing the read is seen as a change by the graph rebuild
+            signature = _file_signature(file_path)
+            code = self.git_utils.get_file_content(file_path)
+            fragment = SymbolGraph()
+            self.ast_chunker.chunk_into(chunks, file_path, code, graph=fragment)
+            self._file_graphs[file_path] = (signature, fragment, fragment.fingerprint())
+        for file_path in removed_files:
+            self._file_graphs.pop(file_path, None)
+
+        # Embed before deleting so the old points stay searchable while the provider is called
+        if not len(chunks):
+            embeddings = np.empty((0, 0), dtype=np.float32)
+        elif hasattr(self.qdrant_service, "embed_missing"):
+            embeddings = await self.qdrant_service.embed_missing(chunks, self.embedding_service)
+        else:
+            embeddings = await self.embedding_service.embed_code_chunks(chunks)
+
+        touched = list(changed_files) + list(removed_files)
+        await self.qdrant_service.delete_files(repo_url, touched)
+        if len(chunks):
+            # The content store would otherwise replace the repo's other references
+            append_kwargs = {"replace": False} if hasattr(self.qdrant_service, "embed_missing") else {}
+            await self.qdrant_service.store_chunks(embeddings, chunks, **append_kwargs)
+            file_embeddings, file_metadata = self._build_file_summaries(embeddings, chunks)
+            await self.qdrant_service.store_file_summaries(file_embeddings, file_metadata)
+
+        if self.symbol_index is not None:
+            self.symbol_index.remove_files(repo_url, touched)
+            self.symbol_index.add_chunks(repo_url, chunks)
+
+        if self.lifecycle is not None:
+            # Keeps vector budget accounting in step with the saves
+            await self.lifecycle.record_ingest(repo_url)
+
+        logger.info(
+            f"Incremental update of {repo_url}: {len(changed_files)} files re-indexed "
+            f"({len(chunks)} chunks), {len(removed_files)} removed"
+        )
+        return {"repo_url": repo_url, "files_updated": len(changed_files), "files_removed": len(removed_files),
+                "chunks_created": len(chunks)}
+
+    async def rebuild_symbol_graph(self, repo_url: str, repo_path: str) -> bool:
+        """Rebuilds the symbol graph; calls resolve across files, so it is not patched per file.
+
+        Only files whose (mtime, size) changed since the last rebuild are
+        parsed again, and nothing is rebuilt or saved when no file's
+        definitions, calls or imports changed. Returns whether it was saved.
+        """
+        def build():
+            parsed = {}
+            for root, dirs, files in os.walk(repo_path):
+                dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+                for name in files:
+                    if name.endswith(".py"):
+                        file_path = os.path.join(root, name)
+                        signature = _file_signature(file_path)
+                        cached = self._file_graphs.get(file_path)
+                        if cached is None or signature is None or cached[0] != signature:
+                            fragment = SymbolGraph()
+                            self.ast_chunker.chunk_code(file_path, self.git_utils.get_file_content(file_path), graph=fragment)
+                            cached = (signature, fragment, fragment.fingerprint())
+                        parsed[file_path] = cached
+            self._file_graphs = parsed
+            fingerprint = tuple((path, entry[2]) for path, entry in sorted(parsed.items()))
+            if fingerprint == self._graph_fingerprint:
+                return None
+            graph = SymbolGraph()
+            for path in sorted(parsed):
+                graph.add_file(parsed[path][1])
+            graph.build()
+            return graph, fingerprint
+
+        built = await asyncio.to_thread(build)
+        if built is None:
+            return False
+        graph, fingerprint = built
+        self.graph_store.save(str(repo_url), graph)
+        self._graph_fingerprint = fingerprint
+        return True
+
+    def _build_file_summaries(self, embeddings: np.ndarray, chunks: ChunkBatch):
+        """Averages each file's chunk embeddings into a single file-level vector."""
+        file_embeddings, file_metadata = [], []
+        for file_path, indices in chunks.file_groups().items():
+            module_index = next((i for i in indices if chunks.chunk_type[i] == 'module'), None)
+            symbols = [
+                chunks.function_name[i] or chunks.class_name[i]
+                for i in indices if chunks.chunk_type[i] != 'module'
+            ]
+            file_embeddings.append(mean_vector(embeddings[indices]))
+            scope_fields = chunks.payload(indices[0])
+            file_metadata.append({
+                'repo_url': chunks.repo_url,
+                'file_path': file_path,
+                **{key: scope_fields[key] for key in ('rel_path', 'dir_prefixes', 'is_test', 'is_generated')},
+                'chunk_count': len(indices),
+                'docstring': chunks.docstring[module_index] if module_index is not None else None,
+                'symbols': symbols
+            })
+        return file_embeddings, file_metadata
@@ -1,14 +1,19 @@
 # D:\DevBuddy\backend\app\agents\modifier_agent.py
 
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 from langchain_groq import ChatGroq
 from langchain.schema import HumanMessage, SystemMessage
+from app.services.stub_providers import use_stub_providers, StubChatModel
 
 
 class ModifierAgent:
     def __init__(self):
+        if use_stub_providers():
+            self.llm = StubChatModel("modifier")
+            return
+
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable is required")
@@ -77,10 +82,34 @@ Respond according to the rules above.
             logger.error(f"Error in ModifierAgent: {e}")
             return f"❌ Error: {str(e)}"
 
-    async def generate_readme(self, context_chunks: List[Dict[str, Any]], repo_url: str) -> str:
-        """Generate a README file for the repository"""
+    async def summarize(self, instruction: str, text: str) -> str:
+        """One map or reduce step of repo summarization (see RepoSummarizer); errors propagate."""
+        system_message = SystemMessage(content=(
+            "You are DevBuddy's code summarizer. Be concise and factual, "
+            "and only describe what the given code or summaries show."
+        ))
+        response = await self.llm.ainvoke([system_message, HumanMessage(content=f"{instruction}\n\n{text}")])
+        return response.content.strip() if hasattr(response, "content") else str(response)
+
+    async def generate_readme(
+        self, context_chunks: List[Dict[str, Any]], repo_url: str, repo_summary: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Generate a README file for the repository, from a whole-repo summary when one is given"""
         try:
             project_info = self._analyze_project(context_chunks)
+            overview = ""
+            if repo_summary:
+                # Top two directory levels only; deeper ones are folded into their parents' summaries
+                packages = "\n".join(
+                    f"- {path}: {summary}" for path, summary in repo_summary["packages"].items() if path.count("/") < 2
+                )
+                overview = f"""
+Project Overview (summarized from all {repo_summary['files']} files):
+{repo_summary['summary']}
+
+Packages:
+{packages}
+"""
 
             instruction = f"""Generate a comprehensive README.md file.
 
@@ -90,7 +119,7 @@ Project Information:
 - Project Type: {project_info.get('project_type', 'Application')}
 - Key Features: {', '.join(project_info.get('features', []))}
 - Main Files: {', '.join(project_info.get('main_files', []))}
-
+{overview}
 Include:
 1. Title & Description
 2. Installation Instructions
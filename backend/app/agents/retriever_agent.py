@@ -1,46 +1,200 @@
 # D:\DevBuddy\backend\app\agents\retriever_agent.py
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+import asyncio
 import logging
-from app.services.qdrant_service import QdrantService
+import os
+import re
 from app.services.embedding_service import EmbeddingService  # assuming you have this
+from app.services.symbol_index import SymbolIndex
+from app.utils.symbol_graph import SymbolGraphStore
+from app.utils.profiling import span
+from app.utils.path_scope import matches_scope
+
+if TYPE_CHECKING:
+    # Only for annotations; the vector backend is chosen at startup
+    from app.services.qdrant_service import QdrantService
 
 logger = logging.getLogger(__name__)
 
+# `quoted` names, snake_case / CamelCase identifiers, dotted paths and call syntax like name()
+SYMBOL_PATTERN = re.compile(
+    r"`([\w.]+?)(?:\(\))?`|\b([A-Za-z_]\w*(?:\.\w+)*)\(\)|\b(\w+_\w+(?:\.py)?|(?=\w*[a-z])[A-Z]\w*[A-Z]\w*)\b"
+)
+
 class RetrieverAgent:
-    def __init__(self, qdrant_service: QdrantService):
+    def __init__(
+        self, qdrant_service: "QdrantService", graph_store: Optional[SymbolGraphStore] = None,
+        symbol_index: Optional[SymbolIndex] = None
+    ):
         self.qdrant_service = qdrant_service
         self.embedding_service = EmbeddingService()
+        self.graph_store = graph_store
+        self.symbol_index = symbol_index
+        # Number of files pre-selected before chunk search (0 disables the file stage)
+        self.file_limit = int(os.getenv("RETRIEVER_FILE_LIMIT", 20))
+        # Top hits whose callers/callees are added as extra context (0 disables expansion)
+        self.graph_expand_hits = int(os.getenv("RETRIEVER_GRAPH_EXPAND_HITS", 3))
+        self.graph_neighbours = int(os.getenv("RETRIEVER_GRAPH_NEIGHBOURS", 2))
 
     async def retrieve(
-        self, query: str, repo_url: Optional[str] = None, limit: int = 10
+        self, query: str, repo_url: Optional[str] = None, limit: int = 10, expand_graph: bool = True,
+        scope=None
     ) -> List[Dict[str, Any]]:
+        """Finds context for a query; `scope` (a RetrievalScope) restricts every stage to part of the repo."""
         try:
+            with span("symbol_lookup"):
+                symbol_results = await self.retrieve_by_symbol(query, repo_url, limit, scope, exact=True)
+            if symbol_results:
+                if expand_graph and repo_url:
+                    symbol_results += await self.expand_with_graph(symbol_results, repo_url, scope)
+                logger.info(f"RetrieverAgent answered from symbol index with {len(symbol_results)} results")
+                return await self.qdrant_service.hydrate_chunks(symbol_results)
+
             keywords = self._extract_keywords(query)
-            query_embedding = await self.embedding_service.generate_embedding(query)
-
-            semantic_results = await self.qdrant_service.search_similar(
-                query_vector=query_embedding,
-                limit=limit,
-                repo_url=repo_url
-            )
-
-            keyword_results = []
-            if keywords:
-                keyword_results = await self.qdrant_service.search_by_keywords(
-                    keywords=keywords,
-                    limit=limit // 2,
-                    repo_url=repo_url
-                )
-
-            combined_results = self._combine_results(semantic_results, keyword_results, limit)
+            with span("embed_query"):
+                query_embedding = await self.embedding_service.generate_embedding(query)
+
+            with span("vector_search", file_limit=self.file_limit):
+                if self.file_limit > 0:
+                    semantic_results = await self.qdrant_service.search_hierarchical(
+                        query_vector=query_embedding,
+                        limit=limit,
+                        repo_url=repo_url,
+                        file_limit=self.file_limit,
+                        scope=scope
+                    )
+                else:
+                    semantic_results = await self.qdrant_service.search_similar(
+                        query_vector=query_embedding,
+                        limit=limit,
+                        repo_url=repo_url,
+                        scope=scope
+                    )
+
+            with span("keyword_search"):
+                keyword_results = await self._keyword_search(keywords, repo_url, limit, scope)
+            # Prefix and close symbol matches are not trusted alone, but still rank ahead of the vector hits
+            near_results = await self.retrieve_by_symbol(query, repo_url, limit // 2, scope)
+
+            combined_results = self._combine_results(near_results + semantic_results, keyword_results, limit)
+            if expand_graph and repo_url:
+                with span("graph_expand"):
+                    combined_results += await self.expand_with_graph(combined_results, repo_url, scope)
             logger.info(f"RetrieverAgent found {len(combined_results)} results for repo {repo_url}")
-            return combined_results
+            # Searches return metadata only; fetch bodies just for the chunks that go into the prompt
+            with span("hydrate", chunks=len(combined_results)):
+                return await self.qdrant_service.hydrate_chunks(combined_results)
 
         except Exception as e:
             logger.error(f"Error in RetrieverAgent: {e}", exc_info=True)
             return []
 
+    async def retrieve_batch(
+        self, queries: List[str], repo_url: Optional[str] = None, limit: int = 10, expand_graph: bool = True,
+        scope=None
+    ) -> List[List[Dict[str, Any]]]:
+        """Retrieves context for many queries with one embedding call and one batched vector search."""
+        try:
+            results = [await self.retrieve_by_symbol(q, repo_url, limit, scope, exact=True) for q in queries]
+            pending = [i for i, r in enumerate(results) if not r]
+
+            if pending:
+                embeddings = await self.embedding_service.generate_embeddings([queries[i] for i in pending])
+                if self.file_limit > 0:
+                    semantic_batch = await self.qdrant_service.search_hierarchical_batch(
+                        embeddings, limit=limit, repo_url=repo_url, file_limit=self.file_limit, scope=scope
+                    )
+                else:
+                    semantic_batch = await self.qdrant_service.search_similar_batch(
+                        embeddings, limit=limit, repo_url=repo_url, scope=scope
+                    )
+                keyword_batch = await asyncio.gather(*[
+                    self._keyword_search(self._extract_keywords(queries[i]), repo_url, limit, scope) for i in pending
+                ])
+                near_batch = [await self.retrieve_by_symbol(queries[i], repo_url, limit // 2, scope) for i in pending]
+                for i, semantic_results, keyword_results, near_results in zip(
+                    pending, semantic_batch, keyword_batch, near_batch
+                ):
+                    results[i] = self._combine_results(near_results + semantic_results, keyword_results, limit)
+
+            if expand_graph and repo_url:
+                expansions = await asyncio.gather(*[self.expand_with_graph(r, repo_url, scope) for r in results])
+                results = [r + extra for r, extra in zip(results, expansions)]
+
+            await self.qdrant_service.hydrate_chunks([chunk for r in results for chunk in r])
+
+            logger.info(f"RetrieverAgent retrieved context for {len(queries)} queries ({len(pending)} embedded)")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in RetrieverAgent batch retrieval: {e}", exc_info=True)
+            return [[] for _ in queries]
+
+    async def _keyword_search(
+        self, keywords: List[str], repo_url: Optional[str], limit: int, scope=None
+    ) -> List[Dict[str, Any]]:
+        if not keywords:
+            return []
+        return await self.qdrant_service.search_by_keywords(
+            keywords=keywords,
+            limit=limit // 2,
+            repo_url=repo_url,
+            scope=scope
+        )
+
+    async def retrieve_by_symbol(
+        self, query: str, repo_url: Optional[str], limit: int, scope=None, exact: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Resolves symbol names mentioned in the query from the in-memory index, skipping embedding.
+
+        With exact=True only definitions named exactly as in the query count,
+        which is what lets retrieve() answer from them alone.
+        """
+        if not limit or not self.symbol_index or not repo_url or not self.symbol_index.has_repo(repo_url):
+            return []
+        refs = []
+        for name in self._extract_symbols(query):
+            refs.extend(self.symbol_index.lookup(repo_url, name, limit=limit, exact=exact))
+        chunk_ids = list(dict.fromkeys(ref["chunk_id"] for ref in refs))[:limit]
+        if not chunk_ids:
+            return []
+        chunks = await self.qdrant_service.get_chunks_by_ids(chunk_ids, repo_url=repo_url)
+        # Id lookups bypass the search filters, so the scope is checked on the fetched payloads
+        return [c for c in chunks if matches_scope(c, scope)]
+
+    def _extract_symbols(self, text: str) -> List[str]:
+        names = []
+        for match in SYMBOL_PATTERN.finditer(text):
+            name = next(group for group in match.groups() if group)
+            if name not in names:
+                names.append(name)
+        return names
+
+    async def expand_with_graph(
+        self, results: List[Dict[str, Any]], repo_url: str, scope=None
+    ) -> List[Dict[str, Any]]:
+        """Adds the callers and callees of the top hits using the repo's symbol graph."""
+        if not self.graph_store or self.graph_expand_hits <= 0:
+            return []
+        graph = self.graph_store.load(repo_url)
+        if graph is None:
+            return []
+
+        top_ids = [r["chunk_id"] for r in results[:self.graph_expand_hits]]
+        related = graph.expand(top_ids, per_symbol=self.graph_neighbours)
+        existing = {r["chunk_id"] for r in results}
+        related = [(cid, relation) for cid, relation in related if cid not in existing]
+        if not related:
+            return []
+
+        relations = dict(related)
+        chunks = await self.qdrant_service.get_chunks_by_ids(list(relations), repo_url=repo_url)
+        chunks = [c for c in chunks if matches_scope(c, scope)]
+        for chunk in chunks:
+            chunk["relation"] = relations.get(chunk["chunk_id"])
+        return chunks
+
     def _extract_keywords(self, text: str) -> List[str]:
         # Simple placeholder for keyword extraction
         return [w for w in text.split() if len(w) > 3]
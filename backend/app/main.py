@@ -1,14 +1,32 @@
 #D:\DevBuddy\backend\app\main.py
+import time
+
+_import_started = time.perf_counter()
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import importlib
 import os
 from dotenv import load_dotenv
 from loguru import logger
 
-from app.routers import ingest, chat, health
-from app.services.qdrant_service import QdrantService
+# Routers import agents and providers lazily, so this stays cheap
+from app.routers import ingest, chat, health, snapshots, repos
+from app.utils.startup import StartupReport
+from app.utils.profiling import EventLoopLagMonitor, profile_requests
+
+startup_report = StartupReport()
+startup_report.record("import:app.main", time.perf_counter() - _import_started)
+
+# Heavy modules preloaded in the background so the first request does not pay for them
+WARMUP_MODULES = [
+    "app.agents.retriever_agent",
+    "app.agents.answer_agent",
+    "app.agents.modifier_agent",
+    "app.agents.ingestion_agent",
+]
 
 # Load environment variables
 load_dotenv()
@@ -16,22 +34,110 @@ load_dotenv()
 # Configure logging
 logger.add("logs/devbuddy.log", rotation="10 MB", level=os.getenv("LOG_LEVEL", "INFO"))
 
+def _create_vector_service():
+    # "numpy" is an embedded mmap index for small/medium repos
+    if os.getenv("VECTOR_BACKEND", "qdrant") == "numpy":
+        from app.services.numpy_vector_service import NumpyVectorService
+        service = NumpyVectorService()
+    else:
+        from app.services.qdrant_service import QdrantService
+        service = QdrantService()
+
+    # One shared vector per unique chunk body across forks, mirrors and vendored copies
+    if os.getenv("CONTENT_ADDRESSED_STORE", "false").lower() == "true":
+        from app.services.content_store import ContentAddressedStore
+        service = ContentAddressedStore(service)
+    return service
+
+def _import_module(name: str):
+    start = time.perf_counter()
+    importlib.import_module(name)
+    startup_report.record(f"import:{name}", time.perf_counter() - start)
+
+async def _preload_modules():
+    with startup_report.phase("agent_modules"):
+        for name in WARMUP_MODULES:
+            await asyncio.to_thread(_import_module, name)
+
+async def _warm_up_services(app: FastAPI):
+    with startup_report.phase("vector_store"):
+        # Opening the embedded store reads it from disk, keep that off the event loop
+        qdrant_service = await asyncio.to_thread(_create_vector_service)
+    with startup_report.phase("collections"):
+        await qdrant_service.initialize()
+    app.state.qdrant_service = qdrant_service
+
+    # Per-repo symbol/call graphs used to expand retrieved context
+    from app.utils.symbol_graph import SymbolGraphStore
+    app.state.symbol_graph_store = SymbolGraphStore()
+
+    # Symbol-name index for queries that name a function, class or file directly
+    with startup_report.phase("symbol_index"):
+        from app.services.symbol_index import SymbolIndex
+        symbol_index = SymbolIndex()
+        await symbol_index.load(qdrant_service)
+    app.state.symbol_index = symbol_index
+
+    # Last-access tracking and disk/vector budgets for clones and indexed repos
+    with startup_report.phase("repo_lifecycle"):
+        from app.services.repo_lifecycle import RepoLifecycleManager
+        repo_lifecycle = RepoLifecycleManager(qdrant_service, app.state.symbol_graph_store, symbol_index)
+        await repo_lifecycle.load()
+        repo_lifecycle.start()
+    app.state.repo_lifecycle = repo_lifecycle
+
+    # Shared by chat README requests and /repos/summary so its cache, concurrency cap and run dedup are global
+    from app.services.repo_summarizer import RepoSummarizer
+    app.state.repo_summarizer = await asyncio.to_thread(RepoSummarizer, qdrant_service)
+
+    # Watch mode for local checkouts; WATCH_REPOS lists directories to watch from startup
+    from app.services.repo_watcher import RepoWatchManager
+    repo_watcher = RepoWatchManager(qdrant_service, app.state.symbol_graph_store, symbol_index, repo_lifecycle)
+    app.state.repo_watcher = repo_watcher
+    with startup_report.phase("repo_watcher"):
+        for repo_path in filter(None, (p.strip() for p in os.getenv("WATCH_REPOS", "").split(","))):
+            try:
+                await repo_watcher.start_watch(repo_path)
+            except Exception as e:
+                logger.error(f"Could not watch {repo_path}: {e}")
+
+async def _warm_up(app: FastAPI):
+    try:
+        await asyncio.gather(_warm_up_services(app), _preload_modules())
+        startup_report.mark_ready()
+    except Exception as e:
+        startup_report.mark_failed(e)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     logger.info("Starting DevBuddy backend...")
+    app.state.startup_report = startup_report
+
+    # Logs the stack of whatever blocks the event loop for longer than the threshold
+    lag_monitor = EventLoopLagMonitor(threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", 200)) / 1000)
+    if os.getenv("LOOP_LAG_MONITOR", "true").lower() == "true":
+        lag_monitor.start()
+    app.state.loop_lag_monitor = lag_monitor
+
+    # Client setup and collection checks run in the background behind /api/ready
+    warm_up_task = asyncio.create_task(_warm_up(app))
     
-    # Initialize Qdrant service
-    qdrant_service = QdrantService()
-    app.state.qdrant_service = qdrant_service
-    
-    logger.info("DevBuddy backend started successfully")
+    logger.info("DevBuddy backend accepting connections, warm-up running in background")
     
     yield
     
     # Shutdown
     logger.info("Shutting down DevBuddy backend...")
+    warm_up_task.cancel()
+    lag_monitor.stop()
+    if getattr(app.state, "repo_summarizer", None):
+        app.state.repo_summarizer.cache.close()
+    if getattr(app.state, "repo_watcher", None):
+        app.state.repo_watcher.stop_all()
+    if getattr(app.state, "repo_lifecycle", None):
+        app.state.repo_lifecycle.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -50,10 +156,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per-request sampling profile + task timeline (X-DevBuddy-Profile header or ?profile=1)
+app.middleware("http")(profile_requests)
+
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(ingest.router, prefix="/api", tags=["ingestion"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(snapshots.router, prefix="/api", tags=["snapshots"])
+app.include_router(repos.router, prefix="/api", tags=["repos"])
 
 @app.get("/")
 async def root():
@@ -15,7 +15,7 @@ class IngestionStatus(str, Enum):
     FAILED = "failed"
 
 class IngestionRequest(BaseModel):
-    repo_url: HttpUrl
+    repo_url: str  # GitHub URL or a path to a local checkout
     branch: Optional[str] = "main"
     include_patterns: Optional[List[str]] = ["*.py"]
     exclude_patterns: Optional[List[str]] = ["__pycache__", "*.pyc", ".git"]
@@ -24,7 +24,7 @@ class IngestionResponse(BaseModel):
     task_id: str
     status: IngestionStatus
     message: str
-    repo_url: HttpUrl
+    repo_url: str
 
 class IngestionStatusResponse(BaseModel):
     task_id: str
@@ -40,18 +40,95 @@ class ChatMessage(BaseModel):
     content: str
     timestamp: Optional[str] = None
 
+class RetrievalScope(BaseModel):
+    """Narrows retrieval to part of a repo; applied as search-time payload filters."""
+    path_prefix: Optional[str] = None  # repo-relative directory or file, e.g. "app/services"
+    path_glob: Optional[str] = None  # repo-relative fnmatch pattern, e.g. "app/*/qdrant_*.py"
+    chunk_types: Optional[List[str]] = None  # "function", "class", "module"
+    class_name: Optional[str] = None
+    exclude_tests: bool = False
+    exclude_generated: bool = False
+
 class ChatRequest(BaseModel):
     message: str
     repo_url: Optional[str] = None
     conversation_history: Optional[List[ChatMessage]] = []
     max_context_chunks: Optional[int] = 10
+    scope: Optional[RetrievalScope] = None
+
+class SourceReference(BaseModel):
+    """Where an answer's context came from; chunk bodies are not sent back."""
+    chunk_id: str
+    file_path: Optional[str] = None
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    function_name: Optional[str] = None
+    class_name: Optional[str] = None
+    chunk_type: Optional[str] = None
+    score: Optional[float] = None
+    relation: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
-    sources: List[Dict[str, Any]]
+    sources: List[SourceReference]
     agent_used: str
     processing_time: float
 
+class BatchChatRequest(BaseModel):
+    messages: List[str]
+    repo_url: Optional[str] = None
+    max_context_chunks: Optional[int] = 10
+    max_concurrency: Optional[int] = 4
+    scope: Optional[RetrievalScope] = None
+
+class BatchChatResult(BaseModel):
+    index: int
+    message: str
+    response: str
+    source_ids: List[str]  # keys into the shared sources sent at the start of the stream
+    agent_used: str
+    processing_time: float
+    error: Optional[str] = None  # set, with an empty response, when this message failed
+
+class SnapshotExportRequest(BaseModel):
+    repo_url: str
+
+class SnapshotImportRequest(BaseModel):
+    name: str  # file name inside SNAPSHOT_DIR
+    repo_url: Optional[str] = None  # defaults to the repo recorded in the snapshot
+    force: bool = False  # import even if the embedding model differs
+
+class SnapshotResponse(BaseModel):
+    name: str
+    bytes: int
+    repo_url: str
+    source_commit: Optional[str] = None
+    embedding_model: str
+    vector_size: int
+    created_at: float
+    chunks: int
+    file_summaries: int
+
+class RepoPinRequest(BaseModel):
+    repo_url: str
+    pinned: bool = True  # pinned repos are never evicted or offloaded
+
+class RepoWatchRequest(BaseModel):
+    repo_url: str  # local directory, as passed to /ingest
+    enabled: bool = True  # False stops watching
+
+class RepoSummaryRequest(BaseModel):
+    repo_url: str
+
+class RepoSummaryResponse(BaseModel):
+    repo_url: str
+    summary: str
+    packages: Dict[str, str]  # directory -> summary of everything below it
+    files: int
+    summarized: int  # summaries produced by the LLM in this run
+    cached: int  # summaries reused because their input did not change
+    llm_calls: int  # LLM requests made, counting parts of long files and merge rounds
+
 class CodeChunk(BaseModel):
     chunk_id: str
     file_path: str
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Request
-from app.models.schemas import ChatRequest, ChatResponse
-from app.agents.retriever_agent import RetrieverAgent
-from app.agents.answer_agent import AnswerAgent
-from app.agents.modifier_agent import ModifierAgent
+from fastapi.responses import StreamingResponse
+from app.models.schemas import ChatRequest, ChatResponse, BatchChatRequest, BatchChatResult, SourceReference
+from app.utils.startup import get_ready_state
+from app.utils.profiling import span
 from loguru import logger
+from typing import List
+import asyncio
+import json
 import time
 import re
 
@@ -11,22 +14,21 @@ router = APIRouter()
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: Request, payload: ChatRequest):
-    qdrant_service = request.app.state.qdrant_service
-    retriever = RetrieverAgent(qdrant_service)
-    answer_agent = AnswerAgent()
-    modifier_agent = ModifierAgent()
+    retriever, answer_agent, modifier_agent, summarizer = await _create_agents(request)
+    if payload.repo_url:
+        await request.app.state.repo_lifecycle.ensure_hot(payload.repo_url)
     start = time.time()
     
     try:
         # Determine which agent to use based on the query
         agent_used, response, context = await _process_chat_message(
-            payload, retriever, answer_agent, modifier_agent
+            payload, retriever, answer_agent, modifier_agent, summarizer
         )
         
         elapsed = time.time() - start
         return ChatResponse(
             response=response,
-            sources=context,
+            sources=_source_refs(context),
             agent_used=agent_used,
             processing_time=elapsed
         )
@@ -35,38 +37,134 @@ async def chat(request: Request, payload: ChatRequest):
         logger.error(f"Chat failed: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {e}")
 
-async def _process_chat_message(payload: ChatRequest, retriever, answer_agent, modifier_agent):
+@router.post("/chat/batch")
+async def chat_batch(request: Request, payload: BatchChatRequest):
+    """Answers many questions about one repo, streaming NDJSON lines as each answer finishes.
+
+    The first line carries the deduplicated source references shared by all answers;
+    every following line is a BatchChatResult referencing them by chunk_id.
+    """
+    if not payload.messages:
+        raise HTTPException(status_code=400, detail="At least one message is required")
+
+    retriever, answer_agent, modifier_agent, summarizer = await _create_agents(request)
+    if payload.repo_url:
+        await request.app.state.repo_lifecycle.ensure_hot(payload.repo_url)
+
+    try:
+        with span("retrieve_batch", queries=len(payload.messages)):
+            contexts = await retriever.retrieve_batch(
+                payload.messages,
+                repo_url=payload.repo_url,
+                limit=payload.max_context_chunks,
+                scope=payload.scope
+            )
+    except Exception as e:
+        logger.error(f"Batch chat retrieval failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch chat failed: {e}")
+
+    sources = {}
+    for context in contexts:
+        for ref in _source_refs(context):
+            sources.setdefault(ref.chunk_id, ref.model_dump(exclude_none=True))
+
+    semaphore = asyncio.Semaphore(max(1, payload.max_concurrency or 1))
+
+    async def run_one(index: int, message: str, context):
+        async with semaphore:
+            start = time.time()
+            error = None
+            try:
+                agent_used, response = await _respond(
+                    message, context, payload.repo_url, answer_agent, modifier_agent, summarizer
+                )
+            except Exception as e:
+                # One failed answer is reported on its own line; the others keep streaming
+                logger.error(f"Batch chat message {index} failed: {e}")
+                agent_used, response, error = "none", "", str(e)
+            return BatchChatResult(
+                index=index,
+                message=message,
+                response=response,
+                source_ids=[chunk["chunk_id"] for chunk in context],
+                agent_used=agent_used,
+                processing_time=time.time() - start,
+                error=error
+            )
+
+    async def stream():
+        yield json.dumps({"sources": sources}, default=str) + "\n"
+        tasks = [
+            asyncio.create_task(run_one(i, message, context))
+            for i, (message, context) in enumerate(zip(payload.messages, contexts))
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                yield result.model_dump_json(exclude_none=True) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def _source_refs(context) -> List[SourceReference]:
+    return [SourceReference(**{**chunk, "chunk_id": str(chunk["chunk_id"])}) for chunk in context]
+
+async def _create_agents(request: Request):
+    """Builds the chat agents, importing the LLM provider stacks on first use"""
+    qdrant_service = await get_ready_state(request, "qdrant_service")
+    from app.agents.retriever_agent import RetrieverAgent
+    from app.agents.answer_agent import AnswerAgent
+    from app.agents.modifier_agent import ModifierAgent
+
+    retriever = RetrieverAgent(
+        qdrant_service, request.app.state.symbol_graph_store, request.app.state.symbol_index
+    )
+    modifier_agent = ModifierAgent()
+    return retriever, AnswerAgent(), modifier_agent, request.app.state.repo_summarizer
+
+async def _process_chat_message(payload: ChatRequest, retriever, answer_agent, modifier_agent, summarizer=None):
     """Process chat message and determine appropriate agent"""
-    message = payload.message.strip().lower()
-    
-    # Check for specific commands
-    if _is_modification_request(message):
+    with span("retrieve"):
         context = await retriever.retrieve(
             payload.message, 
             repo_url=payload.repo_url, 
-            limit=payload.max_context_chunks
+            limit=payload.max_context_chunks,
+            scope=payload.scope
         )
-        response = await modifier_agent.modify(payload.message, context)
-        return "modifier", response, context
+    agent_used, response = await _respond(
+        payload.message, context, payload.repo_url, answer_agent, modifier_agent, summarizer
+    )
+    return agent_used, response, context
+
+async def _respond(message: str, context, repo_url, answer_agent, modifier_agent, summarizer=None):
+    """Route an already-retrieved context to the appropriate agent"""
+    normalized = message.strip().lower()
     
-    elif _is_readme_request(message):
-        context = await retriever.retrieve(
-            payload.message, 
-            repo_url=payload.repo_url, 
-            limit=payload.max_context_chunks
-        )
-        response = await modifier_agent.generate_readme(context, payload.repo_url or "")
-        return "modifier", response, context
+    # Check for specific commands
+    if _is_modification_request(normalized):
+        with span("llm:modify"):
+            response = await modifier_agent.modify(message, context)
+        return "modifier", response
+    
+    elif _is_readme_request(normalized):
+        repo_summary = None
+        if summarizer and repo_url:
+            try:
+                with span("summarize_repo"):
+                    repo_summary = await summarizer.summarize_repo(repo_url)
+            except Exception as e:
+                logger.warning(f"Whole-repo summary unavailable, README uses retrieved chunks only: {e}")
+        with span("llm:readme"):
+            response = await modifier_agent.generate_readme(context, repo_url or "", repo_summary)
+        return "modifier", response
     
     else:
         # Default: answer agent for general questions
-        context = await retriever.retrieve(
-            payload.message, 
-            repo_url=payload.repo_url, 
-            limit=payload.max_context_chunks
-        )
-        response = await answer_agent.answer(payload.message, context)
-        return "answer", response, context
+        with span("llm:answer"):
+            response = await answer_agent.answer(message, context)
+        return "answer", response
 
 def _is_modification_request(message: str) -> bool:
     """Check if the message is a modification request"""
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 from app.models.schemas import HealthResponse
+from app.utils.profiling import list_profiles
+from app.utils.startup import get_ready_state
 from datetime import datetime
 
 router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
 async def health(request: Request):
+    report = request.app.state.startup_report
+    if not report.ready.is_set():
+        status = "failed" if report.failed else "warming_up"
+        return HealthResponse(
+            status=status,
+            version="1.0.0",
+            services={"qdrant": status},
+            timestamp=datetime.utcnow().isoformat()
+        )
+
     qdrant_service = request.app.state.qdrant_service
     info = await qdrant_service.get_collection_info()
     return HealthResponse(
@@ -14,3 +27,35 @@ async def health(request: Request):
         services={"qdrant": str(info)},
         timestamp=datetime.utcnow().isoformat()
     )
+
+@router.get("/ready")
+async def ready(request: Request):
+    """Readiness probe: 200 once background warm-up has finished, 503 until then"""
+    report = request.app.state.startup_report
+    return JSONResponse(status_code=200 if report.ready.is_set() else 503, content=report.as_dict())
+
+@router.get("/startup-report")
+async def startup_report(request: Request):
+    """Per-phase import and warm-up timings, slowest first"""
+    return request.app.state.startup_report.as_dict()
+
+@router.get("/profiling")
+async def profiling(request: Request):
+    """Event-loop lag statistics and the most recent request profiles on disk"""
+    return {
+        "loop_lag": request.app.state.loop_lag_monitor.as_dict(),
+        "profiles": list_profiles()[:50]
+    }
+
+@router.get("/recall")
+async def recall(request: Request, sample_size: int = 50, top_k: int = 10, tolerance: float = 0.02):
+    """Recall@k of the two-stage (int8 prefetch + rescore) search against exact search, on stored vectors"""
+    vector_service = await get_ready_state(request, "qdrant_service")
+    # With the content-addressed store the chunk vectors live in its shared collection
+    vector_service = getattr(vector_service, "vectors", vector_service)
+    if not hasattr(vector_service, "evaluate_recall"):
+        raise HTTPException(status_code=400, detail="Recall evaluation needs the Qdrant vector backend")
+    try:
+        return await vector_service.evaluate_recall(sample_size=sample_size, top_k=top_k, tolerance=tolerance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Request
 from app.models.schemas import IngestionRequest, IngestionResponse
-from app.agents.ingestion_agent import IngestionAgent
+from app.utils.startup import get_ready_state
 from loguru import logger
 from uuid import uuid4
 
@@ -8,8 +8,11 @@ router = APIRouter()
 
 @router.post("/ingest", response_model=IngestionResponse)
 async def ingest_repo(request: Request, payload: IngestionRequest):
-    qdrant_service = request.app.state.qdrant_service
-    agent = IngestionAgent(qdrant_service)
+    qdrant_service = await get_ready_state(request, "qdrant_service")
+    from app.agents.ingestion_agent import IngestionAgent
+    agent = IngestionAgent(
+        qdrant_service, request.app.state.symbol_graph_store, request.app.state.symbol_index
+    )
     task_id = str(uuid4())
     try:
         result = await agent.ingest_repo(
@@ -18,6 +21,7 @@ async def ingest_repo(request: Request, payload: IngestionRequest):
             include_patterns=payload.include_patterns,
             exclude_patterns=payload.exclude_patterns
         )
+        await request.app.state.repo_lifecycle.record_ingest(result["repo_url"])
         return IngestionResponse(
             task_id=task_id,
             status="completed",
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Request
+from app.models.schemas import RepoPinRequest, RepoSummaryRequest, RepoSummaryResponse, RepoWatchRequest
+from app.utils.startup import get_ready_state
+from loguru import logger
+
+router = APIRouter()
+
+
+@router.get("/repos")
+async def list_repos(request: Request):
+    """Tracked repos (coldest last) with tier, pin state, checkout size and budget usage"""
+    lifecycle = await get_ready_state(request, "repo_lifecycle")
+    return await lifecycle.as_dict()
+
+
+@router.post("/repos/pin")
+async def pin_repo(request: Request, payload: RepoPinRequest):
+    """Pins (or unpins) a repo so budget enforcement never evicts its checkout or vectors"""
+    lifecycle = await get_ready_state(request, "repo_lifecycle")
+    return lifecycle.set_pinned(payload.repo_url, payload.pinned)
+
+
+@router.post("/repos/enforce")
+async def enforce_budgets(request: Request):
+    """Runs budget enforcement now instead of waiting for the next interval"""
+    lifecycle = await get_ready_state(request, "repo_lifecycle")
+    return await lifecycle.enforce()
+
+
+@router.get("/repos/watch")
+async def list_watches(request: Request):
+    """Local repos in watch mode with their update counts and last save-to-index latency"""
+    watcher = await get_ready_state(request, "repo_watcher")
+    return watcher.list_watches()
+
+
+@router.post("/repos/watch")
+async def watch_repo(request: Request, payload: RepoWatchRequest):
+    """Starts (or stops) re-indexing a local checkout's files as they are saved"""
+    watcher = await get_ready_state(request, "repo_watcher")
+    if not payload.enabled:
+        return {"repo_url": payload.repo_url, "watching": watcher.stop_watch(payload.repo_url)}
+    try:
+        return {**await watcher.start_watch(payload.repo_url), "watching": True}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/repos/summary", response_model=RepoSummaryResponse)
+async def summarize_repo(request: Request, payload: RepoSummaryRequest):
+    """Map-reduce summary of every indexed file; unchanged files and directories come from the cache"""
+    summarizer = await get_ready_state(request, "repo_summarizer")
+    await request.app.state.repo_lifecycle.ensure_hot(payload.repo_url)
+    try:
+        return await summarizer.summarize_repo(payload.repo_url)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Repo summary failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Repo summary failed: {e}")
@@ -0,0 +1,87 @@
+import os
+import shutil
+import asyncio
+from typing import List
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import FileResponse
+from app.models.schemas import SnapshotExportRequest, SnapshotImportRequest, SnapshotResponse
+from app.services.snapshot_service import SnapshotService
+from app.utils.startup import get_ready_state
+from loguru import logger
+
+router = APIRouter()
+
+
+async def _snapshot_service(request: Request) -> SnapshotService:
+    vector_service = await get_ready_state(request, "qdrant_service")
+    return SnapshotService(
+        vector_service, request.app.state.symbol_graph_store, request.app.state.symbol_index
+    )
+
+
+@router.post("/snapshots/export", response_model=SnapshotResponse)
+async def export_snapshot(request: Request, payload: SnapshotExportRequest):
+    service = await _snapshot_service(request)
+    try:
+        return await service.export_repo(payload.repo_url)
+    except Exception as e:
+        logger.error(f"Snapshot export failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Snapshot export failed: {e}")
+
+
+@router.get("/snapshots")
+async def list_snapshots(request: Request) -> List[dict]:
+    service = await _snapshot_service(request)
+    return service.list_snapshots()
+
+
+@router.get("/snapshots/{name}")
+async def download_snapshot(request: Request, name: str):
+    service = await _snapshot_service(request)
+    try:
+        path = service.path_for(name)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
+
+@router.post("/snapshots/import", response_model=SnapshotResponse)
+async def import_snapshot(request: Request, payload: SnapshotImportRequest):
+    service = await _snapshot_service(request)
+    try:
+        path = service.path_for(payload.name)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return await _import(service, path, payload.repo_url, payload.force)
+
+
+@router.post("/snapshots/upload", response_model=SnapshotResponse)
+async def upload_snapshot(
+    request: Request, file: UploadFile = File(...), repo_url: str = Form(None), force: bool = Form(False)
+):
+    service = await _snapshot_service(request)
+    name = os.path.basename(file.filename or "upload.snapshot")
+    if not name.endswith(".snapshot"):
+        name += ".snapshot"
+    path = os.path.join(service.snapshot_dir, name)
+    if os.path.exists(path):
+        raise HTTPException(status_code=409, detail=f"Snapshot {name} already exists")
+    await asyncio.to_thread(_save_upload, file.file, path)
+    return await _import(service, path, repo_url, force)
+
+
+def _save_upload(source, path: str):
+    # Written under a temporary name so a failed upload never looks like a snapshot
+    with open(path + ".tmp", "wb") as out:
+        shutil.copyfileobj(source, out)
+    os.replace(path + ".tmp", path)
+
+
+async def _import(service: SnapshotService, path: str, repo_url, force: bool):
+    try:
+        return await service.import_snapshot(path, repo_url=repo_url, force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Snapshot import failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Snapshot import failed: {e}")
@@ -0,0 +1,444 @@
+# D:\DevBuddy\backend\app\services\content_store.py
+import os
+import uuid
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional, Iterable, AsyncIterator, Tuple
+from loguru import logger
+from app.utils.path_scope import normalize_prefix
+
+# Reference fields kept per (repo, chunk); the body and its vector are shared by hash
+REF_COLUMNS = [
+    "repo_url", "content_hash", "chunk_id", "file_path", "function_name", "class_name",
+    "chunk_type", "start_line", "end_line", "file_extension", "rel_path", "is_test", "is_generated"
+]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def point_id_for_hash(digest: str) -> str:
+    return str(uuid.UUID(digest[:32]))
+
+
+class ContentAddressedStore:
+    """
+    Vector store in which each unique chunk body has exactly one vector, keyed by its hash.
+
+    Shared vectors live in the `chunk_content` collection with the body, its
+    docstring and the list of repos that reference it (so repo filters still
+    run inside the vector search). Per-repo references (path, lines, symbol)
+    live in SQLite; a vector is deleted once no reference points at it.
+    File summaries and everything else are delegated to the wrapped service.
+    SQLite is only queried from worker threads, one statement at a time.
+    """
+
+    def __init__(self, base_service, db_path: Optional[str] = None):
+        self.base = base_service
+        self.vectors = base_service.for_collection("chunk_content")
+        db_path = db_path or os.getenv("CONTENT_STORE_DB", os.path.join(os.getcwd(), "local_content_store.sqlite3"))
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS refs ({', '.join(REF_COLUMNS)})")
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(refs)")}
+        for column in REF_COLUMNS:
+            if column not in existing:
+                self.db.execute(f"ALTER TABLE refs ADD COLUMN {column}")
+        self.db.execute("CREATE INDEX IF NOT EXISTS refs_repo ON refs (repo_url)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS refs_hash ON refs (content_hash)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS refs_chunk ON refs (chunk_id)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS refs_path ON refs (repo_url, rel_path)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS refs_file ON refs (repo_url, file_path)")
+        self.db.commit()
+        self._lock = asyncio.Lock()
+        self._db_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # store_file_summaries, search_files, get_collection_info, ... go to the wrapped service
+        return getattr(self.base, name)
+
+    async def initialize(self):
+        await self.base.initialize()
+        await self.vectors.initialize()
+
+    # ---- ingestion -------------------------------------------------------
+
+    def _known_hashes(self, hashes: Iterable[str]) -> set:
+        unique = list(set(hashes))
+        known = set()
+        with self._db_lock:
+            for start in range(0, len(unique), 500):
+                block = unique[start:start + 500]
+                rows = self.db.execute(
+                    f"SELECT DISTINCT content_hash FROM refs WHERE content_hash IN ({','.join('?' * len(block))})", block
+                ).fetchall()
+                known.update(r[0] for r in rows)
+        return known
+
+    def _repo_hashes(self, repo_url: str) -> set:
+        with self._db_lock:
+            return {r[0] for r in self.db.execute(
+                "SELECT DISTINCT content_hash FROM refs WHERE repo_url = ?", (repo_url,)
+            )}
+
+    async def embed_missing(self, chunks, embedding_service) -> np.ndarray:
+        """Embeds only bodies never stored before; vectors of known bodies are read back from the store."""
+        hashes = [content_hash(c) for c in chunks.content]
+        known = await asyncio.to_thread(self._known_hashes, hashes)
+
+        first_index: Dict[str, int] = {}
+        for i, digest in enumerate(hashes):
+            first_index.setdefault(digest, i)
+
+        vectors_by_hash: Dict[str, Any] = {}
+        if known:
+            stored = await self.vectors.retrieve_vectors([point_id_for_hash(h) for h in known])
+            vectors_by_hash.update((h, stored[point_id_for_hash(h)]) for h in known if point_id_for_hash(h) in stored)
+        # A referenced body whose vector went missing (e.g. an interrupted write) is embedded again
+        lost = [h for h in known if h not in vectors_by_hash]
+        new_hashes = [h for h in first_index if h not in vectors_by_hash]
+        logger.info(f"Content store: {len(first_index)} unique bodies, {len(new_hashes)} need embedding")
+
+        if new_hashes:
+            new_embeddings = await embedding_service.embed_code_chunks(
+                [chunks[first_index[h]] for h in new_hashes], include_location=False
+            )
+            vectors_by_hash.update(zip(new_hashes, new_embeddings))
+        if lost:
+            await self._restore_vectors(lost, vectors_by_hash, chunks, first_index)
+
+        embeddings = np.asarray([vectors_by_hash[h] for h in hashes], dtype=np.float32)
+        chunks.embeddings = embeddings
+        return embeddings
+
+    async def _restore_vectors(self, digests: List[str], vectors_by_hash: Dict[str, Any], chunks, first_index: Dict[str, int]):
+        """Writes back the vectors of known bodies; store_chunks only adds vectors for unknown ones."""
+        async with self._lock:
+            stored = await self.vectors.retrieve_vectors([point_id_for_hash(h) for h in digests])
+            digests = [h for h in digests if point_id_for_hash(h) not in stored]
+            if not digests:
+                return
+            rows = [first_index[h] for h in digests]
+            await self.vectors.add_embeddings(
+                [point_id_for_hash(h) for h in digests],
+                [np.asarray(vectors_by_hash[h]).tolist() for h in digests],
+                [
+                    {"content_hash": h, "content": chunks.content[i], "docstring": chunks.docstring[i], "repo_url": []}
+                    for h, i in zip(digests, rows)
+                ]
+            )
+            await self._sync_vectors(digests)
+        logger.warning(f"Content store restored {len(digests)} missing vectors")
+
+    async def store_chunks(self, embeddings, chunks, replace: bool = True):
+        """Writes a repo's references (replacing earlier ones unless replace=False) and vectors for new bodies."""
+        if not len(chunks):
+            return
+        repo_url = chunks.repo_url
+        hashes = [content_hash(c) for c in chunks.content]
+        async with self._lock:
+            known = await asyncio.to_thread(self._known_hashes, hashes)
+            old_hashes = await asyncio.to_thread(self._repo_hashes, repo_url) if replace else set()
+
+            new_rows: Dict[str, int] = {}
+            for i, digest in enumerate(hashes):
+                if digest not in known:
+                    new_rows.setdefault(digest, i)
+            if new_rows:
+                digests = list(new_rows)
+                rows = [new_rows[h] for h in digests]
+                await self.vectors.add_embeddings(
+                    [point_id_for_hash(h) for h in digests],
+                    np.asarray(embeddings)[rows].tolist(),
+                    [
+                        {"content_hash": h, "content": chunks.content[i], "docstring": chunks.docstring[i], "repo_url": []}
+                        for h, i in zip(digests, rows)
+                    ]
+                )
+
+            payload = chunks.payload_columns()
+            ref_rows = [
+                (repo_url, digest, *(payload[col][i] for col in REF_COLUMNS[2:]))
+                for i, digest in enumerate(hashes)
+            ]
+            await asyncio.to_thread(self._replace_refs, repo_url, ref_rows, replace)
+            await self._sync_vectors(old_hashes | set(hashes))
+        logger.info(f"Content store: {len(hashes)} references for {repo_url}, {len(new_rows)} new vectors")
+
+    def _replace_refs(self, repo_url: str, ref_rows: List[tuple], replace: bool = True):
+        with self._db_lock, self.db:
+            if replace:
+                self.db.execute("DELETE FROM refs WHERE repo_url = ?", (repo_url,))
+            self.db.executemany(
+                f"INSERT INTO refs ({', '.join(REF_COLUMNS)}) VALUES ({', '.join('?' * len(REF_COLUMNS))})",
+                ref_rows
+            )
+
+    async def _sync_vectors(self, hashes: Iterable[str]):
+        """Deletes unreferenced vectors and refreshes the repo list on the rest."""
+        repos_by_hash = await asyncio.to_thread(self._repos_by_hash, list(hashes))
+        orphans = [point_id_for_hash(h) for h, repos in repos_by_hash.items() if not repos]
+        await self.vectors.delete_points(orphans)
+
+        groups: Dict[tuple, List[str]] = {}
+        for digest, repos in repos_by_hash.items():
+            if repos:
+                groups.setdefault(tuple(sorted(repos)), []).append(point_id_for_hash(digest))
+        for repos, point_ids in groups.items():
+            await self.vectors.set_payload(point_ids, {"repo_url": list(repos)})
+        if orphans:
+            logger.info(f"Content store removed {len(orphans)} unreferenced vectors")
+
+    def _repos_by_hash(self, hashes: List[str]) -> Dict[str, set]:
+        repos_by_hash: Dict[str, set] = {h: set() for h in hashes}
+        with self._db_lock:
+            for start in range(0, len(hashes), 500):
+                block = hashes[start:start + 500]
+                for digest, repo in self.db.execute(
+                    f"SELECT content_hash, repo_url FROM refs WHERE content_hash IN ({','.join('?' * len(block))})", block
+                ):
+                    repos_by_hash[digest].add(repo)
+        return repos_by_hash
+
+    async def release_repo(self, repo_url: str):
+        """Drops a repo's references; vectors no other repo uses are deleted."""
+        async with self._lock:
+            hashes = await asyncio.to_thread(self._repo_hashes, repo_url)
+            await asyncio.to_thread(self._replace_refs, repo_url, [])
+            await self._sync_vectors(hashes)
+
+    async def delete_repo(self, repo_url: str):
+        await self.release_repo(repo_url)
+        await self.base.delete_repo(repo_url)
+
+    async def delete_files(self, repo_url: str, file_paths: List[str]):
+        """Drops the references of some files of a repo; vectors no longer referenced anywhere are deleted."""
+        if not file_paths:
+            return
+        async with self._lock:
+            hashes = await asyncio.to_thread(self._delete_file_refs, repo_url, list(file_paths))
+            await self._sync_vectors(hashes)
+        await self.base.delete_files(repo_url, file_paths)
+
+    def _delete_file_refs(self, repo_url: str, file_paths: List[str]) -> set:
+        """Deletes the references of some files; returns the hashes they used."""
+        hashes = set()
+        with self._db_lock:
+            for start in range(0, len(file_paths), 500):
+                block = file_paths[start:start + 500]
+                where = f"repo_url = ? AND file_path IN ({','.join('?' * len(block))})"
+                params = [repo_url] + block
+                hashes.update(r[0] for r in self.db.execute(f"SELECT DISTINCT content_hash FROM refs WHERE {where}", params))
+                with self.db:
+                    self.db.execute(f"DELETE FROM refs WHERE {where}", params)
+        return hashes
+
+    async def iter_points(
+        self, repo_url: str, files: bool = False, batch_size: int = 1024
+    ) -> AsyncIterator[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+        """Streams a repo's chunks with their shared vectors and bodies resolved per location."""
+        if files:
+            async for block in self.base.iter_points(repo_url, files=True, batch_size=batch_size):
+                yield block
+            return
+        refs = await asyncio.to_thread(self._refs, "repo_url = ?", [repo_url])
+        for start in range(0, len(refs), batch_size):
+            block = refs[start:start + batch_size]
+            point_ids = [point_id_for_hash(r["content_hash"]) for r in block]
+            vectors = await self.vectors.retrieve_vectors(list(dict.fromkeys(point_ids)))
+            bodies = await self.vectors.retrieve_payloads(point_ids)
+            payloads = []
+            for ref, point_id in zip(block, point_ids):
+                body = bodies.get(point_id, {})
+                payload = {k: v for k, v in ref.items() if k != "content_hash"}
+                payloads.append({**payload, "content": body.get("content"), "docstring": body.get("docstring")})
+            yield np.asarray([vectors[p] for p in point_ids], dtype=np.float32), payloads
+
+    # ---- retrieval -------------------------------------------------------
+
+    def _refs(self, where: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            rows = self.db.execute(f"SELECT {', '.join(REF_COLUMNS)} FROM refs WHERE {where}", params).fetchall()
+        return [dict(zip(REF_COLUMNS, row)) for row in rows]
+
+    def _scope_where(
+        self, repo_url: Optional[str], scope, file_paths: Optional[List[str]] = None
+    ) -> Tuple[str, List[Any]]:
+        """SQL conditions on the reference table selecting a repo, some of its files and a retrieval scope."""
+        clauses, params = ["1 = 1"], []
+        if repo_url:
+            clauses.append("repo_url = ?")
+            params.append(repo_url)
+        if file_paths:
+            clauses.append(f"file_path IN ({','.join('?' * len(file_paths))})")
+            params.extend(file_paths)
+        if scope is None:
+            return " AND ".join(clauses), params
+        if scope.path_prefix:
+            prefix = normalize_prefix(scope.path_prefix)
+            if prefix.endswith(".py"):
+                clauses.append("rel_path = ?")
+                params.append(prefix)
+            else:
+                # substr instead of LIKE: case-sensitive, no wildcard escaping
+                clauses.append("substr(rel_path, 1, ?) = ?")
+                params.extend([len(prefix) + 1, prefix + "/"])
+        if scope.path_glob:
+            clauses.append("rel_path GLOB ?")
+            params.append(scope.path_glob.strip("/"))
+        if scope.exclude_tests:
+            clauses.append("NOT COALESCE(is_test, 0)")
+        if scope.exclude_generated:
+            clauses.append("NOT COALESCE(is_generated, 0)")
+        if scope.chunk_types:
+            clauses.append(f"chunk_type IN ({','.join('?' * len(scope.chunk_types))})")
+            params.extend(scope.chunk_types)
+        if scope.class_name:
+            clauses.append("class_name = ?")
+            params.append(scope.class_name)
+        return " AND ".join(clauses), params
+
+    def _scope_point_ids(
+        self, repo_url: Optional[str], scope, file_paths: Optional[List[str]] = None
+    ) -> Optional[List[str]]:
+        """Shared vectors referenced from inside the scope or files, used as an id pre-filter for the vector search."""
+        if scope is None and not file_paths:
+            return None
+        where, params = self._scope_where(repo_url, scope, file_paths)
+        with self._db_lock:
+            rows = self.db.execute(f"SELECT DISTINCT content_hash FROM refs WHERE {where}", params).fetchall()
+        return [point_id_for_hash(r[0]) for r in rows]
+
+    def _resolve(
+        self, hits: List[Dict[str, Any]], repo_url: Optional[str], limit: Optional[int] = None, scope=None,
+        file_paths: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Turns shared-vector hits into per-location chunks (one hit may be used in several places)."""
+        if not hits:
+            return []
+        by_hash = {h["content_hash"]: h for h in hits}
+        digests = list(by_hash)
+        # A body may also be used outside the scope; only in-scope locations are returned
+        scope_where, scope_params = self._scope_where(repo_url, scope, file_paths)
+        where = f"content_hash IN ({','.join('?' * len(digests))}) AND {scope_where}"
+        params: List[Any] = digests + scope_params
+
+        chunks = []
+        for ref in self._refs(where, params):
+            hit = by_hash[ref["content_hash"]]
+            chunks.append({
+                **ref,
+                "score": hit.get("score", 0.0),
+                "content": None,
+                "docstring": hit.get("docstring"),
+            })
+        chunks.sort(key=lambda c: c["score"], reverse=True)
+        return chunks[:limit] if limit else chunks
+
+    async def search_similar(
+        self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None,
+        file_paths: Optional[List[str]] = None, scope=None
+    ) -> List[Dict[str, Any]]:
+        # Shared vectors carry no file path; the files pre-filter the ids like a scope does
+        point_ids = await asyncio.to_thread(self._scope_point_ids, repo_url, scope, file_paths)
+        if point_ids is not None and not point_ids:
+            return []
+        hits = await self.vectors.search_similar(query_vector, limit=limit, repo_url=repo_url, point_ids=point_ids)
+        return await asyncio.to_thread(self._resolve, hits, repo_url, limit, scope, file_paths)
+
+    async def _top_files(self, query_vector: List[float], repo_url: Optional[str], file_limit: int, scope) -> Optional[List[str]]:
+        """File stage of the hierarchical search; None when too few files matched to narrow anything."""
+        files = await self.base.search_files(query_vector, limit=file_limit, repo_url=repo_url, scope=scope)
+        file_paths = list(dict.fromkeys(f["file_path"] for f in files if f.get("file_path")))
+        return file_paths if len(file_paths) >= file_limit else None
+
+    async def search_hierarchical(
+        self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None, file_limit: int = 20,
+        scope=None
+    ) -> List[Dict[str, Any]]:
+        """Picks the top files from the file summaries first, then searches chunks only within those files."""
+        file_paths = await self._top_files(query_vector, repo_url, file_limit, scope)
+        return await self.search_similar(query_vector, limit=limit, repo_url=repo_url, file_paths=file_paths, scope=scope)
+
+    async def search_similar_batch(
+        self, query_vectors: List[List[float]], limit: int = 10, repo_url: Optional[str] = None,
+        file_paths_per_query: Optional[List[Optional[List[str]]]] = None, scope=None
+    ) -> List[List[Dict[str, Any]]]:
+        if file_paths_per_query and any(file_paths_per_query):
+            # Each query has its own id pre-filter, so they cannot share one matrix product
+            return list(await asyncio.gather(*[
+                self.search_similar(vector, limit=limit, repo_url=repo_url, file_paths=file_paths, scope=scope)
+                for vector, file_paths in zip(query_vectors, file_paths_per_query)
+            ]))
+        point_ids = await asyncio.to_thread(self._scope_point_ids, repo_url, scope)
+        if point_ids is not None and not point_ids:
+            return [[] for _ in query_vectors]
+        batch_hits = await self.vectors.search_similar_batch(
+            query_vectors, limit=limit, repo_url=repo_url, point_ids=point_ids
+        )
+        return await asyncio.to_thread(lambda: [self._resolve(hits, repo_url, limit, scope) for hits in batch_hits])
+
+    async def search_hierarchical_batch(
+        self, query_vectors: List[List[float]], limit: int = 10, repo_url: Optional[str] = None, file_limit: int = 20,
+        scope=None
+    ) -> List[List[Dict[str, Any]]]:
+        file_paths_per_query = await asyncio.gather(*[
+            self._top_files(vector, repo_url, file_limit, scope) for vector in query_vectors
+        ])
+        return await self.search_similar_batch(
+            query_vectors, limit=limit, repo_url=repo_url, file_paths_per_query=file_paths_per_query, scope=scope
+        )
+
+    async def search_by_keywords(
+        self, keywords: List[str], limit: int = 5, repo_url: Optional[str] = None, scope=None
+    ) -> List[Dict[str, Any]]:
+        point_ids = await asyncio.to_thread(self._scope_point_ids, repo_url, scope)
+        if point_ids is not None and not point_ids:
+            return []
+        hits = await self.vectors.search_by_keywords(keywords, limit=limit, repo_url=repo_url, point_ids=point_ids)
+        return await asyncio.to_thread(self._resolve, hits, repo_url, limit, scope)
+
+    async def get_chunks_by_ids(self, chunk_ids: List[str], repo_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not chunk_ids:
+            return []
+        where = f"chunk_id IN ({','.join('?' * len(chunk_ids))})"
+        params: List[Any] = list(chunk_ids)
+        if repo_url:
+            where += " AND repo_url = ?"
+            params.append(repo_url)
+        chunks = {}
+        for ref in await asyncio.to_thread(self._refs, where, params):
+            chunks.setdefault(ref["chunk_id"], {**ref, "score": 0.0, "content": None, "docstring": None})
+        return [chunks[cid] for cid in chunk_ids if cid in chunks]
+
+    async def hydrate_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetches the shared bodies of resolved references in one batched retrieval."""
+        missing = [c for c in chunks if c.get("content") is None and c.get("content_hash")]
+        if missing:
+            bodies = await self.vectors.retrieve_payloads([point_id_for_hash(c["content_hash"]) for c in missing])
+            for chunk in missing:
+                body = bodies.get(point_id_for_hash(chunk["content_hash"]), {})
+                chunk["content"] = body.get("content") or ""
+                chunk["docstring"] = chunk.get("docstring") or body.get("docstring")
+        return chunks
+
+    async def scroll_payloads(self, fields: List[str], repo_url: Optional[str] = None, scope=None) -> List[Dict[str, Any]]:
+        refs = await asyncio.to_thread(self._refs, *self._scope_where(repo_url, scope))
+        if "content" in fields or "docstring" in fields:
+            # Bodies are shared, so they come from the vector payloads rather than the references
+            for ref in refs:
+                ref["content"] = None
+            await self.hydrate_chunks(refs)
+        return [{field: ref.get(field) for field in fields} for ref in refs]
+
+    async def delete_all(self):
+        await self.base.delete_all()
+        await self.vectors.delete_all()
+        await asyncio.to_thread(self._clear_refs)
+
+    def _clear_refs(self):
+        with self._db_lock, self.db:
+            self.db.execute("DELETE FROM refs")
@@ -1,17 +1,26 @@
 # D:\DevBuddy\backend\app\services\embedding_service.py
 import os
 import asyncio
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Iterable
 from loguru import logger
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.embeddings import Embeddings
 from tenacity import retry, wait_random_exponential, stop_after_attempt
+from app.services.stub_providers import use_stub_providers, StubEmbeddings
 
 class EmbeddingService:
+    # Recorded in index snapshots; vectors from a different model are not comparable
+    MODEL_NAME = "models/embedding-001"
+
     def __init__(self):
         """
         Initializes the embedding service with a Gemini embedding model.
         """
+        if use_stub_providers():
+            self.embedding_model = StubEmbeddings()
+            return
+
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             logger.error("GOOGLE_API_KEY environment variable not set.")
@@ -19,7 +28,7 @@ class EmbeddingService:
 
         try:
             self.embedding_model: Embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001",
+                model=self.MODEL_NAME,
                 google_api_key=api_key,
                 task_type="retrieval_document",
                 title="code_chunk"
@@ -36,19 +45,24 @@ class EmbeddingService:
         """
         return self.embedding_model.embed_documents(texts)
 
-    async def embed_code_chunks(self, chunks: List[Dict[str, Any]]) -> List[List[float]]:
+    async def embed_code_chunks(self, chunks: Iterable[Dict[str, Any]], include_location: bool = True) -> np.ndarray:
         """
         Embeds code chunks asynchronously.
+        Returns a contiguous float32 matrix with one row per chunk; when given a
+        ChunkBatch the matrix is also attached to it as `embeddings`.
         """
-        if not chunks:
-            return []
-
-        texts = [self.prepare_chunk_for_embedding(chunk) for chunk in chunks]
+        texts = [self.prepare_chunk_for_embedding(chunk, include_location) for chunk in chunks]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
 
         try:
             logger.info(f"Generating embeddings for {len(texts)} chunks...")
             # Run the synchronous method in a thread pool
             embeddings = await asyncio.to_thread(self._embed_batch_sync, texts)
+            # Single conversion from the provider's nested lists into one float32 block
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if hasattr(chunks, "embeddings"):
+                chunks.embeddings = embeddings
             logger.info("Embeddings generation complete.")
             return embeddings
         except Exception as e:
@@ -79,14 +93,32 @@ class EmbeddingService:
             logger.error(f"Failed to generate single query embedding: {e}")
             raise RuntimeError("Single query embedding generation failed.") from e
 
-    def prepare_chunk_for_embedding(self, chunk: Dict[str, Any]) -> str:
-        """Formats a code chunk with metadata for embedding"""
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds many query texts with a single batched call.
+        Used when several chat questions are answered together.
+        """
+        if not texts or any(not t or not t.strip() for t in texts):
+            raise ValueError("Texts for embedding cannot be empty.")
+        try:
+            logger.info(f"Generating embeddings for {len(texts)} queries in one batch...")
+            return await asyncio.to_thread(self._embed_batch_sync, texts)
+        except Exception as e:
+            logger.error(f"Failed to generate batch query embeddings: {e}")
+            raise RuntimeError("Batch query embedding generation failed.") from e
+
+    def prepare_chunk_for_embedding(self, chunk: Dict[str, Any], include_location: bool = True) -> str:
+        """
+        Formats a code chunk with metadata for embedding.
+        Without location, the text depends only on the chunk body, so identical
+        bodies in different files or repos produce one shareable vector.
+        """
         parts = []
 
-        if chunk.get("file_path"):
+        if include_location and chunk.get("file_path"):
             parts.append(f"File: {chunk['file_path']}")
 
-        if chunk.get("class_name"):
+        if include_location and chunk.get("class_name"):
             parts.append(f"Class: {chunk['class_name']}")
 
         if chunk.get("function_name"):
@@ -0,0 +1,683 @@
+# D:\DevBuddy\backend\app\services\numpy_vector_service.py
+import asyncio
+import json
+import os
+import uuid
+import logging
+import numpy as np
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from app.utils.vector_utils import normalize
+from app.utils.path_scope import normalize_prefix, match_glob
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matrix product, bounds the temporary score/copy memory
+SCAN_BLOCK_ROWS = 65536
+
+
+def _extend_columns(
+    ids: List[str], columns: Dict[str, List[Any]], new_ids: List[str], new_columns: Dict[str, List[Any]]
+) -> Tuple[List[str], Dict[str, List[Any]]]:
+    """Appends rows to columnar payloads; fields missing on either side are None. Returns new lists."""
+    count, added = len(ids), len(new_ids)
+    merged = {k: list(v) for k, v in columns.items()}
+    for key in new_columns.keys() - merged.keys():
+        merged[key] = [None] * count
+    for key, values in merged.items():
+        values.extend(new_columns.get(key, [None] * added))
+    return ids + new_ids, merged
+
+
+def _apply_update(columns: Dict[str, List[Any]], count: int, update: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Sets one field on some rows of columnar payloads. Returns new columns, the input is left untouched."""
+    values = list(columns.get(update["key"], [None] * count))
+    for row in update["rows"]:
+        values[row] = update["value"]
+    return dict(columns, **{update["key"]: values})
+
+
+class NumpyCollection:
+    """
+    A single collection stored as a memory-mapped float32 matrix plus a columnar payload sidecar.
+
+    Layout of the collection directory:
+      vectors.f32        row-major normalized float32 vectors, appended in place
+      payload-<id>.json  immutable sidecar segments {"ids": [...], "columns": {field: [value per row]}},
+                         one per append, so a save writes only its own rows
+      update-<id>.json   immutable field updates {"key", "rows", "value"}, applied in order over the segments
+      meta.json          {"count", "vector_size", "version", "segments", "updates", "deleted"},
+                         rewritten atomically last
+      ivf.npz            optional coarse quantizer (centroids + row assignments)
+
+    Deletes only record tombstones in meta.json; the rows are compacted away
+    once tombstones exceed NUMPY_TOMBSTONE_RATIO of the collection. Segments and
+    updates are folded into one segment once there are NUMPY_MAX_SEGMENTS of them.
+    """
+
+    def __init__(self, path: str, vector_size: int, read_only: bool = False):
+        self.path = path
+        self.vector_size = vector_size
+        self.read_only = read_only
+        self.ivf_min_points = int(os.getenv("NUMPY_IVF_MIN_POINTS", 20000))
+        self.ivf_nprobe = int(os.getenv("NUMPY_IVF_NPROBE", 8))
+        # New rows are assigned to the existing centroids until the collection grew by this fraction
+        self.ivf_rebuild_growth = float(os.getenv("NUMPY_IVF_REBUILD_GROWTH", 0.25))
+        self.tombstone_ratio = float(os.getenv("NUMPY_TOMBSTONE_RATIO", 0.2))
+        self.max_segments = int(os.getenv("NUMPY_MAX_SEGMENTS", 64))
+        self._version = None
+        self._count = 0
+        self._vectors = np.empty((0, vector_size), dtype=np.float32)
+        self._ids: List[str] = []
+        self._columns: Dict[str, List[Any]] = {}
+        self._column_arrays: Dict[str, np.ndarray] = {}
+        self._segments: List[Tuple[str, int]] = []
+        self._updates: List[str] = []
+        self._deleted: List[int] = []
+        self._live: Optional[np.ndarray] = None
+        self._ivf = None
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def refresh(self):
+        """Re-maps the files when another process has published a new version."""
+        for attempt in range(3):
+            try:
+                return self._refresh()
+            except FileNotFoundError:
+                # A compaction elsewhere removed a segment between reading meta.json and the segment
+                if attempt == 2:
+                    raise
+
+    def _refresh(self):
+        try:
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {"count": 0, "version": None}
+        if meta["version"] == self._version and self._version is not None:
+            return
+
+        count = meta["count"]
+        # Indexes written before segments had a single payload.json, possibly ahead of meta.json
+        segments = [tuple(s) for s in meta.get("segments", [["payload.json", count]] if count else [])]
+        updates = meta.get("updates", [])
+        if count:
+            # Segments and updates are immutable, so only the ones published since the last refresh are read
+            incremental = (
+                self._version is not None
+                and segments[:len(self._segments)] == self._segments
+                and updates[:len(self._updates)] == self._updates
+            )
+            known, applied = (len(self._segments), len(self._updates)) if incremental else (0, 0)
+            ids, columns = (self._ids, self._columns) if incremental else ([], {})
+            for name, rows in segments[known:]:
+                with open(self._file(name)) as f:
+                    sidecar = json.load(f)
+                ids, columns = _extend_columns(
+                    ids, columns, sidecar["ids"][:rows], {k: v[:rows] for k, v in sidecar["columns"].items()}
+                )
+            for name in updates[applied:]:
+                with open(self._file(name)) as f:
+                    columns = _apply_update(columns, count, json.load(f))
+        else:
+            ids, columns = [], {}
+
+        self._count, self._ids, self._columns = count, ids, columns
+        self._segments, self._updates = segments, updates
+        self._deleted = meta.get("deleted", [])
+        self._map()
+        self._version = meta["version"]
+
+    def _map(self):
+        """Re-derives the vector memmap, tombstone mask and IVF from the in-memory state."""
+        if self._count:
+            self._vectors = np.memmap(
+                self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self._count, self.vector_size)
+            )
+        else:
+            self._vectors = np.empty((0, self.vector_size), dtype=np.float32)
+        self._live = None
+        if self._deleted:
+            self._live = np.ones(self._count, dtype=bool)
+            self._live[self._deleted] = False
+        self._column_arrays = {}
+        self._ivf = self._load_ivf()
+
+    def _publish(self):
+        """Makes the in-memory state the current version; the columns already hold the written rows."""
+        version = str(uuid.uuid4())
+        meta = {
+            "count": self._count, "vector_size": self.vector_size, "version": version,
+            "segments": [list(s) for s in self._segments], "updates": self._updates, "deleted": self._deleted
+        }
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._file("meta.json"))
+        self._map()
+        self._version = version
+        self._remove_stale_segments()
+
+    def _write_segment(self, ids: List[str], columns: Dict[str, List[Any]]) -> Tuple[str, int]:
+        name = f"payload-{uuid.uuid4().hex}.json"
+        tmp_path = self._file(name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"ids": ids, "columns": columns}, f)
+        os.replace(tmp_path, self._file(name))
+        return name, len(ids)
+
+    def _fold(self):
+        """Replaces all segments and updates by one segment of the current columns."""
+        self._segments = [self._write_segment(self._ids, self._columns)] if self._count else []
+        self._updates = []
+
+    def _remove_stale_segments(self):
+        live = {name for name, _ in self._segments} | set(self._updates)
+        for name in os.listdir(self.path):
+            if name.startswith(("payload", "update-")) and name.endswith(".json") and name not in live:
+                os.remove(self._file(name))
+
+    def append(self, ids: List[str], vectors, payloads):
+        if self.read_only:
+            raise PermissionError("NumPy vector index is opened read-only")
+        self.refresh()
+        matrix = normalize(vectors).reshape(-1, self.vector_size)
+        # Truncate to the published row count so a crashed earlier write cannot misalign rows
+        with open(self._file("vectors.f32"), "ab") as f:
+            f.truncate(self._count * self.vector_size * 4)
+            f.write(matrix.tobytes())
+
+        ids = list(ids)
+        # A ChunkBatch hands over its columns directly instead of per-row dicts
+        if hasattr(payloads, "payload_columns"):
+            new_columns = {k: list(v) for k, v in payloads.payload_columns().items()}
+        else:
+            keys = {k for p in payloads for k in p}
+            new_columns = {k: [p.get(k) for p in payloads] for k in keys}
+        start = self._count
+        self._ids, self._columns = _extend_columns(self._ids, self._columns, ids, new_columns)
+        self._count += len(ids)
+        if len(self._segments) + len(self._updates) >= self.max_segments:
+            # Folds the many small segments of incremental saves back into one
+            self._fold()
+        else:
+            self._segments = self._segments + [self._write_segment(ids, new_columns)]
+        self._extend_ivf(start, matrix)
+        self._publish()
+
+    def clear(self):
+        if self.read_only:
+            raise PermissionError("NumPy vector index is opened read-only")
+        for name in ("vectors.f32", "ivf.npz"):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        self._count, self._ids, self._columns, self._deleted = 0, [], {}, []
+        self._fold()
+        self._publish()
+
+    def delete(self, mask: np.ndarray):
+        """Tombstones the rows selected by a boolean mask, compacting once enough have piled up."""
+        if self.read_only:
+            raise PermissionError("NumPy vector index is opened read-only")
+        self.refresh()
+        deleted = np.union1d(np.asarray(self._deleted, dtype=np.int64), np.flatnonzero(mask))
+        if len(deleted) > self._count * self.tombstone_ratio:
+            keep = np.ones(self._count, dtype=bool)
+            keep[deleted] = False
+            self.rewrite(keep)
+            return
+        self._deleted = deleted.tolist()
+        self._publish()
+
+    def rewrite(self, keep: np.ndarray):
+        """Compacts the collection to the rows selected by a boolean mask."""
+        if self.read_only:
+            raise PermissionError("NumPy vector index is opened read-only")
+        self.refresh()
+        if self._live is not None:
+            keep = keep & self._live
+        rows = np.flatnonzero(keep)
+        vectors = np.asarray(self._vectors[rows]) if len(rows) else np.empty((0, self.vector_size), dtype=np.float32)
+        tmp_path = self._file("vectors.f32.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(vectors.tobytes())
+        ivf = self._load_ivf()
+        self._ids = [self._ids[i] for i in rows]
+        self._columns = {k: [v[i] for i in rows] for k, v in self._columns.items()}
+        self._vectors = np.empty((0, self.vector_size), dtype=np.float32)
+        os.replace(tmp_path, self._file("vectors.f32"))
+        self._count = len(rows)
+        self._fold()
+        self._deleted = []
+        if ivf is not None and self._count >= self.ivf_min_points:
+            # Removing rows does not move the centroids much; keep them and drop the removed assignments
+            centroids, assignments, built = ivf
+            np.savez(self._file("ivf.npz"), centroids=centroids, assignments=assignments[rows], built=built)
+        else:
+            self._write_ivf()
+        self._publish()
+
+    def set_values(self, rows, key: str, value: Any):
+        if self.read_only:
+            raise PermissionError("NumPy vector index is opened read-only")
+        self.refresh()
+        update = {"key": key, "rows": [int(row) for row in rows], "value": value}
+        self._columns = _apply_update(self._columns, self._count, update)
+        if len(self._segments) + len(self._updates) >= self.max_segments:
+            self._fold()
+        else:
+            # Only the changed rows are written, not the whole payload
+            name = f"update-{uuid.uuid4().hex}.json"
+            tmp_path = self._file(name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(update, f)
+            os.replace(tmp_path, self._file(name))
+            self._updates = self._updates + [name]
+        self._publish()
+
+    def rows_for_ids(self, point_ids: List[str]) -> List[int]:
+        wanted = set(point_ids)
+        deleted = set(self._deleted)
+        return [row for row, point_id in enumerate(self._ids) if point_id in wanted and row not in deleted]
+
+    def column(self, key: str) -> np.ndarray:
+        if key not in self._column_arrays:
+            values = self._columns.get(key, [None] * self._count)
+            arr = np.empty(self._count, dtype=object)
+            arr[:] = values
+            self._column_arrays[key] = arr
+        return self._column_arrays[key]
+
+    def mask(
+        self, repo_url: Optional[str] = None, file_paths: Optional[List[str]] = None, scope=None,
+        point_ids: Optional[List[str]] = None, files_only: bool = False
+    ) -> Optional[np.ndarray]:
+        conditions = [] if self._live is None else [self._live]
+        if repo_url:
+            repos = self.column("repo_url")
+            # Shared (content-addressed) points list every repo that references them
+            conditions.append(np.fromiter(
+                ((repo_url in v) if isinstance(v, list) else v == repo_url for v in repos),
+                dtype=bool, count=len(repos)
+            ))
+        if file_paths:
+            conditions.append(np.isin(self.column("file_path"), list(file_paths)))
+        if point_ids is not None:
+            conditions.append(np.isin(np.asarray(self._ids, dtype=object), list(point_ids)))
+        if scope is not None:
+            conditions.extend(self._scope_conditions(scope, files_only))
+        if not conditions:
+            return None
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask = mask & condition
+        return mask
+
+    def _scope_conditions(self, scope, files_only: bool) -> List[np.ndarray]:
+        conditions = []
+        rel_paths = self.column("rel_path")
+        if scope.path_prefix:
+            prefix = normalize_prefix(scope.path_prefix)
+            if prefix.endswith(".py"):
+                conditions.append(rel_paths == prefix)
+            else:
+                conditions.append(np.fromiter(
+                    (bool(v) and prefix in v for v in self.column("dir_prefixes")), dtype=bool, count=self._count
+                ))
+        if scope.path_glob:
+            # Glob per distinct path, not per row
+            unique = [p for p in set(rel_paths.tolist()) if p]
+            conditions.append(np.isin(rel_paths, match_glob(unique, scope.path_glob)))
+        if scope.exclude_tests:
+            conditions.append(self.column("is_test") != True)  # noqa: E712 (object column, None counts as False)
+        if scope.exclude_generated:
+            conditions.append(self.column("is_generated") != True)  # noqa: E712
+        if not files_only and scope.chunk_types:
+            conditions.append(np.isin(self.column("chunk_type"), list(scope.chunk_types)))
+        if not files_only and scope.class_name:
+            conditions.append(self.column("class_name") == scope.class_name)
+        return conditions
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        return {key: values[row] for key, values in self._columns.items()}
+
+    def hit(self, row: int, score: float) -> Dict[str, Any]:
+        """Search result for a row, without the chunk body (see hydrate_chunks)."""
+        payload = {key: values[row] for key, values in self._columns.items() if key != "content"}
+        return {"chunk_id": self._ids[row], "point_id": self._ids[row], "score": score, **payload}
+
+    def _write_ivf(self):
+        """Builds a k-means coarse quantizer once the collection is large enough to benefit."""
+        ivf_path = self._file("ivf.npz")
+        if self._count < self.ivf_min_points:
+            if os.path.exists(ivf_path):
+                os.remove(ivf_path)
+            return
+        vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self._count, self.vector_size))
+        nlist = int(np.sqrt(self._count))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(vectors[rng.choice(self._count, size=min(self._count, nlist * 40), replace=False)])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(10):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = normalize(centroids)
+
+        assignments = np.empty(self._count, dtype=np.int32)
+        for start in range(0, self._count, SCAN_BLOCK_ROWS):
+            block = vectors[start:start + SCAN_BLOCK_ROWS]
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        np.savez(ivf_path, centroids=centroids, assignments=assignments, built=self._count)
+
+    def _extend_ivf(self, start: int, matrix: np.ndarray):
+        """Assigns appended rows to the existing centroids; retrains only past the growth threshold."""
+        ivf = self._read_ivf()
+        if ivf is None or len(ivf[1]) != start or self._count > ivf[2] * (1 + self.ivf_rebuild_growth):
+            self._write_ivf()
+            return
+        centroids, assignments, built = ivf
+        added = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+        np.savez(self._file("ivf.npz"), centroids=centroids, assignments=np.concatenate([assignments, added]), built=built)
+
+    def _read_ivf(self):
+        ivf_path = self._file("ivf.npz")
+        if not os.path.exists(ivf_path):
+            return None
+        ivf = np.load(ivf_path)
+        built = int(ivf["built"]) if "built" in ivf else len(ivf["assignments"])
+        return ivf["centroids"], ivf["assignments"], built
+
+    def _load_ivf(self):
+        ivf = self._read_ivf() if self._count else None
+        if ivf is None or len(ivf[1]) != self._count:
+            return None
+        return ivf
+
+    def search(self, query_vectors, limit: int, mask: Optional[np.ndarray] = None):
+        """Returns, per query, a list of (row, score) for the best matching rows."""
+        queries = normalize(query_vectors).reshape(-1, self.vector_size)
+        if not self._count:
+            return [[] for _ in queries]
+
+        rows = np.arange(self._count) if mask is None else np.flatnonzero(mask)
+        # A selective filter leaves few enough rows to scan exactly; probing would only lose recall
+        use_ivf = self._ivf is not None and len(rows) >= self.ivf_min_points
+        results = []
+        for query in queries:
+            candidates = rows
+            if use_ivf:
+                centroids, assignments, _ = self._ivf
+                probes = np.argsort(-(centroids @ query))[:self.ivf_nprobe]
+                candidates = rows[np.isin(assignments[rows], probes)]
+            results.append(self._scan(query[None, :], candidates, limit)[0])
+        return results
+
+    def search_batch(self, query_vectors, limit: int, mask: Optional[np.ndarray] = None):
+        """Brute-force scores many queries with one matrix product per block of rows."""
+        queries = normalize(query_vectors).reshape(-1, self.vector_size)
+        if not self._count:
+            return [[] for _ in queries]
+        rows = np.arange(self._count) if mask is None else np.flatnonzero(mask)
+        return self._scan(queries, rows, limit)
+
+    def _scan(self, queries: np.ndarray, rows: np.ndarray, limit: int):
+        if not len(rows):
+            return [[] for _ in queries]
+        scores = np.empty((len(queries), len(rows)), dtype=np.float32)
+        contiguous = len(rows) == self._count
+        for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+            block_rows = rows[start:start + SCAN_BLOCK_ROWS]
+            block = self._vectors[start:start + len(block_rows)] if contiguous else self._vectors[block_rows]
+            scores[:, start:start + len(block_rows)] = queries @ block.T
+
+        k = min(limit, len(rows))
+        results = []
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, k - 1)[:k]
+            top = top[np.argsort(-query_scores[top])]
+            results.append([(int(rows[i]), float(query_scores[i])) for i in top])
+        return results
+
+
+class NumpyVectorService:
+    """Embedded vector index with the QdrantService interface, backed by NumPy and mmap."""
+
+    def __init__(self, collection_name: str = "code_chunks", vector_size: int = 768, read_only: Optional[bool] = None):
+        base_path = os.getenv("NUMPY_INDEX_PATH", os.path.join(os.getcwd(), "local_numpy_db"))
+        if read_only is None:
+            read_only = os.getenv("NUMPY_INDEX_READ_ONLY", "false").lower() == "true"
+        self.collection_name = collection_name
+        self.file_collection_name = f"{collection_name}_files"
+        self.vector_size = vector_size
+        self.collection = NumpyCollection(os.path.join(base_path, collection_name), vector_size, read_only)
+        self.file_collection = NumpyCollection(os.path.join(base_path, self.file_collection_name), vector_size, read_only)
+
+    def for_collection(self, collection_name: str) -> "NumpyVectorService":
+        """Returns a service bound to another collection, without a file-summary collection."""
+        sibling = NumpyVectorService.__new__(NumpyVectorService)
+        sibling.collection_name = collection_name
+        sibling.file_collection_name = None
+        sibling.vector_size = self.vector_size
+        base_path = os.path.dirname(self.collection.path)
+        sibling.collection = NumpyCollection(os.path.join(base_path, collection_name), self.vector_size, self.collection.read_only)
+        sibling.file_collection = None
+        return sibling
+
+    async def initialize(self):
+        for collection in (self.collection, self.file_collection):
+            if collection:
+                collection.refresh()
+        logger.info("NumPy vector index initialized.")
+
+    async def add_embeddings(self, ids: List[str], embeddings: List[List[float]], metadata: List[dict]):
+        await asyncio.to_thread(self.collection.append, ids, embeddings, metadata)
+
+    async def store_chunks(self, embeddings: List[List[float]], metadata_list: List[dict]):
+        if not len(embeddings):
+            return
+        ids = [str(uuid.uuid4()) for _ in range(len(embeddings))]
+        await asyncio.to_thread(self.collection.append, ids, embeddings, metadata_list)
+
+    async def store_file_summaries(self, embeddings: List[List[float]], metadata_list: List[dict]):
+        if not len(embeddings):
+            return
+        ids = [str(uuid.uuid4()) for _ in range(len(embeddings))]
+        await asyncio.to_thread(self.file_collection.append, ids, embeddings, metadata_list)
+
+    def _search(
+        self, collection: NumpyCollection, query_vector, limit, repo_url=None, file_paths=None,
+        scope=None, point_ids=None, files_only=False
+    ):
+        collection.refresh()
+        mask = collection.mask(repo_url, file_paths, scope, point_ids, files_only)
+        hits = collection.search(query_vector, limit, mask)[0]
+        return [collection.hit(row, score) for row, score in hits]
+
+    async def search_similar(
+        self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None,
+        file_paths: Optional[List[str]] = None, scope=None, point_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(
+            self._search, self.collection, query_vector, limit, repo_url, file_paths, scope, point_ids
+        )
+
+    def _search_batch(self, query_vectors, limit, repo_url=None, file_paths_per_query=None, scope=None, point_ids=None):
+        collection = self.collection
+        collection.refresh()
+        if not file_paths_per_query or not any(file_paths_per_query):
+            # Shared filter: score every query in one matrix product per block
+            batch_hits = collection.search_batch(query_vectors, limit, collection.mask(repo_url, None, scope, point_ids))
+        else:
+            batch_hits = [
+                collection.search(vector, limit, collection.mask(repo_url, file_paths, scope, point_ids))[0]
+                for vector, file_paths in zip(query_vectors, file_paths_per_query)
+            ]
+        return [
+            [collection.hit(row, score) for row, score in hits]
+            for hits in batch_hits
+        ]
+
+    async def search_similar_batch(
+        self, query_vectors: List[List[float]], limit: int = 10, repo_url: Optional[str] = None,
+        file_paths_per_query: Optional[List[Optional[List[str]]]] = None, scope=None,
+        point_ids: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        return await asyncio.to_thread(
+            self._search_batch, query_vectors, limit, repo_url, file_paths_per_query, scope, point_ids
+        )
+
+    async def search_files(
+        self, query_vector: List[float], limit: int = 20, repo_url: Optional[str] = None, scope=None
+    ) -> List[Dict[str, Any]]:
+        results = await asyncio.to_thread(
+            self._search, self.file_collection, query_vector, limit, repo_url, None, scope, None, True
+        )
+        for r in results:
+            r.pop("chunk_id", None)
+            r.pop("point_id", None)
+        return results
+
+    async def search_hierarchical(
+        self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None, file_limit: int = 20,
+        scope=None
+    ) -> List[Dict[str, Any]]:
+        """Picks the top files first, then searches chunks only within those files."""
+        files = await self.search_files(query_vector, limit=file_limit, repo_url=repo_url, scope=scope)
+        # A repo ingested twice (or a path under two repos) repeats files; count each once
+        file_paths = list(dict.fromkeys(f["file_path"] for f in files if f.get("file_path")))
+        if len(file_paths) < file_limit:
+            return await self.search_similar(query_vector, limit=limit, repo_url=repo_url, scope=scope)
+        return await self.search_similar(query_vector, limit=limit, repo_url=repo_url, file_paths=file_paths, scope=scope)
+
+    async def search_hierarchical_batch(
+        self, query_vectors: List[List[float]], limit: int = 10, repo_url: Optional[str] = None, file_limit: int = 20,
+        scope=None
+    ) -> List[List[Dict[str, Any]]]:
+        collection = self.file_collection
+        collection.refresh()
+        file_mask = collection.mask(repo_url, scope=scope, files_only=True)
+        file_hits = collection.search_batch(query_vectors, file_limit, file_mask)
+        file_paths_per_query = []
+        for hits in file_hits:
+            file_paths = [collection.payload(row).get("file_path") for row, _ in hits]
+            file_paths = list(dict.fromkeys(f for f in file_paths if f))
+            file_paths_per_query.append(file_paths if len(file_paths) >= file_limit else None)
+        return await self.search_similar_batch(query_vectors, limit, repo_url, file_paths_per_query, scope=scope)
+
+    async def search_by_keywords(
+        self, keywords: List[str], limit: int = 5, repo_url: Optional[str] = None, scope=None,
+        point_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        collection = self.collection
+        collection.refresh()
+        mask = collection.mask(repo_url, scope=scope, point_ids=point_ids)
+        rows = range(collection._count) if mask is None else np.flatnonzero(mask)
+        contents = collection.column("content")
+
+        results = []
+        for row in rows:
+            content = contents[row] or ""
+            if all(kw in content for kw in keywords):
+                results.append(collection.hit(int(row), 1.0))
+                if len(results) >= limit:
+                    break
+        return results
+
+    async def get_chunks_by_ids(self, chunk_ids: List[str], repo_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not chunk_ids:
+            return []
+        collection = self.collection
+        collection.refresh()
+        mask = np.isin(collection.column("chunk_id"), list(chunk_ids))
+        repo_mask = collection.mask(repo_url)
+        if repo_mask is not None:
+            mask &= repo_mask
+
+        chunks = {}
+        for row in np.flatnonzero(mask):
+            chunk = collection.hit(int(row), 0.0)
+            chunks.setdefault(chunk["chunk_id"], chunk)
+        return [chunks[cid] for cid in chunk_ids if cid in chunks]
+
+    async def hydrate_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        missing = [c for c in chunks if c.get("content") is None and c.get("point_id")]
+        if missing:
+            payloads = await self.retrieve_payloads([c["point_id"] for c in missing])
+            for chunk in missing:
+                chunk["content"] = payloads.get(chunk["point_id"], {}).get("content") or ""
+        return chunks
+
+    async def scroll_payloads(self, fields: List[str], repo_url: Optional[str] = None, scope=None) -> List[Dict[str, Any]]:
+        collection = self.collection
+        collection.refresh()
+        mask = collection.mask(repo_url, scope=scope)
+        rows = range(collection._count) if mask is None else np.flatnonzero(mask)
+        columns = {field: collection.column(field) for field in fields}
+        return [{field: values[row] for field, values in columns.items()} for row in rows]
+
+    async def iter_points(
+        self, repo_url: str, files: bool = False, batch_size: int = 1024
+    ) -> AsyncIterator[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+        collection = self.file_collection if files else self.collection
+        collection.refresh()
+        rows = np.flatnonzero(collection.mask(repo_url))
+        for start in range(0, len(rows), batch_size):
+            block = rows[start:start + batch_size]
+            yield np.asarray(collection._vectors[block]), [collection.payload(row) for row in block]
+
+    async def delete_repo(self, repo_url: str):
+        for collection in (self.collection, self.file_collection):
+            if collection:
+                collection.refresh()
+                mask = collection.mask(repo_url)
+                if mask is not None and mask.any():
+                    await asyncio.to_thread(collection.delete, mask)
+
+    async def delete_files(self, repo_url: str, file_paths: List[str]):
+        """Removes the chunks and file summaries of some files of a repo (incremental updates)."""
+        if not file_paths:
+            return
+        for collection in (self.collection, self.file_collection):
+            if collection:
+                collection.refresh()
+                mask = collection.mask(repo_url, file_paths)
+                if mask is not None and mask.any():
+                    await asyncio.to_thread(collection.delete, mask)
+
+    async def get_collection_info(self) -> Dict[str, Any]:
+        self.collection.refresh()
+        return {"collection": self.collection_name, "points_count": self.collection._count - len(self.collection._deleted), "status": "green"}
+
+    async def set_payload(self, point_ids: List[str], payload: Dict[str, Any]):
+        self.collection.refresh()
+        rows = self.collection.rows_for_ids(point_ids)
+        for key, value in payload.items():
+            await asyncio.to_thread(self.collection.set_values, rows, key, value)
+
+    async def delete_points(self, point_ids: List[str]):
+        if not point_ids:
+            return
+        self.collection.refresh()
+        mask = np.isin(np.array(self.collection._ids, dtype=object), list(point_ids))
+        await asyncio.to_thread(self.collection.delete, mask)
+
+    async def retrieve_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        collection = self.collection
+        collection.refresh()
+        return {collection._ids[row]: collection._vectors[row] for row in collection.rows_for_ids(point_ids)}
+
+    async def retrieve_payloads(self, point_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        collection = self.collection
+        collection.refresh()
+        return {collection._ids[row]: collection.payload(row) for row in collection.rows_for_ids(point_ids)}
+
+    async def delete_all(self):
+        for collection in (self.collection, self.file_collection):
+            if collection:
+                await asyncio.to_thread(collection.clear)
@@ -1,29 +1,174 @@
 # D:\DevBuddy\backend\app\services\qdrant_service.py
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from typing import List, Dict, Any, Optional
+from qdrant_client.http.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny, PayloadSchemaType,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, QuantizationSearchParams, SearchRequest,
+    Batch, PointIdsList, FilterSelector, PayloadSelectorExclude, HasIdCondition
+)
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import os
 import uuid
 import logging
+import numpy as np
+from app.utils.vector_utils import cosine_top_k
+from app.utils.path_scope import normalize_prefix, literal_glob_prefix, match_glob
 
 logger = logging.getLogger(__name__)
 
+# Points per upsert request; payload dicts are only materialized one slice at a time
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", 256))
+
+# Search hits carry metadata only; bodies are fetched by hydrate_chunks for the chunks that reach the prompt
+SEARCH_PAYLOAD = PayloadSelectorExclude(exclude=["content"])
+
+
+# Filtered searches on these keys must not fall back to full payload scans
+PAYLOAD_INDEXES = {
+    "repo_url": PayloadSchemaType.KEYWORD,
+    "file_path": PayloadSchemaType.KEYWORD,
+    "chunk_id": PayloadSchemaType.KEYWORD,
+    # Retrieval scopes
+    "rel_path": PayloadSchemaType.KEYWORD,
+    "dir_prefixes": PayloadSchemaType.KEYWORD,
+    "chunk_type": PayloadSchemaType.KEYWORD,
+    "class_name": PayloadSchemaType.KEYWORD,
+    "is_test": PayloadSchemaType.BOOL,
+    "is_generated": PayloadSchemaType.BOOL,
+}
+
+
+def _hit(point, score: Optional[float] = None) -> Dict[str, Any]:
+    return {
+        "chunk_id": point.id, "point_id": str(point.id),
+        "score": point.score if score is None else score, **(point.payload or {})
+    }
+
 class QdrantService:
     def __init__(self, collection_name: str = "code_chunks", vector_size: int = 768):
-        local_qdrant_path = os.path.join(os.getcwd(), "local_qdrant_db")
-        self.client = AsyncQdrantClient(path=local_qdrant_path)
+        qdrant_url = os.getenv("QDRANT_URL")
+        # Embedded storage unless a Qdrant server is configured (docker-compose sets QDRANT_URL)
+        self.embedded = not qdrant_url
+        if self.embedded:
+            self.client = AsyncQdrantClient(path=os.path.join(os.getcwd(), "local_qdrant_db"))
+        else:
+            self.client = AsyncQdrantClient(url=qdrant_url, api_key=os.getenv("QDRANT_API_KEY") or None)
         self.collection_name = collection_name
+        # One summary vector per file, used to narrow chunk search on large repos
+        self.file_collection_name = f"{collection_name}_files"
         self.vector_size = vector_size
+        # "exact" searches full float vectors; "two_stage" prefetches candidates over int8
+        # quantized vectors (originals kept on disk) and rescores them exactly with NumPy
+        self.search_mode = os.getenv("QDRANT_SEARCH_MODE", "exact")
+        if self.search_mode == "two_stage" and self.embedded:
+            # Embedded Qdrant ignores quantization configs, so stage 1 would be a second full-precision scan
+            logger.warning("QDRANT_SEARCH_MODE=two_stage needs a Qdrant server (QDRANT_URL); using exact search")
+            self.search_mode = "exact"
+        self.oversampling = int(os.getenv("QDRANT_OVERSAMPLING", 4))
+
+    def for_collection(self, collection_name: str) -> "QdrantService":
+        """Returns a service bound to another collection that shares this client.
+
+        Embedded storage allows only one client per path, so extra collections
+        must reuse it. The sibling has no file-summary collection of its own.
+        """
+        sibling = object.__new__(QdrantService)
+        sibling.__dict__.update(self.__dict__)
+        sibling.collection_name = collection_name
+        sibling.file_collection_name = None
+        return sibling
 
     async def initialize(self):
+        for name in (self.collection_name, self.file_collection_name):
+            if name:
+                await self._ensure_collection(name)
+        logger.info("Qdrant service initialized and collection checked.")
+
+    async def _ensure_collection(self, name: str):
+        two_stage = self.search_mode == "two_stage"
+        quantization_config = ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        ) if two_stage else None
         try:
-            await self.client.get_collection(self.collection_name)
+            await self.client.get_collection(name)
+            if two_stage:
+                await self.client.update_collection(collection_name=name, quantization_config=quantization_config)
         except Exception:
             await self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE),
+                collection_name=name,
+                vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE, on_disk=two_stage),
+                quantization_config=quantization_config,
             )
-        logger.info("Qdrant service initialized and collection checked.")
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            await self.client.create_payload_index(
+                collection_name=name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+
+    def _build_filter(
+        self, repo_url: Optional[str] = None, file_paths: Optional[List[str]] = None, scope=None,
+        rel_paths: Optional[List[str]] = None, point_ids: Optional[List[str]] = None, files_only: bool = False
+    ) -> Optional[Filter]:
+        must_conditions, must_not = [], []
+        if repo_url:
+            must_conditions.append(FieldCondition(key="repo_url", match=MatchValue(value=repo_url)))
+        if file_paths:
+            must_conditions.append(FieldCondition(key="file_path", match=MatchAny(any=list(file_paths))))
+        if rel_paths is not None:
+            must_conditions.append(FieldCondition(key="rel_path", match=MatchAny(any=list(rel_paths))))
+        if point_ids is not None:
+            must_conditions.append(HasIdCondition(has_id=list(point_ids)))
+        if scope is not None:
+            if scope.path_prefix:
+                prefix = normalize_prefix(scope.path_prefix)
+                key = "rel_path" if prefix.endswith(".py") else "dir_prefixes"
+                must_conditions.append(FieldCondition(key=key, match=MatchValue(value=prefix)))
+            if scope.exclude_tests:
+                must_not.append(FieldCondition(key="is_test", match=MatchValue(value=True)))
+            if scope.exclude_generated:
+                must_not.append(FieldCondition(key="is_generated", match=MatchValue(value=True)))
+            # File summaries only carry path fields
+            if not files_only and scope.chunk_types:
+                must_conditions.append(FieldCondition(key="chunk_type", match=MatchAny(any=list(scope.chunk_types))))
+            if not files_only and scope.class_name:
+                must_conditions.append(FieldCondition(key="class_name", match=MatchValue(value=scope.class_name)))
+        if not must_conditions and not must_not:
+            return None
+        return Filter(must=must_conditions or None, must_not=must_not or None)
+
+    async def _glob_paths(self, repo_url: Optional[str], scope) -> Optional[List[str]]:
+        """Resolves a scope's path glob to the repo's matching files (one point per file to scan)."""
+        if scope is None or not scope.path_glob:
+            return None
+        prefix = literal_glob_prefix(scope.path_glob)
+        conditions = [FieldCondition(key="dir_prefixes", match=MatchValue(value=prefix))] if prefix else []
+        if repo_url:
+            conditions.append(FieldCondition(key="repo_url", match=MatchValue(value=repo_url)))
+        rel_paths, offset = set(), None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.file_collection_name or self.collection_name,
+                scroll_filter=Filter(must=conditions) if conditions else None,
+                limit=1000,
+                offset=offset,
+                with_payload=["rel_path"],
+                with_vectors=False,
+            )
+            rel_paths.update((p.payload or {}).get("rel_path") for p in points)
+            if offset is None:
+                break
+        rel_paths.discard(None)
+        return match_glob(sorted(rel_paths), scope.path_glob)
+
+    async def _scope_filter(
+        self, repo_url: Optional[str] = None, file_paths: Optional[List[str]] = None, scope=None,
+        point_ids: Optional[List[str]] = None, files_only: bool = False
+    ):
+        """Returns (filter, matchable); matchable is False when a glob matched no file."""
+        rel_paths = await self._glob_paths(repo_url, scope)
+        if rel_paths is not None and not rel_paths:
+            return None, False
+        return self._build_filter(repo_url, file_paths, scope, rel_paths, point_ids, files_only), True
 
     async def add_embeddings(self, ids: List[str], embeddings: List[List[float]], metadata: List[dict]):
         points = [
@@ -35,62 +180,373 @@ class QdrantService:
             points=points
         )
 
-    async def store_chunks(self, embeddings: List[List[float]], metadata_list: List[dict]):
+    async def store_chunks(self, embeddings, metadata_list):
+        """Upserts chunks from a float32 matrix (or nested lists) and a ChunkBatch (or list of payloads)."""
+        count = len(embeddings)
+        for start in range(0, count, UPSERT_BATCH_SIZE):
+            end = min(start + UPSERT_BATCH_SIZE, count)
+            block = embeddings[start:end]
+            await self.client.upsert(
+                collection_name=self.collection_name,
+                points=Batch(
+                    ids=[str(uuid.uuid4()) for _ in range(start, end)],
+                    vectors=block.tolist() if isinstance(block, np.ndarray) else list(block),
+                    payloads=[metadata_list[i] for i in range(start, end)]
+                )
+            )
+
+    async def store_file_summaries(self, embeddings: List[List[float]], metadata_list: List[dict]):
+        if not embeddings:
+            return
         points = [
             PointStruct(id=str(uuid.uuid4()), vector=embedding, payload=metadata)
             for embedding, metadata in zip(embeddings, metadata_list)
         ]
         await self.client.upsert(
-            collection_name=self.collection_name,
+            collection_name=self.file_collection_name,
             points=points
         )
 
     async def query_similar_chunks(self, query_vector: List[float], top_k: int = 5, query_filter: Filter = None):
+        if self.search_mode == "two_stage":
+            return await self._two_stage_search(query_vector, top_k, query_filter)
         results = await self.client.search(
             collection_name=self.collection_name,
             query_vector=query_vector,
             limit=top_k,
             query_filter=query_filter,
+            with_payload=SEARCH_PAYLOAD,
         )
         return results
 
-    async def search_similar(self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None) -> List[Dict[str, Any]]:
-        query_filter = None
-        if repo_url:
-            query_filter = Filter(
-                must=[FieldCondition(key="repo_url", match=MatchValue(value=repo_url))]
+    async def _two_stage_search(self, query_vector: List[float], top_k: int, query_filter: Filter = None):
+        # Stage 1: oversampled candidate scan over the quantized vectors only
+        candidates = await self.client.search(
+            collection_name=self.collection_name,
+            query_vector=query_vector,
+            limit=top_k * self.oversampling,
+            query_filter=query_filter,
+            search_params=SearchParams(quantization=QuantizationSearchParams(ignore=False, rescore=False)),
+            with_payload=SEARCH_PAYLOAD,
+            with_vectors=True,
+        )
+        if not candidates:
+            return []
+
+        # Stage 2: exact rescoring of the shortlist against the full-precision vectors
+        top, scores = cosine_top_k(query_vector, [c.vector for c in candidates], top_k)
+        results = []
+        for idx, score in zip(top, scores):
+            point = candidates[idx]
+            point.score = float(score)
+            point.vector = None
+            results.append(point)
+        return results
+
+    async def query_similar_chunks_batch(self, query_vectors: List[List[float]], top_k: int, query_filters: List[Optional[Filter]]):
+        """Runs many searches against the chunk collection in a single batch request."""
+        two_stage = self.search_mode == "two_stage"
+        requests = [
+            SearchRequest(
+                vector=vector,
+                filter=query_filter,
+                limit=top_k * self.oversampling if two_stage else top_k,
+                with_payload=SEARCH_PAYLOAD,
+                with_vector=two_stage,
+                params=SearchParams(quantization=QuantizationSearchParams(ignore=False, rescore=False)) if two_stage else None,
             )
+            for vector, query_filter in zip(query_vectors, query_filters)
+        ]
+        batch_results = await self.client.search_batch(collection_name=self.collection_name, requests=requests)
+        if not two_stage:
+            return batch_results
+
+        rescored = []
+        for vector, candidates in zip(query_vectors, batch_results):
+            top, scores = cosine_top_k(vector, [c.vector for c in candidates], top_k)
+            points = []
+            for idx, score in zip(top, scores):
+                point = candidates[idx]
+                point.score = float(score)
+                point.vector = None
+                points.append(point)
+            rescored.append(points)
+        return rescored
+
+    async def evaluate_recall(self, sample_size: int = 50, top_k: int = 10, tolerance: float = 0.02) -> Dict[str, Any]:
+        """Compares two-stage results against exact search, using stored vectors as sample queries."""
+        if self.embedded:
+            raise ValueError("Recall evaluation needs a Qdrant server (QDRANT_URL); embedded Qdrant has no quantized search")
+        samples, _ = await self.client.scroll(
+            collection_name=self.collection_name,
+            limit=sample_size,
+            with_payload=False,
+            with_vectors=True,
+        )
+        recalls = []
+        for sample in samples:
+            exact = await self.client.search(
+                collection_name=self.collection_name,
+                query_vector=sample.vector,
+                limit=top_k,
+                search_params=SearchParams(exact=True),
+            )
+            approx = await self._two_stage_search(sample.vector, top_k)
+            expected = {r.id for r in exact}
+            if expected:
+                recalls.append(len(expected & {r.id for r in approx}) / len(expected))
+
+        recall = sum(recalls) / len(recalls) if recalls else 1.0
+        report = {
+            "queries": len(recalls),
+            "top_k": top_k,
+            "oversampling": self.oversampling,
+            "recall": recall,
+            "tolerance": tolerance,
+            "within_tolerance": recall >= 1.0 - tolerance
+        }
+        logger.info(f"Two-stage recall@{top_k}: {recall:.4f} over {len(recalls)} queries")
+        return report
+
+    async def search_similar(
+        self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None,
+        file_paths: Optional[List[str]] = None, scope=None, point_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        query_filter, matchable = await self._scope_filter(repo_url, file_paths, scope, point_ids)
+        if not matchable:
+            return []
 
         results = await self.query_similar_chunks(query_vector, top_k=limit, query_filter=query_filter)
+        return [_hit(r) for r in results]
+
+    async def search_similar_batch(
+        self, query_vectors: List[List[float]], limit: int = 10, repo_url: Optional[str] = None,
+        file_paths_per_query: Optional[List[Optional[List[str]]]] = None, scope=None,
+        point_ids: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        file_paths_per_query = file_paths_per_query or [None] * len(query_vectors)
+        rel_paths = await self._glob_paths(repo_url, scope)
+        if rel_paths is not None and not rel_paths:
+            return [[] for _ in query_vectors]
+        query_filters = [
+            self._build_filter(repo_url, file_paths, scope, rel_paths, point_ids) for file_paths in file_paths_per_query
+        ]
+        batch_results = await self.query_similar_chunks_batch(query_vectors, limit, query_filters)
         return [
-            {"chunk_id": r.id, "score": r.score, **(r.payload or {})}
+            [_hit(r) for r in results]
+            for results in batch_results
+        ]
+
+    async def search_files(
+        self, query_vector: List[float], limit: int = 20, repo_url: Optional[str] = None, scope=None
+    ) -> List[Dict[str, Any]]:
+        query_filter, matchable = await self._scope_filter(repo_url, scope=scope, files_only=True)
+        if not matchable:
+            return []
+        results = await self.client.search(
+            collection_name=self.file_collection_name,
+            query_vector=query_vector,
+            limit=limit,
+            query_filter=query_filter,
+        )
+        return [
+            {"score": r.score, **(r.payload or {})}
             for r in results
         ]
 
-    async def search_by_keywords(self, keywords: List[str], limit: int = 5, repo_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def search_hierarchical(
+        self, query_vector: List[float], limit: int = 10, repo_url: Optional[str] = None, file_limit: int = 20,
+        scope=None
+    ) -> List[Dict[str, Any]]:
+        """Picks the top files first, then searches chunks only within those files."""
+        files = await self.search_files(query_vector, limit=file_limit, repo_url=repo_url, scope=scope)
+        # A repo ingested twice (or a path under two repos) repeats files; count each once
+        file_paths = list(dict.fromkeys(f["file_path"] for f in files if f.get("file_path")))
+
+        # Fewer hits than requested means every file of the repo (or scope) is a candidate
+        # (or the repo predates file summaries), so a flat search is equivalent.
+        if len(file_paths) < file_limit:
+            return await self.search_similar(query_vector, limit=limit, repo_url=repo_url, scope=scope)
+
+        return await self.search_similar(query_vector, limit=limit, repo_url=repo_url, file_paths=file_paths, scope=scope)
+
+    async def search_hierarchical_batch(
+        self, query_vectors: List[List[float]], limit: int = 10, repo_url: Optional[str] = None, file_limit: int = 20,
+        scope=None
+    ) -> List[List[Dict[str, Any]]]:
+        """Batched file-then-chunk search: one batch request per level."""
+        file_filter, matchable = await self._scope_filter(repo_url, scope=scope, files_only=True)
+        if not matchable:
+            return [[] for _ in query_vectors]
+        requests = [
+            SearchRequest(vector=vector, filter=file_filter, limit=file_limit, with_payload=["file_path"])
+            for vector in query_vectors
+        ]
+        file_results = await self.client.search_batch(collection_name=self.file_collection_name, requests=requests)
+        file_paths_per_query = []
+        for files in file_results:
+            file_paths = list(dict.fromkeys(f.payload["file_path"] for f in files if f.payload and f.payload.get("file_path")))
+            file_paths_per_query.append(file_paths if len(file_paths) >= file_limit else None)
+        return await self.search_similar_batch(query_vectors, limit, repo_url, file_paths_per_query, scope=scope)
+
+    async def search_by_keywords(
+        self, keywords: List[str], limit: int = 5, repo_url: Optional[str] = None, scope=None,
+        point_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         must_conditions = [
             FieldCondition(key="content", match=MatchValue(value=kw)) for kw in keywords
         ]
-        if repo_url:
-            must_conditions.append(FieldCondition(key="repo_url", match=MatchValue(value=repo_url)))
+        scope_filter, matchable = await self._scope_filter(repo_url, scope=scope, point_ids=point_ids)
+        if not matchable:
+            return []
+        if scope_filter:
+            must_conditions.extend(scope_filter.must or [])
             
-        query_filter = Filter(must=must_conditions)
+        query_filter = Filter(must=must_conditions, must_not=scope_filter.must_not if scope_filter else None)
 
         results, _ = await self.client.scroll(
             collection_name=self.collection_name,
             scroll_filter=query_filter,
             limit=limit,
+            with_payload=SEARCH_PAYLOAD,
         )
 
-        return [
-            {"chunk_id": r.id, "score": 1.0, **(r.payload or {})}
-            for r in results
-        ]
+        return [_hit(r, 1.0) for r in results]
 
-    async def delete_all(self):
-        await self.client.delete_collection(self.collection_name)
-        await self.client.create_collection(
+    async def get_chunks_by_ids(self, chunk_ids: List[str], repo_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fetches chunks by their chunk_id payload with an indexed filter, no vector search involved."""
+        if not chunk_ids:
+            return []
+        query_filter = self._build_filter(repo_url)
+        chunk_condition = FieldCondition(key="chunk_id", match=MatchAny(any=list(chunk_ids)))
+        if query_filter:
+            query_filter.must.append(chunk_condition)
+        else:
+            query_filter = Filter(must=[chunk_condition])
+
+        results, _ = await self.client.scroll(
             collection_name=self.collection_name,
-            vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE),
+            scroll_filter=query_filter,
+            limit=len(chunk_ids) * 2,
+            with_payload=SEARCH_PAYLOAD,
         )
+        chunks = {}
+        for r in results:
+            chunk = _hit(r, 0.0)
+            chunks.setdefault(chunk["chunk_id"], chunk)
+        return [chunks[cid] for cid in chunk_ids if cid in chunks]
+
+    async def hydrate_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fills in `content` for metadata-only hits with one batched point retrieval."""
+        missing = [c for c in chunks if c.get("content") is None and c.get("point_id")]
+        if missing:
+            payloads = await self.retrieve_payloads([c["point_id"] for c in missing])
+            for chunk in missing:
+                chunk["content"] = payloads.get(chunk["point_id"], {}).get("content") or ""
+        return chunks
+
+    async def scroll_payloads(
+        self, fields: List[str], repo_url: Optional[str] = None, scope=None, batch_size: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """Pages through every chunk payload in the repo and scope (selected fields only, no vectors)."""
+        scroll_filter, matchable = await self._scope_filter(repo_url, scope=scope)
+        if not matchable:
+            return []
+        payloads, offset = [], None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=fields,
+                with_vectors=False,
+            )
+            payloads.extend(p.payload or {} for p in points)
+            if offset is None:
+                return payloads
+
+    async def iter_points(
+        self, repo_url: str, files: bool = False, batch_size: int = 1024
+    ) -> AsyncIterator[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+        """Streams a repo's points as (float32 vector block, payloads) pairs."""
+        collection_name = self.file_collection_name if files else self.collection_name
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=self._build_filter(repo_url),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                yield np.asarray([p.vector for p in points], dtype=np.float32), [p.payload or {} for p in points]
+            if offset is None:
+                return
+
+    async def delete_repo(self, repo_url: str):
+        """Removes every chunk and file summary of a repo."""
+        for name in (self.collection_name, self.file_collection_name):
+            if name:
+                await self.client.delete(
+                    collection_name=name,
+                    points_selector=FilterSelector(filter=self._build_filter(repo_url))
+                )
+
+    async def delete_files(self, repo_url: str, file_paths: List[str]):
+        """Removes the chunks and file summaries of some files of a repo (incremental updates)."""
+        if not file_paths:
+            return
+        for name in (self.collection_name, self.file_collection_name):
+            if name:
+                await self.client.delete(
+                    collection_name=name,
+                    points_selector=FilterSelector(filter=self._build_filter(repo_url, file_paths))
+                )
+
+    async def get_collection_info(self) -> Dict[str, Any]:
+        info = await self.client.get_collection(self.collection_name)
+        return {"collection": self.collection_name, "points_count": info.points_count, "status": str(info.status)}
+
+    async def set_payload(self, point_ids: List[str], payload: Dict[str, Any]):
+        await self.client.set_payload(collection_name=self.collection_name, payload=payload, points=list(point_ids))
+
+    async def delete_points(self, point_ids: List[str]):
+        if not point_ids:
+            return
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=list(point_ids))
+        )
+
+    async def retrieve_vectors(self, point_ids: List[str]) -> Dict[str, List[float]]:
+        if not point_ids:
+            return {}
+        points = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(point_ids),
+            with_payload=False,
+            with_vectors=True,
+        )
+        return {str(p.id): p.vector for p in points}
+
+    async def retrieve_payloads(self, point_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not point_ids:
+            return {}
+        points = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(dict.fromkeys(point_ids)),
+            with_payload=True,
+            with_vectors=False,
+        )
+        return {str(p.id): p.payload or {} for p in points}
+
+    async def delete_all(self):
+        for name in (self.collection_name, self.file_collection_name):
+            if not name:
+                continue
+            await self.client.delete_collection(name)
+            await self._ensure_collection(name)
 
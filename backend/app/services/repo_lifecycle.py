@@ -0,0 +1,252 @@
+# D:\DevBuddy\backend\app\services\repo_lifecycle.py
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Any, Optional, List
+from loguru import logger
+from app.utils.git_utils import GitUtils
+from app.services.snapshot_service import SnapshotService
+
+# Budgets are off (0) unless configured
+REPO_DISK_BUDGET_MB = float(os.getenv("REPO_DISK_BUDGET_MB", 0))
+REPO_VECTOR_BUDGET_MB = float(os.getenv("REPO_VECTOR_BUDGET_MB", 0))
+# "offload" moves a cold repo's vectors into a snapshot file and restores it on next use; "drop" deletes them
+REPO_COLD_ACTION = os.getenv("REPO_COLD_ACTION", "offload")
+REPO_LIFECYCLE_INTERVAL = float(os.getenv("REPO_LIFECYCLE_INTERVAL", 300))
+
+HOT, OFFLOADED, DROPPED = "hot", "offloaded", "dropped"
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class RepoLifecycleManager:
+    """
+    Tracks when each repo was last used and keeps checkouts and vectors within budget.
+
+    Chat and ingest record accesses. Enforcement evicts the coldest unpinned
+    clones under TEMP_REPO_DIR (checkouts are only needed to ingest, which
+    re-clones anyway) and moves the coldest repos' vectors out of the live
+    collections, either into a snapshot on disk that is restored on the next
+    chat or, with REPO_COLD_ACTION=drop, removed until the repo is re-ingested.
+    Local checkouts outside TEMP_REPO_DIR are never deleted.
+    """
+
+    def __init__(self, vector_service, graph_store=None, symbol_index=None, state_path: Optional[str] = None):
+        self.vector_service = vector_service
+        self.symbol_index = symbol_index
+        self.git_utils = GitUtils()
+        self.snapshots = SnapshotService(vector_service, graph_store, symbol_index)
+        self.state_path = state_path or os.getenv(
+            "REPO_LIFECYCLE_STATE", os.path.join(os.getcwd(), "local_repo_lifecycle.json")
+        )
+        self.repos: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.Task] = None
+        self._rerun = False
+
+    # ---- state -----------------------------------------------------------
+
+    async def load(self):
+        """Reads saved state, then refreshes the chunk counts of hot repos from the index."""
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.repos = json.load(f)
+        payloads = await self.vector_service.scroll_payloads(["repo_url"])
+        counts: Dict[str, int] = {}
+        for payload in payloads:
+            repo_url = payload.get("repo_url")
+            if isinstance(repo_url, str):
+                counts[repo_url] = counts.get(repo_url, 0) + 1
+        for repo_url, count in counts.items():
+            entry = self._entry(repo_url)
+            if entry["tier"] == HOT:
+                entry["chunks"] = count
+        self._save()
+
+    def _entry(self, repo_url: str) -> Dict[str, Any]:
+        return self.repos.setdefault(str(repo_url), {
+            "last_access": time.time(), "last_ingest": None, "pinned": False,
+            "tier": HOT, "chunks": 0, "snapshot": None,
+        })
+
+    def _save(self):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.repos, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    async def record_ingest(self, repo_url: str):
+        """Marks a repo freshly ingested, with the chunk count it actually has in the index."""
+        chunks = len(await self.vector_service.scroll_payloads(["repo_url"], repo_url=str(repo_url)))
+        entry = self._entry(repo_url)
+        if entry["snapshot"]:
+            # The fresh index supersedes the offloaded copy; restoring it later would clobber the new one
+            path = os.path.join(self.snapshots.snapshot_dir, entry["snapshot"])
+            if os.path.exists(path):
+                os.remove(path)
+        entry.update(last_access=time.time(), last_ingest=time.time(), tier=HOT, chunks=chunks, snapshot=None)
+        self._save()
+        self.schedule_enforce()
+
+    def set_pinned(self, repo_url: str, pinned: bool) -> Dict[str, Any]:
+        entry = self._entry(repo_url)
+        entry["pinned"] = pinned
+        self._save()
+        return {"repo_url": str(repo_url), **entry}
+
+    # ---- access ----------------------------------------------------------
+
+    async def ensure_hot(self, repo_url: str):
+        """Records a chat access and brings an offloaded repo's vectors back before retrieval."""
+        entry = self.repos.get(str(repo_url))
+        if entry is None:
+            return
+        entry["last_access"] = time.time()
+        if entry["tier"] != OFFLOADED:
+            # Eviction picks the coldest repos by last_access, so it has to survive a restart
+            self._save()
+            return
+        async with self._lock:
+            if entry["tier"] != OFFLOADED:
+                return
+            path = os.path.join(self.snapshots.snapshot_dir, entry["snapshot"])
+            try:
+                result = await self.snapshots.import_snapshot(path, repo_url=str(repo_url))
+            except Exception as e:
+                logger.error(f"Could not restore offloaded repo {repo_url}, it needs re-ingesting: {e}")
+                entry.update(tier=DROPPED, snapshot=None, chunks=0)
+                self._save()
+                return
+            os.remove(path)
+            entry.update(tier=HOT, snapshot=None, chunks=result["chunks"])
+            self._save()
+            logger.info(f"Restored offloaded repo {repo_url} ({result['chunks']} chunks)")
+
+    # ---- budgets ---------------------------------------------------------
+
+    def _checkout_path(self, repo_url: str) -> Optional[str]:
+        """Managed clone directory of a repo, or None for local paths and repos never cloned."""
+        try:
+            path = os.path.realpath(self.git_utils.get_repo_local_path(repo_url))
+        except Exception:
+            return None
+        temp_dir = os.path.realpath(self.git_utils.temp_dir)
+        if not path.startswith(temp_dir + os.sep) or not os.path.isdir(path):
+            return None
+        return path
+
+    def _coldest(self, candidates: List[str]) -> List[str]:
+        return sorted(candidates, key=lambda r: self.repos[r]["last_access"])
+
+    def _vector_bytes(self, repo_url: str) -> int:
+        return self.repos[repo_url]["chunks"] * self.vector_service.vector_size * 4
+
+    async def usage(self) -> Dict[str, Any]:
+        checkouts = {}
+        for repo_url in self.repos:
+            path = self._checkout_path(repo_url)
+            if path:
+                checkouts[repo_url] = await asyncio.to_thread(_dir_size, path)
+        hot = [r for r, e in self.repos.items() if e["tier"] == HOT]
+        return {
+            "checkout_bytes": checkouts,
+            "disk_bytes": sum(checkouts.values()),
+            "disk_budget_bytes": int(REPO_DISK_BUDGET_MB * 1024 * 1024),
+            "vector_bytes": sum(self._vector_bytes(r) for r in hot),
+            "vector_budget_bytes": int(REPO_VECTOR_BUDGET_MB * 1024 * 1024),
+        }
+
+    async def enforce(self) -> Dict[str, Any]:
+        """Evicts the coldest unpinned checkouts and vector sets until both budgets are met."""
+        async with self._lock:
+            usage = await self.usage()
+            evicted_checkouts, cooled = [], []
+
+            if usage["disk_budget_bytes"]:
+                disk = usage["disk_bytes"]
+                for repo_url in self._coldest(list(usage["checkout_bytes"])):
+                    if disk <= usage["disk_budget_bytes"]:
+                        break
+                    if self.repos[repo_url]["pinned"]:
+                        continue
+                    await asyncio.to_thread(self.git_utils.cleanup_repository, repo_url)
+                    disk -= usage["checkout_bytes"][repo_url]
+                    evicted_checkouts.append(repo_url)
+
+            if usage["vector_budget_bytes"]:
+                vector_bytes = usage["vector_bytes"]
+                hot = [r for r, e in self.repos.items() if e["tier"] == HOT and not e["pinned"]]
+                for repo_url in self._coldest(hot):
+                    if vector_bytes <= usage["vector_budget_bytes"]:
+                        break
+                    vector_bytes -= self._vector_bytes(repo_url)
+                    await self._cool(repo_url)
+                    cooled.append(repo_url)
+
+            self._save()
+            if evicted_checkouts or cooled:
+                logger.info(f"Repo lifecycle evicted checkouts {evicted_checkouts}, {REPO_COLD_ACTION} vectors of {cooled}")
+            return {"evicted_checkouts": evicted_checkouts, "cold_action": REPO_COLD_ACTION, "cooled": cooled}
+
+    async def _cool(self, repo_url: str):
+        entry = self.repos[repo_url]
+        if REPO_COLD_ACTION == "offload":
+            snapshot = await self.snapshots.export_repo(repo_url)
+            entry.update(tier=OFFLOADED, snapshot=snapshot["name"])
+        else:
+            entry.update(tier=DROPPED, snapshot=None)
+        await self.vector_service.delete_repo(repo_url)
+        if self.symbol_index:
+            self.symbol_index.remove_repo(repo_url)
+
+    # ---- background ------------------------------------------------------
+
+    def schedule_enforce(self):
+        """Runs enforcement in the background; requests made while one runs trigger one more pass."""
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.create_task(self._enforce_logged())
+        else:
+            self._rerun = True
+
+    async def _enforce_logged(self):
+        while True:
+            self._rerun = False
+            try:
+                await self.enforce()
+            except Exception as e:
+                logger.error(f"Repo lifecycle enforcement failed: {e}")
+            if not self._rerun:
+                return
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REPO_LIFECYCLE_INTERVAL)
+            await self._enforce_logged()
+
+    def stop(self):
+        for task in (self._task, self._pending):
+            if task:
+                task.cancel()
+        self._save()
+
+    async def as_dict(self) -> Dict[str, Any]:
+        usage = await self.usage()
+        repos = [
+            {"repo_url": repo_url, **entry, "checkout_bytes": usage["checkout_bytes"].get(repo_url, 0)}
+            for repo_url, entry in sorted(self.repos.items(), key=lambda item: item[1]["last_access"], reverse=True)
+        ]
+        return {"cold_action": REPO_COLD_ACTION, **{k: v for k, v in usage.items() if k != "checkout_bytes"}, "repos": repos}
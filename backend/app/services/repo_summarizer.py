@@ -0,0 +1,253 @@
+# D:\DevBuddy\backend\app\services\repo_summarizer.py
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from contextvars import ContextVar
+from typing import Dict, Any, List, Tuple, Optional, Callable, Awaitable
+from loguru import logger
+from app.models.schemas import RetrievalScope
+
+# Parallel LLM calls per summarization, and the largest input sent in one call
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 8))
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", 12000))
+# Bump when the prompts change so cached summaries are regenerated
+SUMMARY_PROMPT_VERSION = "1"
+
+FILE_INSTRUCTION = (
+    "Summarize this Python source file: its purpose, its main classes and functions, "
+    "and how the rest of a project would use it. At most 5 sentences."
+)
+FILE_PART_INSTRUCTION = (
+    "This is one part of a longer Python source file. Summarize what it defines and does. At most 4 sentences."
+)
+FILE_MERGE_INSTRUCTION = (
+    "These are summaries of consecutive parts of one Python source file. "
+    "Merge them into one summary of the file. At most 5 sentences."
+)
+PACKAGE_INSTRUCTION = (
+    "These are summaries of the files and subpackages of one package, each labelled with its path. "
+    "Summarize what the package as a whole is responsible for and its key modules. At most 6 sentences."
+)
+REPO_INSTRUCTION = (
+    "These are summaries of the top-level packages and modules of a repository, each labelled with its path. "
+    "Write an overview of the project: what it does, its main components and how they fit together."
+)
+
+Summarize = Callable[[str, str], Awaitable[str]]
+
+# Counters of the summarization run the current task belongs to (tasks spawned by it share the dict)
+_run_stats: ContextVar[Dict[str, int]] = ContextVar("summary_run_stats")
+
+
+def _key(*parts: str) -> str:
+    digest = hashlib.sha256(SUMMARY_PROMPT_VERSION.encode("utf-8"))
+    for part in parts:
+        digest.update(b"\0" + part.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _split(text: str, max_chars: int) -> List[str]:
+    """Splits on line boundaries into pieces of at most max_chars (longer single lines are cut)."""
+    pieces, current, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if size + len(line) > max_chars and current:
+            pieces.append("".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+def _labelled(items: List[Tuple[str, str]]) -> str:
+    return "\n\n".join(f"## {label}\n{summary}" for label, summary in items)
+
+
+class SummaryCache:
+    """Summaries keyed by a hash of their input (file content or the summaries being merged)."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        db_path = db_path or os.getenv("SUMMARY_CACHE_DB", os.path.join(os.getcwd(), "local_summary_cache.sqlite3"))
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        # get/put run on asyncio.to_thread workers; the one connection is used by one at a time
+        self._db_lock = threading.Lock()
+        self.db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT, created REAL)")
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            row = self.db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, summary: str):
+        with self._db_lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (key, summary, time.time()))
+
+    def close(self):
+        with self._db_lock:
+            self.db.close()
+
+
+class RepoSummarizer:
+    """
+    Map-reduce summary of a whole indexed repo.
+
+    One instance is shared by the app (see main.py), so the concurrency cap
+    applies across requests and concurrent requests for a repo share a run.
+
+    Map: every file is summarized on its own, LLM calls running concurrently
+    up to SUMMARY_CONCURRENCY; files longer than SUMMARY_CHUNK_CHARS are
+    summarized in parts and merged. Reduce: each directory merges the
+    summaries of its files and subdirectories, bottom-up, until the root
+    yields the project overview. Every summary is cached by a hash of its
+    input, so after an edit only the changed files and their parent
+    directories are summarized again.
+    """
+
+    def __init__(self, vector_service, summarize: Optional[Summarize] = None, cache: Optional[SummaryCache] = None,
+                 concurrency: int = SUMMARY_CONCURRENCY, chunk_chars: int = SUMMARY_CHUNK_CHARS):
+        self.vector_service = vector_service
+        self.summarize = summarize
+        self.cache = cache or SummaryCache()
+        self.chunk_chars = chunk_chars
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def _files(self, repo_url: str) -> Dict[str, str]:
+        """Source of every indexed file, taken from its module chunk (which spans the whole file)."""
+        payloads = await self.vector_service.scroll_payloads(
+            ["rel_path", "file_path", "content"], repo_url=repo_url, scope=RetrievalScope(chunk_types=["module"])
+        )
+        return {(p.get("rel_path") or p.get("file_path")): p.get("content") or "" for p in payloads}
+
+    async def _llm(self, instruction: str, text: str) -> str:
+        if self.summarize is None:
+            # The LLM client is only built on first use, not at startup
+            from app.agents.modifier_agent import ModifierAgent
+            self.summarize = ModifierAgent().summarize
+        async with self._semaphore:
+            _run_stats.get()["llm_calls"] += 1
+            return await self.summarize(instruction, text)
+
+    async def _cached(self, key: str, produce: Callable[[], Awaitable[str]]) -> str:
+        summary = await asyncio.to_thread(self.cache.get, key)
+        if summary is not None:
+            _run_stats.get()["cached"] += 1
+            return summary
+        summary = await produce()
+        await asyncio.to_thread(self.cache.put, key, summary)
+        _run_stats.get()["summarized"] += 1
+        return summary
+
+    # ---- map -------------------------------------------------------------
+
+    async def _summarize_file(self, path: str, content: str) -> str:
+        async def produce():
+            parts = _split(content, self.chunk_chars)
+            if len(parts) <= 1:
+                return await self._llm(FILE_INSTRUCTION, content)
+            summaries = await asyncio.gather(*[self._llm(FILE_PART_INSTRUCTION, part) for part in parts])
+            return await self._reduce(
+                FILE_MERGE_INSTRUCTION, [(f"part {i + 1}", s) for i, s in enumerate(summaries)], cache=False
+            )
+
+        try:
+            return await self._cached(_key("file", content), produce)
+        except Exception as e:
+            # One failing file should not sink the whole summary; it is retried on the next run
+            logger.warning(f"Could not summarize {path}: {e}")
+            return f"(no summary available, {content.count(chr(10)) + 1} lines)"
+
+    # ---- reduce ----------------------------------------------------------
+
+    async def _reduce(self, instruction: str, items: List[Tuple[str, str]], cache: bool = True) -> str:
+        """Merges labelled summaries, in rounds of groups when they do not fit in one call."""
+        async def produce():
+            text = _labelled(items)
+            if len(text) <= self.chunk_chars or len(items) == 1:
+                return await self._llm(instruction, text[:self.chunk_chars])
+            groups, current = [], []
+            for item in items:
+                if current and len(_labelled(current + [item])) > self.chunk_chars:
+                    groups.append(current)
+                    current = []
+                current.append(item)
+            groups.append(current)
+            if len(groups) == len(items):
+                # Every input alone fills a call; shorten them instead of looping without progress
+                share = max(1, self.chunk_chars // len(items))
+                return await self._llm(instruction, _labelled([(l, s[:share]) for l, s in items])[:self.chunk_chars])
+            merged = await asyncio.gather(*[self._llm(instruction, _labelled(group)[:self.chunk_chars]) for group in groups])
+            labels = [f"{group[0][0]} .. {group[-1][0]}" for group in groups]
+            return await self._reduce(instruction, list(zip(labels, merged)), cache=False)
+
+        if not cache:
+            return await produce()
+        return await self._cached(_key(instruction, *(f"{label}\0{summary}" for label, summary in items)), produce)
+
+    async def _summarize_dir(self, path: str, tree: Dict[str, Any], summaries: Dict[str, str]) -> str:
+        child_dirs = sorted(tree["dirs"])
+        child_summaries = await asyncio.gather(*[
+            self._summarize_dir(child, tree["dirs"][child], summaries) for child in child_dirs
+        ])
+        file_summaries = await asyncio.gather(*[
+            self._summarize_file(file_path, content) for file_path, content in sorted(tree["files"].items())
+        ])
+        items = list(zip(child_dirs, child_summaries)) + list(zip(sorted(tree["files"]), file_summaries))
+        if len(items) == 1 and path and child_dirs:
+            # A directory holding a single subdirectory adds nothing of its own
+            summary = items[0][1]
+        else:
+            summary = await self._reduce(REPO_INSTRUCTION if not path else PACKAGE_INSTRUCTION, items)
+        summaries[path or "."] = summary
+        return summary
+
+    async def summarize_repo(self, repo_url: str) -> Dict[str, Any]:
+        """Returns the project overview plus the summary of every directory."""
+        # Concurrent requests for the same repo share one run
+        task = self._running.get(repo_url)
+        if task is None:
+            task = asyncio.ensure_future(self._summarize_repo(repo_url))
+            self._running[repo_url] = task
+            task.add_done_callback(lambda _: self._running.pop(repo_url, None))
+        return await asyncio.shield(task)
+
+    async def _summarize_repo(self, repo_url: str) -> Dict[str, Any]:
+        start = time.time()
+        files = await self._files(repo_url)
+        if not files:
+            raise ValueError(f"No indexed files for {repo_url}")
+
+        tree: Dict[str, Any] = {"dirs": {}, "files": {}}
+        for path, content in files.items():
+            node, prefix = tree, []
+            for part in path.split("/")[:-1]:
+                prefix.append(part)
+                node = node["dirs"].setdefault("/".join(prefix), {"dirs": {}, "files": {}})
+            node["files"][path] = content
+
+        stats = {"summarized": 0, "cached": 0, "llm_calls": 0}
+        _run_stats.set(stats)
+        packages: Dict[str, str] = {}
+        overview = await self._summarize_dir("", tree, packages)
+        packages.pop(".")
+        logger.info(
+            f"Summarized {repo_url}: {len(files)} files, {stats['summarized']} new summaries "
+            f"({stats['llm_calls']} LLM calls), {stats['cached']} cached, {time.time() - start:.1f}s"
+        )
+        return {
+            "repo_url": repo_url,
+            "summary": overview,
+            "packages": dict(sorted(packages.items())),
+            "files": len(files),
+            "summarized": stats["summarized"],
+            "cached": stats["cached"],
+            "llm_calls": stats["llm_calls"],
+        }
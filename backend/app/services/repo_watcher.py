@@ -0,0 +1,272 @@
+# D:\DevBuddy\backend\app\services\repo_watcher.py
+import os
+import time
+import asyncio
+import hashlib
+from typing import Dict, Any, List, Optional, Set, Tuple
+from loguru import logger
+from app.models.schemas import RetrievalScope
+from app.utils.git_utils import EXCLUDE_DIRS
+
+try:
+    # inotify on Linux (FSEvents / ReadDirectoryChangesW elsewhere) behind one API
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+# Quiet period after the last event before the saved files are re-indexed
+WATCH_DEBOUNCE_MS = float(os.getenv("WATCH_DEBOUNCE_MS", 300))
+# Scan interval of the fallback used when watchdog is not installed (or WATCH_BACKEND=polling)
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", 0.5))
+WATCH_BACKEND = os.getenv("WATCH_BACKEND", "auto")
+
+
+def _indexed(path: str, repo_path: str) -> bool:
+    """Whether ingestion would index this file (same rules as GitUtils.get_python_files)."""
+    # Only directories inside the checkout count; the checkout itself may live under e.g. a "venv" directory
+    rel_path = os.path.relpath(path, repo_path)
+    return path.endswith(".py") and not any(part in EXCLUDE_DIRS for part in rel_path.split(os.sep))
+
+
+def _text_hash(text: str) -> str:
+    # Module chunks store the file re-joined from its lines, so hash that form
+    return hashlib.sha1("\n".join(text.splitlines()).encode("utf-8")).hexdigest()
+
+
+def _scan(directory: str, repo_path: str) -> Dict[str, Tuple[int, int]]:
+    """(mtime_ns, size) of every indexable file under a directory of the checkout."""
+    found = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+        for name in files:
+            path = os.path.join(root, name)
+            if _indexed(path, repo_path):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, notify):
+        self.notify = notify
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            # Fired for the parent of every changed file; the file's own event is enough
+            return
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        self.notify([p for p in paths if p], event.is_directory)
+
+
+class RepoWatch:
+    """
+    One watched local checkout.
+
+    Filesystem events only mark paths as pending; once no event has arrived
+    for WATCH_DEBOUNCE_MS the pending files are compared with the content
+    last indexed, and only files whose text changed are re-chunked and
+    re-embedded (editors often write several times per save, or not at all).
+    Deleted files, and files under deleted or moved-away directories, lose
+    their points. The symbol graph is rebuilt in the background afterwards.
+    """
+
+    def __init__(self, repo_url: str, agent, lifecycle=None):
+        self.repo_url = str(repo_url)
+        self.repo_path = str(repo_url)
+        self.agent = agent
+        self.lifecycle = lifecycle
+        self.hashes: Dict[str, str] = {}
+        self.backend = "watchdog" if Observer is not None and WATCH_BACKEND != "polling" else "polling"
+        self._loop = asyncio.get_running_loop()
+        self._pending: Set[str] = set()
+        self._pending_dirs: Set[str] = set()
+        self._first_event: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._graph_task: Optional[asyncio.Task] = None
+        self._graph_dirty = False
+        self._observer = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self.stats = {"updates": 0, "files_updated": 0, "files_removed": 0, "errors": 0,
+                      "last_update": None, "last_latency_ms": None}
+
+    # ---- lifecycle -------------------------------------------------------
+
+    async def start(self):
+        """Brings the index in line with the working copy, then starts listening for changes."""
+        indexed = await self._indexed_hashes()
+        on_disk = await asyncio.to_thread(_scan, self.repo_path, self.repo_path)
+        self.hashes = indexed
+        self._pending.update(on_disk)
+        self._pending.update(path for path in indexed if path not in on_disk)
+        if self.backend == "watchdog":
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self._notify), self.repo_path, recursive=True)
+            self._observer.start()
+        else:
+            self._poll_task = asyncio.create_task(self._poll(on_disk))
+        logger.info(f"Watching {self.repo_path} ({self.backend}, {len(on_disk)} files, {len(indexed)} indexed)")
+        self._schedule_flush()
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+        for handle in (self._timer, self._poll_task, self._flush_task, self._graph_task):
+            if handle:
+                handle.cancel()
+
+    async def _indexed_hashes(self) -> Dict[str, str]:
+        # Payloads of the module chunks only; each holds its whole file, and no vectors are read
+        payloads = await self.agent.qdrant_service.scroll_payloads(
+            ["file_path", "content"], repo_url=self.repo_url, scope=RetrievalScope(chunk_types=["module"])
+        )
+        return {p["file_path"]: _text_hash(p.get("content") or "") for p in payloads if p.get("file_path")}
+
+    # ---- events ----------------------------------------------------------
+
+    def _notify(self, paths: List[str], is_directory: bool):
+        # Called on the observer thread
+        self._loop.call_soon_threadsafe(self._add, paths, is_directory)
+
+    def _add(self, paths: List[str], is_directory: bool):
+        for path in paths:
+            if is_directory:
+                self._pending_dirs.add(path)
+            elif _indexed(path, self.repo_path):
+                self._pending.add(path)
+        if self._pending or self._pending_dirs:
+            self._first_event = self._first_event or time.monotonic()
+            if self._timer:
+                self._timer.cancel()
+            self._timer = self._loop.call_later(WATCH_DEBOUNCE_MS / 1000, self._schedule_flush)
+
+    async def _poll(self, previous: Dict[str, Tuple[int, int]]):
+        while True:
+            await asyncio.sleep(WATCH_POLL_INTERVAL)
+            current = await asyncio.to_thread(_scan, self.repo_path, self.repo_path)
+            changed = [p for p, sig in current.items() if previous.get(p) != sig]
+            changed += [p for p in previous if p not in current]
+            previous = current
+            if changed:
+                self._add(changed, False)
+
+    # ---- updates ---------------------------------------------------------
+
+    def _schedule_flush(self):
+        self._timer = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    def _classify(self, paths: Set[str], dirs: Set[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Splits pending paths into files whose text changed since indexing and removed files."""
+        for directory in dirs:
+            # A deleted or moved directory reports no per-file events for its contents
+            prefix = directory.rstrip(os.sep) + os.sep
+            paths.update(p for p in self.hashes if p.startswith(prefix))
+            if os.path.isdir(directory):
+                paths.update(_scan(directory, self.repo_path))
+        changed, removed = {}, []
+        for path in sorted(paths):
+            if os.path.isfile(path):
+                digest = _text_hash(self.agent.git_utils.get_file_content(path))
+                if digest != self.hashes.get(path):
+                    changed[path] = digest
+            elif path in self.hashes:
+                removed.append(path)
+        return changed, removed
+
+    async def _flush(self):
+        # Paths that arrive while an update runs are flushed right after it, unless still being written
+        while (self._pending or self._pending_dirs) and self._timer is None:
+            first_event, self._first_event = self._first_event, None
+            paths, dirs = self._pending, self._pending_dirs
+            self._pending, self._pending_dirs = set(), set()
+            changed, removed = await asyncio.to_thread(self._classify, paths, dirs)
+            if not changed and not removed:
+                continue
+            try:
+                if self.lifecycle:
+                    # Offloaded vectors must be back before files are patched into them
+                    await self.lifecycle.ensure_hot(self.repo_url)
+                await self.agent.update_files(self.repo_url, self.repo_path, list(changed), removed)
+            except Exception as e:
+                # Left out of self.hashes, so the next event on these files retries them
+                self.stats["errors"] += 1
+                logger.error(f"Watch update failed for {self.repo_url}: {e}")
+                continue
+            self.hashes.update(changed)
+            for path in removed:
+                self.hashes.pop(path, None)
+            self.stats["updates"] += 1
+            self.stats["files_updated"] += len(changed)
+            self.stats["files_removed"] += len(removed)
+            self.stats["last_update"] = time.time()
+            if first_event is not None:
+                self.stats["last_latency_ms"] = round((time.monotonic() - first_event) * 1000, 1)
+            self._schedule_graph()
+
+    def _schedule_graph(self):
+        """Rebuilds the symbol graph off the update path; saves during a rebuild trigger one more."""
+        if self._graph_task is None or self._graph_task.done():
+            self._graph_task = asyncio.create_task(self._rebuild_graph())
+        else:
+            self._graph_dirty = True
+
+    async def _rebuild_graph(self):
+        while True:
+            self._graph_dirty = False
+            try:
+                await self.agent.rebuild_symbol_graph(self.repo_url, self.repo_path)
+            except Exception as e:
+                logger.error(f"Symbol graph rebuild failed for {self.repo_url}: {e}")
+            if not self._graph_dirty:
+                return
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"repo_url": self.repo_url, "backend": self.backend, "files": len(self.hashes), **self.stats}
+
+
+class RepoWatchManager:
+    """Watch mode for local-path repos: keeps their index current as files are saved."""
+
+    def __init__(self, vector_service, graph_store=None, symbol_index=None, lifecycle=None):
+        self.vector_service = vector_service
+        self.graph_store = graph_store
+        self.symbol_index = symbol_index
+        self.lifecycle = lifecycle
+        self.watches: Dict[str, RepoWatch] = {}
+
+    async def start_watch(self, repo_url: str) -> Dict[str, Any]:
+        repo_url = str(repo_url)
+        if repo_url in self.watches:
+            return self.watches[repo_url].as_dict()
+        if not os.path.isdir(repo_url):
+            raise ValueError(f"Watch mode needs a local directory, got {repo_url}")
+        from app.agents.ingestion_agent import IngestionAgent
+
+        agent = IngestionAgent(self.vector_service, self.graph_store, self.symbol_index, self.lifecycle)
+        watch = RepoWatch(repo_url, agent, self.lifecycle)
+        await watch.start()
+        self.watches[repo_url] = watch
+        return watch.as_dict()
+
+    def stop_watch(self, repo_url: str) -> bool:
+        watch = self.watches.pop(str(repo_url), None)
+        if watch:
+            watch.stop()
+            logger.info(f"Stopped watching {repo_url}")
+        return watch is not None
+
+    def list_watches(self) -> List[Dict[str, Any]]:
+        return [watch.as_dict() for watch in self.watches.values()]
+
+    def stop_all(self):
+        for repo_url in list(self.watches):
+            self.stop_watch(repo_url)
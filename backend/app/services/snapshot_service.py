@@ -0,0 +1,228 @@
+# D:\DevBuddy\backend\app\services\snapshot_service.py
+import io
+import os
+import json
+import time
+import zlib
+import struct
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Optional, BinaryIO
+from loguru import logger
+from app.utils.chunk_batch import ChunkBatch
+from app.utils.git_utils import GitUtils
+from app.utils.symbol_graph import SymbolGraph, SymbolGraphStore
+
+MAGIC = b"DEVBUDDY-SNAPSHOT\n"
+FORMAT_VERSION = 1
+
+# Frame kinds; every frame is <kind:u8><length:u32> followed by `length` bytes
+FRAME_END = 0
+FRAME_HEADER = 1
+FRAME_CHUNKS = 2
+FRAME_FILES = 3
+FRAME_GRAPH = 4
+FRAME = struct.Struct("<BI")
+BLOCK = struct.Struct("<II")
+
+SNAPSHOT_BLOCK_SIZE = int(os.getenv("SNAPSHOT_BLOCK_SIZE", 1024))
+
+
+def _encode_block(vectors: np.ndarray, payloads: List[Dict[str, Any]]) -> bytes:
+    """Packs rows as a raw float32 vector block followed by zlib-compressed JSON columns."""
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    keys = list(dict.fromkeys(key for payload in payloads for key in payload))
+    columns = {key: [payload.get(key) for payload in payloads] for key in keys}
+    packed = zlib.compress(json.dumps(columns, separators=(",", ":")).encode("utf-8"), 6)
+    return BLOCK.pack(vectors.shape[0], vectors.shape[1]) + vectors.tobytes() + packed
+
+
+def _decode_block(body: bytes):
+    rows, dim = BLOCK.unpack_from(body)
+    end = BLOCK.size + rows * dim * 4
+    vectors = np.frombuffer(body, dtype="<f4", count=rows * dim, offset=BLOCK.size).reshape(rows, dim)
+    columns = json.loads(zlib.decompress(body[end:]))
+    payloads = [{key: values[i] for key, values in columns.items()} for i in range(rows)]
+    return vectors.astype(np.float32), payloads
+
+
+def _read_frame(stream: BinaryIO):
+    head = stream.read(FRAME.size)
+    if len(head) < FRAME.size:
+        raise ValueError("Truncated snapshot")
+    kind, length = FRAME.unpack(head)
+    body = stream.read(length)
+    if len(body) < length:
+        raise ValueError("Truncated snapshot")
+    return kind, body
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a DevBuddy index snapshot")
+        kind, body = _read_frame(stream)
+        if kind != FRAME_HEADER:
+            raise ValueError("Snapshot header missing")
+        return json.loads(body)
+
+
+class SnapshotService:
+    """
+    Exports one repo's index to a portable file and bulk-loads it back on any node.
+
+    The file is self-describing: a header with the repo URL, source commit,
+    embedding model and vector size, then frames of float32 vector blocks with
+    compressed columnar payloads (chunks and file summaries) and the symbol
+    graph. Export and import stream block by block, so memory stays bounded
+    by SNAPSHOT_BLOCK_SIZE rows whatever the repo size.
+    """
+
+    def __init__(self, vector_service, graph_store: Optional[SymbolGraphStore] = None,
+                 symbol_index=None, snapshot_dir: Optional[str] = None):
+        self.vector_service = vector_service
+        self.graph_store = graph_store
+        self.symbol_index = symbol_index
+        self.snapshot_dir = snapshot_dir or os.getenv("SNAPSHOT_DIR", os.path.join(os.getcwd(), "local_snapshots"))
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    def path_for(self, name: str) -> str:
+        path = os.path.join(self.snapshot_dir, os.path.basename(name))
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Snapshot {name} not found")
+        return path
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            path = os.path.join(self.snapshot_dir, name)
+            if not name.endswith(".snapshot"):
+                continue
+            try:
+                header = read_header(path)
+            except ValueError:
+                continue
+            snapshots.append({"name": name, "bytes": os.path.getsize(path), **header})
+        return snapshots
+
+    async def export_repo(self, repo_url: str) -> Dict[str, Any]:
+        from app.services.embedding_service import EmbeddingService
+
+        repo_url = str(repo_url)
+        header = {
+            "format_version": FORMAT_VERSION,
+            "repo_url": repo_url,
+            "source_commit": await asyncio.to_thread(GitUtils().get_head_commit, repo_url),
+            "embedding_model": EmbeddingService.MODEL_NAME,
+            "vector_size": self.vector_service.vector_size,
+            "created_at": time.time(),
+        }
+        slug = "".join(c if c.isalnum() else "_" for c in repo_url.rstrip("/").split("/")[-1]) or "repo"
+        name = f"{slug}-{(header['source_commit'] or 'nocommit')[:12]}-{int(header['created_at'])}.snapshot"
+        path = os.path.join(self.snapshot_dir, name)
+        counts = {"chunks": 0, "file_summaries": 0}
+
+        with open(path + ".tmp", "wb") as out:
+            out.write(MAGIC)
+            self._write_frame(out, FRAME_HEADER, json.dumps(header).encode("utf-8"))
+            for kind, files, key in ((FRAME_CHUNKS, False, "chunks"), (FRAME_FILES, True, "file_summaries")):
+                async for vectors, payloads in self.vector_service.iter_points(
+                    repo_url, files=files, batch_size=SNAPSHOT_BLOCK_SIZE
+                ):
+                    body = await asyncio.to_thread(_encode_block, vectors, payloads)
+                    self._write_frame(out, kind, body)
+                    counts[key] += len(payloads)
+            graph = self.graph_store.load(repo_url) if self.graph_store else None
+            if graph is not None:
+                buffer = io.BytesIO()
+                graph.save(buffer)
+                self._write_frame(out, FRAME_GRAPH, buffer.getvalue())
+            self._write_frame(out, FRAME_END, json.dumps(counts).encode("utf-8"))
+        os.replace(path + ".tmp", path)
+
+        logger.info(f"Exported {counts['chunks']} chunks of {repo_url} to {path}")
+        return {"name": name, "bytes": os.path.getsize(path), **header, **counts}
+
+    async def import_snapshot(self, path: str, repo_url: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Replaces a repo's index with a snapshot; repo_url re-targets it (e.g. another checkout location)."""
+        from app.services.embedding_service import EmbeddingService
+
+        header = read_header(path)
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {header.get('format_version')}")
+        if header["vector_size"] != self.vector_service.vector_size:
+            raise ValueError(
+                f"Snapshot vectors have {header['vector_size']} dimensions, index expects {self.vector_service.vector_size}"
+            )
+        if header["embedding_model"] != EmbeddingService.MODEL_NAME and not force:
+            raise ValueError(
+                f"Snapshot was embedded with {header['embedding_model']}, not {EmbeddingService.MODEL_NAME}"
+            )
+
+        # Nothing is deleted until the whole file is known to decode, so a bad file leaves the repo intact
+        graph = await asyncio.to_thread(self._validate, path, header["vector_size"])
+
+        repo_url = str(repo_url or header["repo_url"])
+        await self.vector_service.delete_repo(repo_url)
+        if self.symbol_index:
+            self.symbol_index.remove_repo(repo_url)
+        # The content store replaces a repo's references per call, so blocks after the delete must append
+        append_kwargs = {"replace": False} if hasattr(self.vector_service, "embed_missing") else {}
+        counts = {"chunks": 0, "file_summaries": 0}
+
+        with open(path, "rb") as stream:
+            stream.seek(len(MAGIC))
+            _read_frame(stream)
+            while True:
+                kind, body = await asyncio.to_thread(_read_frame, stream)
+                if kind == FRAME_END:
+                    break
+                if kind == FRAME_GRAPH:
+                    continue
+                vectors, payloads = await asyncio.to_thread(_decode_block, body)
+                if kind == FRAME_CHUNKS:
+                    batch = ChunkBatch(repo_url, payloads[0].get("file_extension") or ".py")
+                    batch.extend(payloads)
+                    await self.vector_service.store_chunks(vectors, batch, **append_kwargs)
+                    if self.symbol_index:
+                        self.symbol_index.add_chunks(repo_url, batch)
+                    counts["chunks"] += len(batch)
+                elif kind == FRAME_FILES:
+                    for payload in payloads:
+                        payload["repo_url"] = repo_url
+                    await self.vector_service.store_file_summaries(vectors.tolist(), payloads)
+                    counts["file_summaries"] += len(payloads)
+
+        if graph is not None and self.graph_store:
+            self.graph_store.save(repo_url, graph)
+
+        logger.info(f"Imported {counts['chunks']} chunks into {repo_url} from {path}")
+        return {"name": os.path.basename(path), "bytes": os.path.getsize(path), **header, "repo_url": repo_url, **counts}
+
+    @staticmethod
+    def _validate(path: str, vector_size: int) -> Optional[SymbolGraph]:
+        """Decodes every frame up to FRAME_END without storing anything; returns the symbol graph, if any."""
+        graph = None
+        with open(path, "rb") as stream:
+            stream.seek(len(MAGIC))
+            _read_frame(stream)
+            while True:
+                kind, body = _read_frame(stream)
+                if kind == FRAME_END:
+                    return graph
+                if kind == FRAME_GRAPH:
+                    graph = SymbolGraph.load(io.BytesIO(body))
+                elif kind in (FRAME_CHUNKS, FRAME_FILES):
+                    try:
+                        vectors, _ = _decode_block(body)
+                    except Exception as e:
+                        raise ValueError(f"Corrupt snapshot block: {e}") from e
+                    if vectors.shape[1] != vector_size:
+                        raise ValueError("Snapshot block does not match the header's vector size")
+                else:
+                    raise ValueError(f"Unknown snapshot frame kind {kind}")
+
+    @staticmethod
+    def _write_frame(out: BinaryIO, kind: int, body: bytes):
+        out.write(FRAME.pack(kind, len(body)))
+        out.write(body)
@@ -0,0 +1,72 @@
+# D:\DevBuddy\backend\app\services\stub_providers.py
+import os
+import time
+import random
+import asyncio
+import hashlib
+import numpy as np
+from typing import List, AsyncIterator
+from loguru import logger
+
+# Local stand-ins for the Gemini/Groq clients, enabled with LLM_PROVIDER=stub (load tests, offline dev).
+# Latencies are in milliseconds; every delay is scaled by a random factor in [1 - jitter, 1 + jitter].
+STUB_EMBED_LATENCY_MS = float(os.getenv("STUB_EMBED_LATENCY_MS", 50))
+STUB_EMBED_PER_TEXT_MS = float(os.getenv("STUB_EMBED_PER_TEXT_MS", 1))
+STUB_LLM_FIRST_TOKEN_MS = float(os.getenv("STUB_LLM_FIRST_TOKEN_MS", 300))
+STUB_LLM_TOKEN_MS = float(os.getenv("STUB_LLM_TOKEN_MS", 10))
+STUB_LLM_TOKENS = int(os.getenv("STUB_LLM_TOKENS", 200))
+STUB_LATENCY_JITTER = float(os.getenv("STUB_LATENCY_JITTER", 0.2))
+
+
+def use_stub_providers() -> bool:
+    return os.getenv("LLM_PROVIDER", "").lower() == "stub"
+
+
+def _delay(ms: float) -> float:
+    return max(0.0, ms * random.uniform(1 - STUB_LATENCY_JITTER, 1 + STUB_LATENCY_JITTER)) / 1000
+
+
+class StubEmbeddings:
+    """Deterministic pseudo-embeddings: the same text always maps to the same unit vector."""
+
+    def __init__(self, vector_size: int = 768):
+        self.vector_size = vector_size
+        logger.debug("Using stub embedding provider (LLM_PROVIDER=stub)")
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.vector_size).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Called from worker threads, like the real client
+        time.sleep(_delay(STUB_EMBED_LATENCY_MS + STUB_EMBED_PER_TEXT_MS * len(texts)))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class StubMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class StubChatModel:
+    """Chat model with a configurable time to first token and per-token streaming delay."""
+
+    def __init__(self, name: str):
+        self.name = name
+        logger.debug(f"Using stub chat model for {name} (LLM_PROVIDER=stub)")
+
+    async def astream(self, messages) -> AsyncIterator[StubMessage]:
+        prompt_chars = sum(len(getattr(m, "content", "")) for m in messages)
+        await asyncio.sleep(_delay(STUB_LLM_FIRST_TOKEN_MS))
+        for i in range(STUB_LLM_TOKENS):
+            if i:
+                await asyncio.sleep(_delay(STUB_LLM_TOKEN_MS))
+            yield StubMessage(f"tok{i} " if i else f"[{self.name} stub, {prompt_chars} prompt chars] ")
+
+    async def ainvoke(self, messages) -> StubMessage:
+        parts = [chunk.content async for chunk in self.astream(messages)]
+        return StubMessage("".join(parts))
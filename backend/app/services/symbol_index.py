@@ -0,0 +1,100 @@
+# D:\DevBuddy\backend\app\services\symbol_index.py
+import os
+import bisect
+import difflib
+from typing import List, Dict, Any, Optional
+from loguru import logger
+
+# Payload fields kept per entry; chunk bodies stay in the vector store
+REF_FIELDS = ["chunk_id", "file_path", "function_name", "class_name", "chunk_type", "start_line", "end_line"]
+
+
+class SymbolIndex:
+    """
+    In-memory index from function, class and file names to chunk references, per repository.
+
+    Lookups try an exact (case-insensitive) hash match first, then a prefix
+    match over the sorted name list, then a fuzzy match for near-miss spellings.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._sorted_names: Dict[str, List[str]] = {}
+
+    def add_chunks(self, repo_url: str, chunks: List[Dict[str, Any]]):
+        entries = self._entries.setdefault(str(repo_url), {})
+        for chunk in chunks:
+            ref = {field: chunk.get(field) for field in REF_FIELDS}
+            for name in self._names_for(chunk):
+                bucket = entries.setdefault(name.lower(), [])
+                if not any(r["chunk_id"] == ref["chunk_id"] for r in bucket):
+                    bucket.append(ref)
+        self._sorted_names[str(repo_url)] = sorted(entries)
+
+    def remove_repo(self, repo_url: str):
+        self._entries.pop(str(repo_url), None)
+        self._sorted_names.pop(str(repo_url), None)
+
+    def remove_files(self, repo_url: str, file_paths: List[str]):
+        entries = self._entries.get(str(repo_url))
+        if not entries:
+            return
+        removed = set(file_paths)
+        for name in list(entries):
+            bucket = [ref for ref in entries[name] if ref["file_path"] not in removed]
+            if bucket:
+                entries[name] = bucket
+            else:
+                del entries[name]
+        self._sorted_names[str(repo_url)] = sorted(entries)
+
+    def _names_for(self, chunk: Dict[str, Any]) -> List[str]:
+        chunk_type = chunk.get("chunk_type")
+        if chunk_type == "function":
+            names = [chunk.get("function_name")]
+            if chunk.get("class_name"):
+                names.append(f"{chunk['class_name']}.{chunk['function_name']}")
+            return [n for n in names if n]
+        if chunk_type == "class":
+            return [chunk["class_name"]] if chunk.get("class_name") else []
+        if chunk_type == "module" and chunk.get("file_path"):
+            file_name = os.path.basename(chunk["file_path"])
+            return [file_name, os.path.splitext(file_name)[0]]
+        return []
+
+    def lookup(self, repo_url: str, name: str, limit: int = 10, exact: bool = False) -> List[Dict[str, Any]]:
+        """Definitions named `name` (case-insensitive); unless exact, falls back to prefix and close matches."""
+        entries = self._entries.get(str(repo_url))
+        if not entries:
+            return []
+        key = name.lower()
+        if key in entries:
+            return entries[key][:limit]
+        if exact:
+            return []
+
+        names = self._sorted_names[str(repo_url)]
+        start = bisect.bisect_left(names, key)
+        matches = []
+        for candidate in names[start:]:
+            if not candidate.startswith(key) or len(matches) >= limit:
+                break
+            matches.extend(entries[candidate])
+        if not matches:
+            for candidate in difflib.get_close_matches(key, names, n=3, cutoff=0.85):
+                matches.extend(entries[candidate])
+        return matches[:limit]
+
+    def has_repo(self, repo_url: str) -> bool:
+        return str(repo_url) in self._entries
+
+    async def load(self, vector_service, repo_url: Optional[str] = None):
+        """Builds the index from the payloads already stored in the vector store."""
+        payloads = await vector_service.scroll_payloads(REF_FIELDS + ["repo_url"], repo_url=repo_url)
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for payload in payloads:
+            if payload.get("repo_url"):
+                grouped.setdefault(payload["repo_url"], []).append(payload)
+        for url, chunks in grouped.items():
+            self.add_chunks(url, chunks)
+        logger.info(f"Symbol index loaded {len(payloads)} chunks across {len(grouped)} repositories")
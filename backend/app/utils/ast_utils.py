@@ -1,41 +1,62 @@
 import ast
 from typing import List, Dict, Any, Optional
 from loguru import logger
+from app.utils.symbol_graph import SymbolGraph
+from app.utils.chunk_batch import ChunkBatch
+from app.utils.path_scope import relative_path, is_generated_file
 
 class ASTChunker:
     """Chunk Python code into functions, classes, and modules using AST."""
     def __init__(self):
         pass
 
-    def chunk_code(self, file_path: str, code: str) -> List[Dict[str, Any]]:
-        """Chunk code into functions, classes, and module-level code."""
+    def chunk_code(self, file_path: str, code: str, graph: Optional[SymbolGraph] = None) -> List[Dict[str, Any]]:
+        """Chunk code into functions, classes, and module-level code.
+
+        When a SymbolGraph is given, the file's imports, definitions and call
+        sites are recorded into it from the same parse.
+        """
         try:
             tree = ast.parse(code)
+            # Split once per file rather than once per extracted chunk
+            code_lines = code.splitlines()
             chunks = []
             for node in ast.iter_child_nodes(tree):
                 if isinstance(node, ast.ClassDef):
-                    chunks.append(self._extract_chunk(node, code, file_path, 'class'))
+                    chunks.append(self._extract_chunk(node, code_lines, file_path, 'class'))
                     for subnode in node.body:
                         if isinstance(subnode, ast.FunctionDef):
-                            chunks.append(self._extract_chunk(subnode, code, file_path, 'function', class_name=node.name))
+                            chunks.append(self._extract_chunk(subnode, code_lines, file_path, 'function', class_name=node.name))
                 elif isinstance(node, ast.FunctionDef):
-                    chunks.append(self._extract_chunk(node, code, file_path, 'function'))
+                    chunks.append(self._extract_chunk(node, code_lines, file_path, 'function'))
             # Module-level code
-            module_chunk = self._extract_module_chunk(tree, code, file_path)
+            module_chunk = self._extract_module_chunk(tree, code_lines, file_path)
             if module_chunk:
                 chunks.append(module_chunk)
+            if graph is not None:
+                self._index_symbols(tree, file_path, graph)
             return chunks
         except Exception as e:
             logger.error(f"Failed to chunk code for {file_path}: {e}")
             return []
 
-    def _extract_chunk(self, node, code, file_path, chunk_type, class_name=None):
+    def chunk_into(self, batch: ChunkBatch, file_path: str, code: str, graph: Optional[SymbolGraph] = None) -> int:
+        """Chunks a file straight into a columnar ChunkBatch; returns the number of chunks added."""
+        chunks = self.chunk_code(file_path, code, graph=graph)
+        batch.extend(chunks, is_generated_file(relative_path(file_path, batch.repo_root), code))
+        return len(chunks)
+
+    def _node_span(self, node):
         start_line = node.lineno
         end_line = getattr(node, 'end_lineno', None)
         if not end_line:
             # Fallback if end_lineno is not available
             end_line = self._infer_end_line(node)
-        lines = code.splitlines()[start_line-1:end_line]
+        return start_line, end_line
+
+    def _extract_chunk(self, node, code_lines, file_path, chunk_type, class_name=None):
+        start_line, end_line = self._node_span(node)
+        lines = code_lines[start_line-1:end_line]
         docstring = ast.get_docstring(node)
         return {
             'chunk_id': f"{file_path}:{start_line}-{end_line}",
@@ -49,12 +70,12 @@ class ASTChunker:
             'docstring': docstring
         }
 
-    def _extract_module_chunk(self, tree, code, file_path):
+    def _extract_module_chunk(self, tree, code_lines, file_path):
         # Module-level code (outside any class/function)
         # For simplicity, just include the whole file minus functions/classes
         # (Could be improved for more granularity)
         try:
-            lines = code.splitlines()
+            lines = code_lines
             return {
                 'chunk_id': f"{file_path}:module",
                 'file_path': file_path,
@@ -70,6 +91,43 @@ class ASTChunker:
             logger.error(f"Failed to extract module chunk for {file_path}: {e}")
             return None
 
+    def _index_symbols(self, tree, file_path: str, graph: SymbolGraph):
+        """Records imports, definitions and call sites, keyed by the chunk IDs produced above."""
+        def chunk_id(node):
+            start_line, end_line = self._node_span(node)
+            return f"{file_path}:{start_line}-{end_line}"
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    graph.add_import(file_path, alias.asname or alias.name.split('.')[0], alias.name)
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                for alias in node.names:
+                    graph.add_import(file_path, alias.asname or alias.name, f"{node.module}.{alias.name}")
+
+        module_id = graph.add_definition(file_path, SymbolGraph.MODULE_SYMBOL, f"{file_path}:module")
+        for node in ast.iter_child_nodes(tree):
+            if isinstance(node, ast.ClassDef):
+                class_id = graph.add_definition(file_path, node.name, chunk_id(node))
+                for subnode in node.body:
+                    if isinstance(subnode, ast.FunctionDef):
+                        method_id = graph.add_definition(file_path, f"{node.name}.{subnode.name}", chunk_id(subnode))
+                        self._record_calls(subnode, method_id, graph)
+                    else:
+                        self._record_calls(subnode, class_id, graph)
+            elif isinstance(node, ast.FunctionDef):
+                self._record_calls(node, graph.add_definition(file_path, node.name, chunk_id(node)), graph)
+            else:
+                self._record_calls(node, module_id, graph)
+
+    def _record_calls(self, node, caller_id: int, graph: SymbolGraph):
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call):
+                if isinstance(child.func, ast.Name):
+                    graph.add_call(caller_id, child.func.id)
+                elif isinstance(child.func, ast.Attribute):
+                    graph.add_call(caller_id, child.func.attr)
+
     def _infer_end_line(self, node):
         # Fallback for Python <3.8
         max_lineno = node.lineno
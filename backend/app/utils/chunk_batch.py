@@ -0,0 +1,116 @@
+import sys
+from array import array
+from typing import List, Dict, Any, Iterator, Optional
+import numpy as np
+from app.utils.path_scope import relative_path, dir_prefixes, is_test_path
+
+
+class ChunkBatch:
+    """
+    Columnar container for the chunks of one ingestion run.
+
+    Each field is a single list (line numbers are packed int arrays), repeated
+    strings such as file paths and chunk types are interned, repo-wide values
+    are stored once and chunk IDs and path-scope fields are derived on demand. Embeddings live in one
+    contiguous float32 matrix aligned with the rows. Payload dicts are only
+    materialized when a writer asks for them.
+    """
+
+    __slots__ = (
+        "repo_url", "file_extension", "repo_root", "file_path", "rel_path", "function_name", "class_name",
+        "start_line", "end_line", "content", "chunk_type", "docstring", "is_generated", "embeddings"
+    )
+
+    def __init__(self, repo_url: str, file_extension: str = ".py", repo_root: Optional[str] = None):
+        self.repo_url = sys.intern(str(repo_url))
+        self.file_extension = sys.intern(file_extension)
+        # Checkout root; file paths are stored relative to it for scope filters
+        self.repo_root = repo_root
+        self.file_path: List[str] = []
+        self.rel_path: List[str] = []
+        self.function_name: List[Optional[str]] = []
+        self.class_name: List[Optional[str]] = []
+        self.start_line = array("i")
+        self.end_line = array("i")
+        self.content: List[str] = []
+        self.chunk_type: List[str] = []
+        self.docstring: List[Optional[str]] = []
+        self.is_generated: List[bool] = []
+        self.embeddings: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.content)
+
+    def append(self, chunk: Dict[str, Any], is_generated: bool = False):
+        self.file_path.append(sys.intern(chunk["file_path"]))
+        self.rel_path.append(sys.intern(chunk.get("rel_path") or relative_path(chunk["file_path"], self.repo_root)))
+        self.is_generated.append(bool(chunk.get("is_generated", is_generated)))
+        self.function_name.append(chunk.get("function_name"))
+        self.class_name.append(chunk.get("class_name"))
+        self.start_line.append(chunk["start_line"])
+        self.end_line.append(chunk["end_line"])
+        self.content.append(chunk["content"])
+        self.chunk_type.append(sys.intern(chunk["chunk_type"]))
+        self.docstring.append(chunk.get("docstring"))
+
+    def extend(self, chunks: List[Dict[str, Any]], is_generated: bool = False):
+        for chunk in chunks:
+            self.append(chunk, is_generated)
+
+    def chunk_id(self, i: int) -> str:
+        if self.chunk_type[i] == "module":
+            return f"{self.file_path[i]}:module"
+        return f"{self.file_path[i]}:{self.start_line[i]}-{self.end_line[i]}"
+
+    def payload(self, i: int) -> Dict[str, Any]:
+        return {
+            "chunk_id": self.chunk_id(i),
+            "file_path": self.file_path[i],
+            "function_name": self.function_name[i],
+            "class_name": self.class_name[i],
+            "start_line": self.start_line[i],
+            "end_line": self.end_line[i],
+            "content": self.content[i],
+            "chunk_type": self.chunk_type[i],
+            "docstring": self.docstring[i],
+            "repo_url": self.repo_url,
+            "file_extension": self.file_extension,
+            "rel_path": self.rel_path[i],
+            "dir_prefixes": dir_prefixes(self.rel_path[i]),
+            "is_test": is_test_path(self.rel_path[i]),
+            "is_generated": self.is_generated[i],
+        }
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.payload(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.payload(i)
+
+    def payload_columns(self) -> Dict[str, List[Any]]:
+        """Returns the payload as columns, sharing the existing lists where possible."""
+        count = len(self)
+        return {
+            "chunk_id": [self.chunk_id(i) for i in range(count)],
+            "file_path": self.file_path,
+            "function_name": self.function_name,
+            "class_name": self.class_name,
+            "start_line": self.start_line.tolist(),
+            "end_line": self.end_line.tolist(),
+            "content": self.content,
+            "chunk_type": self.chunk_type,
+            "docstring": self.docstring,
+            "repo_url": [self.repo_url] * count,
+            "file_extension": [self.file_extension] * count,
+            "rel_path": self.rel_path,
+            "dir_prefixes": [dir_prefixes(p) for p in self.rel_path],
+            "is_test": [is_test_path(p) for p in self.rel_path],
+            "is_generated": self.is_generated,
+        }
+
+    def file_groups(self) -> Dict[str, List[int]]:
+        groups: Dict[str, List[int]] = {}
+        for i, file_path in enumerate(self.file_path):
+            groups.setdefault(file_path, []).append(i)
+        return groups
@@ -6,6 +6,9 @@ from git import Repo, GitCommandError
 from loguru import logger
 from urllib.parse import urlparse
 
+# Directories never indexed (also skipped by watch mode)
+EXCLUDE_DIRS = {".git", "venv", "env", "__pycache__", ".venv"}
+
 
 class GitUtils:
     def __init__(self, temp_dir: str = None):
@@ -92,13 +95,12 @@ class GitUtils:
             repo_path = await self.clone_repository(repo_url)
 
             include_patterns = include_patterns or ["*.py"]
-            exclude_dirs = {".git", "venv", "env", "__pycache__", ".venv"}
             exclude_files = {".pyc", ".pyo"}
 
             python_files = []
 
             for root, dirs, files in os.walk(repo_path):
-                dirs[:] = [d for d in dirs if d not in exclude_dirs]
+                dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
                 for file in files:
                     if file.endswith(".py") and not any(file.endswith(ext) for ext in exclude_files):
                         python_files.append(os.path.join(root, file))
@@ -121,6 +123,15 @@ class GitUtils:
         except Exception as e:
             logger.error(f"Failed to cleanup repository {repo_url}: {e}")
 
+    def get_head_commit(self, repo_url: str) -> Optional[str]:
+        """Returns the checked-out commit SHA of a repository, or None if it is not a git checkout."""
+        try:
+            local_path = self.get_repo_local_path(str(repo_url))
+            return Repo(local_path).head.commit.hexsha
+        except Exception as e:
+            logger.warning(f"Could not read HEAD commit for {repo_url}: {e}")
+            return None
+
     def get_file_content(self, file_path: str) -> str:
         """Reads file content with fallback for encoding errors."""
         try:
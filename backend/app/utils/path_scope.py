@@ -0,0 +1,86 @@
+import os
+import fnmatch
+from typing import List, Optional, Dict, Any
+
+TEST_DIRS = {"test", "tests", "testing"}
+GENERATED_DIRS = {"generated", "_generated", "gen", "migrations", "build", "dist"}
+GENERATED_SUFFIXES = ("_pb2.py", "_pb2_grpc.py")
+GENERATED_MARKERS = ("@generated", "do not edit", "generated by", "autogenerated", "auto-generated")
+
+
+def relative_path(file_path: str, root: Optional[str]) -> str:
+    """Repo-relative POSIX path used for scope filters; absolute checkout paths differ per node."""
+    if root:
+        # Relative checkouts ("repo") and absolute ones resolve alike; the checkout's own parents never count
+        try:
+            file_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(root))
+        except ValueError:
+            pass
+    return file_path.replace(os.sep, "/")
+
+
+def dir_prefixes(rel_path: str) -> List[str]:
+    """Every ancestor directory of a path: "a/b/c.py" -> ["a", "a/b"]."""
+    parts = rel_path.split("/")[:-1]
+    return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def is_test_path(rel_path: str) -> bool:
+    parts = rel_path.split("/")
+    name = parts[-1]
+    return (
+        any(part in TEST_DIRS for part in parts[:-1])
+        or name.startswith("test_") or name.endswith("_test.py") or name == "conftest.py"
+    )
+
+
+def is_generated_file(rel_path: str, code: Optional[str] = None) -> bool:
+    parts = rel_path.split("/")
+    if any(part in GENERATED_DIRS for part in parts[:-1]) or parts[-1].endswith(GENERATED_SUFFIXES):
+        return True
+    if code:
+        header = "\n".join(code.splitlines()[:5]).lower()
+        return any(marker in header for marker in GENERATED_MARKERS)
+    return False
+
+
+def normalize_prefix(path_prefix: str) -> str:
+    return path_prefix.strip().strip("/").replace("\\", "/")
+
+
+def literal_glob_prefix(pattern: str) -> str:
+    """Directory part of a glob before its first wildcard, usable as an indexed prefix filter."""
+    literal = []
+    for part in pattern.strip("/").split("/")[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        literal.append(part)
+    return "/".join(literal)
+
+
+def match_glob(rel_paths: List[str], pattern: str) -> List[str]:
+    return [p for p in rel_paths if fnmatch.fnmatchcase(p, pattern.strip("/"))]
+
+
+def matches_scope(payload: Dict[str, Any], scope, files_only: bool = False) -> bool:
+    """Checks one payload against a scope; used only where a search-time filter is not possible."""
+    if scope is None:
+        return True
+    rel_path = payload.get("rel_path") or payload.get("file_path") or ""
+    if scope.path_prefix:
+        prefix = normalize_prefix(scope.path_prefix)
+        if rel_path != prefix and not rel_path.startswith(prefix + "/"):
+            return False
+    if scope.path_glob and not fnmatch.fnmatchcase(rel_path, scope.path_glob.strip("/")):
+        return False
+    if scope.exclude_tests and payload.get("is_test"):
+        return False
+    if scope.exclude_generated and payload.get("is_generated"):
+        return False
+    if files_only:
+        return True
+    if scope.chunk_types and payload.get("chunk_type") not in scope.chunk_types:
+        return False
+    if scope.class_name and payload.get("class_name") != scope.class_name:
+        return False
+    return True
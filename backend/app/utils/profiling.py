@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+from fastapi import Request
+from loguru import logger
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getcwd(), "local_profiles"))
+# Fraction of /api requests profiled without being asked (0 disables background sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", 5)) / 1000
+PROFILE_HEADER = "x-devbuddy-profile"
+
+_current_timeline: ContextVar[Optional["TaskTimeline"]] = ContextVar("devbuddy_timeline", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """
+    Samples the event-loop thread's Python stack on a timer thread.
+
+    Writes collapsed stacks ("outer;...;inner count"), which flamegraph.pl and
+    speedscope read directly. The loop thread is shared, so concurrent requests
+    appear in the same profile; the timeline tells them apart.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="devbuddy-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, "w") as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+
+class TaskTimeline:
+    """Spans recorded per asyncio task, written as Chrome trace events (chrome://tracing, Perfetto)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._tids: Dict[str, int] = {}
+
+    def _tid(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        label = task.get_name() if task else threading.current_thread().name
+        if label not in self._tids:
+            self._tids[label] = len(self._tids) + 1
+            self.events.append({"ph": "M", "name": "thread_name", "pid": 1, "tid": self._tids[label], "args": {"name": label}})
+        return self._tids[label]
+
+    def add(self, name: str, start: float, end: float, args: Optional[Dict[str, Any]] = None):
+        self.events.append({
+            "ph": "X", "name": name, "pid": 1, "tid": self._tid(),
+            "ts": (start - self.started) * 1e6, "dur": (end - start) * 1e6, "args": args or {}
+        })
+
+    def write(self, path: str):
+        with open(path, "w") as out:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms", "otherData": {"request": self.name}}, out)
+
+
+@contextmanager
+def span(name: str, **args):
+    """Times a block into the current request's timeline; a no-op when the request is not profiled."""
+    timeline = _current_timeline.get()
+    if timeline is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timeline.add(name, start, time.perf_counter(), args)
+
+
+def _wants_profile(request: Request) -> bool:
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+async def profile_requests(request: Request, call_next):
+    """HTTP middleware: profiles /api requests flagged by header/query, plus a sampled fraction."""
+    if not request.url.path.startswith("/api/") or not _wants_profile(request):
+        return await call_next(request)
+
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.url.path.strip('/').replace('/', '_')}-{uuid.uuid4().hex[:8]}"
+    timeline = TaskTimeline(f"{request.method} {request.url.path}")
+    token = _current_timeline.set(timeline)
+    profiler = SamplingProfiler(threading.get_ident())
+    profiler.start()
+    start = time.perf_counter()
+
+    async def finish():
+        # Joining the sampler thread waits up to one interval; keep it off the loop
+        await asyncio.to_thread(profiler.stop)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, profile_id)
+        await asyncio.to_thread(profiler.write, f"{base}.folded")
+        await asyncio.to_thread(timeline.write, f"{base}.trace.json")
+        logger.info(f"Profiled {request.url.path} in {time.perf_counter() - start:.3f}s -> {base}.*")
+
+    try:
+        with span(f"{request.method} {request.url.path}"):
+            response = await call_next(request)
+    except BaseException:
+        await finish()
+        raise
+    finally:
+        _current_timeline.reset(token)
+
+    body = getattr(response, "body_iterator", None)
+    if body is None:
+        await finish()
+    else:
+        # The handler's work (a StreamingResponse in particular) runs while the body is sent
+        async def profiled_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await finish()
+
+        response.body_iterator = profiled_body()
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+class EventLoopLagMonitor:
+    """
+    Flags code that blocks the event loop.
+
+    A loop task stamps a heartbeat every `interval`; a watchdog thread that sees
+    the heartbeat go stale for longer than `threshold` captures the loop
+    thread's stack at that moment, so the log names the blocking code.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.2):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.stalls: deque = deque(maxlen=50)
+        self._heartbeat = time.monotonic()
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        threading.Thread(target=self._watch, name="devbuddy-loop-lag", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, time.monotonic() - expected)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            lag = time.monotonic() - heartbeat
+            if lag < self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self._thread_id)
+            stack = "".join(traceback.format_stack(frame)[-8:]) if frame else ""
+            self.stalls.append({"at": time.time(), "lag_seconds": round(lag, 3), "stack": stack})
+            logger.warning(f"Event loop blocked for {lag:.3f}s+, loop thread is in:\n{stack}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "threshold_seconds": self.threshold,
+            "max_lag_seconds": round(self.max_lag, 4),
+            "stalls": list(self.stalls),
+        }
+
+
+def list_profiles() -> List[str]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted(os.listdir(PROFILE_DIR), reverse=True)
@@ -0,0 +1,74 @@
+import os
+import time
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from fastapi import HTTPException, Request
+from loguru import logger
+
+
+class StartupReport:
+    """Records how long each import and warm-up phase took, and whether the app is ready."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.ready = asyncio.Event()
+        # Set once warm-up has ended either way, so waiters do not sit out the timeout after a failure
+        self.finished = asyncio.Event()
+        self.ready_after = None
+        self.failed: Optional[str] = None
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds, 4)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors[name] = str(e)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark_ready(self):
+        self.ready_after = round(time.perf_counter() - self.started, 4)
+        self.ready.set()
+        self.finished.set()
+        slowest = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in self.sorted_phases()[:5])
+        logger.info(f"DevBuddy backend ready after {self.ready_after:.3f}s (slowest: {slowest})")
+
+    def mark_failed(self, error: BaseException):
+        self.failed = f"{type(error).__name__}: {error}"
+        self.finished.set()
+        logger.error(f"DevBuddy warm-up failed: {self.failed}")
+
+    def sorted_phases(self):
+        return sorted(self.phases.items(), key=lambda item: item[1], reverse=True)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready.is_set(),
+            "failed": self.failed,
+            "ready_after_seconds": self.ready_after,
+            "phases": dict(self.sorted_phases()),
+            "errors": self.errors
+        }
+
+
+async def get_ready_state(request: Request, name: str):
+    """Returns an app.state attribute once warm-up finished, or raises 503 while still warming up or after it failed."""
+    report: StartupReport = request.app.state.startup_report
+    if not report.finished.is_set():
+        timeout = float(os.getenv("WARMUP_WAIT_TIMEOUT", 30))
+        try:
+            await asyncio.wait_for(report.finished.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            errors = f": {report.errors}" if report.errors else ""
+            raise HTTPException(status_code=503, detail=f"Service is still warming up{errors}")
+    if report.failed:
+        raise HTTPException(status_code=503, detail=f"Service warm-up failed: {report.failed}")
+    return getattr(request.app.state, name)
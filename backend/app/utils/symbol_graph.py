@@ -0,0 +1,190 @@
+import os
+import hashlib
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from loguru import logger
+
+
+class SymbolGraph:
+    """
+    Per-repo graph of definitions and the calls between them.
+
+    Symbols are addressed by integer IDs. After build(), edges are stored as CSR
+    adjacency arrays (indptr/indices) in both directions, so expanding a symbol
+    to its callers or callees is a pair of array slices.
+    """
+
+    MODULE_SYMBOL = "<module>"
+    # A bare call name matching more definitions than this is too ambiguous to link
+    MAX_CALL_TARGETS = 3
+
+    def __init__(self):
+        self.qualnames: List[str] = []
+        self.names: List[str] = []
+        self.files: List[str] = []
+        self.chunk_ids: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._calls: List[Tuple[int, str]] = []
+        self._imports: Dict[str, Dict[str, str]] = {}
+        self.callee_indptr = np.zeros(1, dtype=np.int32)
+        self.callee_indices = np.zeros(0, dtype=np.int32)
+        self.caller_indptr = np.zeros(1, dtype=np.int32)
+        self.caller_indices = np.zeros(0, dtype=np.int32)
+        self._chunk_symbols: Optional[Dict[str, int]] = None
+
+    def add_definition(self, file_path: str, qualname: str, chunk_id: str) -> int:
+        key = f"{file_path}::{qualname}"
+        if key not in self._ids:
+            self._ids[key] = len(self.qualnames)
+            self.qualnames.append(key)
+            self.names.append(qualname.rsplit('.', 1)[-1])
+            self.files.append(file_path)
+            self.chunk_ids.append(chunk_id)
+        return self._ids[key]
+
+    def add_call(self, caller_id: int, callee_name: str):
+        self._calls.append((caller_id, callee_name))
+
+    def add_import(self, file_path: str, local_name: str, target: str):
+        self._imports.setdefault(file_path, {})[local_name] = target
+
+    def add_file(self, fragment: "SymbolGraph"):
+        """Copies the definitions, calls and imports recorded into an unbuilt single-file graph."""
+        ids = [
+            self.add_definition(file_path, qualname.split("::", 1)[1], chunk_id)
+            for file_path, qualname, chunk_id in zip(fragment.files, fragment.qualnames, fragment.chunk_ids)
+        ]
+        self._calls.extend((ids[caller_id], callee_name) for caller_id, callee_name in fragment._calls)
+        for file_path, imports in fragment._imports.items():
+            self._imports.setdefault(file_path, {}).update(imports)
+
+    def fingerprint(self) -> Tuple:
+        """Everything build() depends on, to tell whether an unbuilt graph changed."""
+        imports = tuple((f, tuple(sorted(i.items()))) for f, i in sorted(self._imports.items()))
+        return tuple(self.qualnames), tuple(self.chunk_ids), tuple(self._calls), imports
+
+    def build(self):
+        """Resolves recorded call names to definitions and packs the edges into CSR arrays."""
+        by_name: Dict[str, List[int]] = {}
+        for symbol_id, name in enumerate(self.names):
+            by_name.setdefault(name, []).append(symbol_id)
+
+        edges = set()
+        for caller_id, callee_name in self._calls:
+            for callee_id in self._resolve(caller_id, callee_name, by_name):
+                if callee_id != caller_id:
+                    edges.add((caller_id, callee_id))
+
+        edge_array = np.array(sorted(edges), dtype=np.int32).reshape(-1, 2)
+        count = len(self.qualnames)
+        self.callee_indptr, self.callee_indices = self._to_csr(edge_array[:, 0], edge_array[:, 1], count)
+        self.caller_indptr, self.caller_indices = self._to_csr(edge_array[:, 1], edge_array[:, 0], count)
+        self._calls, self._imports = [], {}
+        logger.info(f"Built symbol graph with {count} symbols and {len(edge_array)} call edges")
+
+    def _resolve(self, caller_id: int, callee_name: str, by_name: Dict[str, List[int]]) -> List[int]:
+        caller_file = self.files[caller_id]
+        target = self._imports.get(caller_file, {}).get(callee_name)
+        name = target.rsplit('.', 1)[-1] if target else callee_name
+        candidates = by_name.get(name, [])
+        if not candidates:
+            return []
+
+        same_file = [c for c in candidates if self.files[c] == caller_file]
+        if same_file and not target:
+            return same_file
+        if target and '.' in target:
+            module_path = target.rsplit('.', 1)[0].replace('.', os.sep)
+            imported = [c for c in candidates if module_path in self.files[c]]
+            if imported:
+                return imported
+        return candidates if len(candidates) <= self.MAX_CALL_TARGETS else []
+
+    @staticmethod
+    def _to_csr(sources: np.ndarray, targets: np.ndarray, count: int):
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(count + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=count), out=indptr[1:])
+        return indptr, targets[order].astype(np.int32)
+
+    def callees(self, symbol_id: int) -> np.ndarray:
+        return self.callee_indices[self.callee_indptr[symbol_id]:self.callee_indptr[symbol_id + 1]]
+
+    def callers(self, symbol_id: int) -> np.ndarray:
+        return self.caller_indices[self.caller_indptr[symbol_id]:self.caller_indptr[symbol_id + 1]]
+
+    def symbol_for_chunk(self, chunk_id: str) -> Optional[int]:
+        if self._chunk_symbols is None:
+            self._chunk_symbols = {cid: i for i, cid in enumerate(self.chunk_ids)}
+        return self._chunk_symbols.get(chunk_id)
+
+    def expand(self, chunk_ids: List[str], per_symbol: int = 3) -> List[Tuple[str, str]]:
+        """Returns (chunk_id, relation) pairs for the callers and callees of the given chunks."""
+        seen = set(chunk_ids)
+        related = []
+        for chunk_id in chunk_ids:
+            symbol_id = self.symbol_for_chunk(chunk_id)
+            if symbol_id is None:
+                continue
+            for relation, neighbours in (("callee", self.callees(symbol_id)), ("caller", self.callers(symbol_id))):
+                for neighbour in neighbours[:per_symbol]:
+                    neighbour_chunk = self.chunk_ids[neighbour]
+                    if neighbour_chunk not in seen:
+                        seen.add(neighbour_chunk)
+                        related.append((neighbour_chunk, relation))
+        return related
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            qualnames=np.array(self.qualnames, dtype=str),
+            chunk_ids=np.array(self.chunk_ids, dtype=str),
+            callee_indptr=self.callee_indptr,
+            callee_indices=self.callee_indices,
+            caller_indptr=self.caller_indptr,
+            caller_indices=self.caller_indices,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolGraph":
+        data = np.load(path)
+        graph = cls()
+        graph.qualnames = data["qualnames"].tolist()
+        graph.chunk_ids = data["chunk_ids"].tolist()
+        graph.files = [q.split("::", 1)[0] for q in graph.qualnames]
+        graph.names = [q.rsplit("::", 1)[-1].rsplit('.', 1)[-1] for q in graph.qualnames]
+        graph._ids = {q: i for i, q in enumerate(graph.qualnames)}
+        graph.callee_indptr = data["callee_indptr"]
+        graph.callee_indices = data["callee_indices"]
+        graph.caller_indptr = data["caller_indptr"]
+        graph.caller_indices = data["caller_indices"]
+        return graph
+
+
+class SymbolGraphStore:
+    """Persists one SymbolGraph per repository and caches loaded graphs in memory."""
+
+    def __init__(self, base_dir: str = None):
+        self.base_dir = base_dir or os.getenv("SYMBOL_GRAPH_DIR", os.path.join(os.getcwd(), "local_symbol_graphs"))
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._cache: Dict[str, Tuple[float, SymbolGraph]] = {}
+
+    def _path(self, repo_url: str) -> str:
+        digest = hashlib.sha1(str(repo_url).encode("utf-8")).hexdigest()
+        return os.path.join(self.base_dir, f"{digest}.npz")
+
+    def save(self, repo_url: str, graph: SymbolGraph):
+        graph.save(self._path(repo_url))
+        self._cache.pop(str(repo_url), None)
+
+    def load(self, repo_url: str) -> Optional[SymbolGraph]:
+        path = self._path(repo_url)
+        if not os.path.exists(path):
+            return None
+        mtime = os.path.getmtime(path)
+        cached = self._cache.get(str(repo_url))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        graph = SymbolGraph.load(path)
+        self._cache[str(repo_url)] = (mtime, graph)
+        return graph
@@ -0,0 +1,28 @@
+import numpy as np
+from typing import List, Sequence
+
+
+def normalize(vectors) -> np.ndarray:
+    """L2-normalize a vector or a matrix of row vectors as float32."""
+    arr = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+def mean_vector(vectors: Sequence[Sequence[float]]) -> List[float]:
+    """Returns the normalized centroid of a group of embeddings."""
+    centroid = np.asarray(vectors, dtype=np.float32).mean(axis=0)
+    return normalize(centroid).tolist()
+
+
+def cosine_top_k(query_vector, candidate_vectors, k: int):
+    """Exact cosine scores of a query against candidates; returns (indices, scores) of the top k."""
+    candidates = normalize(candidate_vectors)
+    if candidates.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    scores = candidates @ normalize(query_vector)
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
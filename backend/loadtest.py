@@ -0,0 +1,264 @@
+# loadtest.py
+"""
+Open-loop load test for the DevBuddy API with stubbed embedding/LLM providers.
+
+Starts the app under uvicorn in a scratch directory with LLM_PROVIDER=stub, ingests
+a local repository once, then offers Poisson traffic (a chat/ingest mix) at each
+target rate in turn. Requests are fired on schedule whether or not earlier ones
+finished, so queueing shows up as latency instead of a lower request rate.
+Throughput is measured over the second half of each step, once the pipeline is
+full. A step is sustainable while completions in that half keep up (within 10%)
+with the arrivals in it, the error rate stays under --max-errors and chat p99 stays under --slo-p99;
+the last sustainable step is reported as the saturation point.
+
+Ingests in the mix go to scratch copies of --repo rather than the repo chats are
+about. A copy is re-ingested once its previous ingest finished (re-ingesting
+replaces a repo's points), so the index only grows by one copy per peak
+concurrent ingest; each step reports the indexed chunk count it ended with.
+
+    python loadtest.py --rps 1,2,4,8,16 --duration 30 --ingest-ratio 0.02
+    python loadtest.py --url http://localhost:8000 --rps 5   # against a running server
+
+--workers > 1 needs VECTOR_BACKEND=numpy: the embedded Qdrant store is locked by the
+first process that opens it. The NumPy index is shared through mmap but has a single
+writer, so a multi-worker run cannot mix in ingests (--ingest-ratio must stay 0).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+QUESTIONS = [
+    "How does ingestion turn a repository into chunks?",
+    "Where are embeddings generated and how are they batched?",
+    "What does `search_hierarchical` do?",
+    "Explain how the retriever combines keyword and semantic results",
+    "How is the symbol graph used to expand context?",
+    "What happens when the vector store is still warming up?",
+    "Which function stores file summaries?",
+    "How are chat sources returned to the client?",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--repo", default=os.path.join(BACKEND_DIR, "app"), help="Local repository to ingest and chat about")
+    parser.add_argument("--rps", default="1,2,4,8,16,32", help="Comma-separated offered rates, tried in order")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per rate step")
+    parser.add_argument("--ingest-ratio", type=float, default=0.0, help="Fraction of requests that are ingests")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--slo-p99", type=float, default=5.0, help="Chat p99 latency (s) a sustainable step must meet")
+    parser.add_argument("--max-errors", type=float, default=0.01, help="Error rate a sustainable step must stay under")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn workers for the started server (more than 1 needs VECTOR_BACKEND=numpy)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", help="Write the step reports to this file")
+    parser.add_argument("--stop-at-saturation", action="store_true", help="Skip the remaining steps once one fails")
+    args = parser.parse_args()
+    if args.workers > 1 and not args.url:
+        if os.getenv("VECTOR_BACKEND", "qdrant") != "numpy":
+            parser.error("--workers > 1 needs VECTOR_BACKEND=numpy; every worker would open the same embedded Qdrant store")
+        if args.ingest_ratio > 0:
+            parser.error("--workers > 1 cannot mix in ingests; the NumPy index allows one writer at a time")
+    if args.ingest_ratio > 0 and not os.path.isdir(args.repo):
+        parser.error("--ingest-ratio needs a local --repo directory to make scratch copies of")
+    return args
+
+
+class IngestCopies:
+    """Scratch copies of the repo for the ingest mix, never handed to two ingests at once.
+
+    Two overlapping ingests of one repo could interleave their delete and store and
+    leave it indexed twice, so an ingest arriving while every copy is busy gets a new one.
+    """
+
+    def __init__(self, repo: str):
+        self.repo = repo
+        self.root = tempfile.mkdtemp(prefix="devbuddy-loadtest-repos-")
+        self.idle = []
+        self.created = 0
+
+    async def acquire(self) -> str:
+        if self.idle:
+            return self.idle.pop()
+        path = os.path.join(self.root, f"copy-{self.created}")
+        self.created += 1
+        await asyncio.to_thread(shutil.copytree, self.repo, path, ignore=shutil.ignore_patterns(".git"))
+        return path
+
+    def release(self, path: str):
+        self.idle.append(path)
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def start_server(args) -> subprocess.Popen:
+    """Runs the app from a scratch directory so its local stores, logs and profiles stay isolated."""
+    workdir = tempfile.mkdtemp(prefix="devbuddy-loadtest-")
+    env = {
+        **os.environ,
+        "PYTHONPATH": BACKEND_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        "LLM_PROVIDER": "stub",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    }
+    print(f"Starting server on port {args.port} (workdir {workdir})")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/api/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("Server did not become ready")
+
+
+async def send(client: httpx.AsyncClient, kind: str, repo: str, copies: IngestCopies, results: list):
+    start = time.perf_counter()
+    try:
+        if kind == "chat":
+            response = await client.post("/api/chat", json={"message": random.choice(QUESTIONS), "repo_url": repo})
+        else:
+            copy = await copies.acquire()
+            try:
+                response = await client.post("/api/ingest", json={"repo_url": copy})
+            finally:
+                copies.release(copy)
+        ok = response.status_code == 200
+        error = None if ok else f"HTTP {response.status_code}"
+    except Exception as e:
+        ok, error = False, type(e).__name__
+    results.append({"kind": kind, "latency": time.perf_counter() - start, "ok": ok, "error": error, "done": time.perf_counter()})
+
+
+async def index_chunks(client: httpx.AsyncClient) -> int:
+    """Chunks currently indexed across hot repos, as tracked by the repo lifecycle."""
+    response = await client.get("/api/repos")
+    response.raise_for_status()
+    return sum(repo["chunks"] for repo in response.json()["repos"] if repo["tier"] == "hot")
+
+
+async def run_step(client: httpx.AsyncClient, args, rps: float, copies: IngestCopies) -> dict:
+    """Offers Poisson arrivals at `rps` for the step duration, then waits for stragglers."""
+    results, tasks = [], []
+    started = time.perf_counter()
+    next_at = started
+    while next_at - started < args.duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = "ingest" if random.random() < args.ingest_ratio else "chat"
+        tasks.append(asyncio.create_task(send(client, kind, args.repo, copies, results)))
+        next_at += random.expovariate(rps)
+    window_end = started + args.duration
+    await asyncio.gather(*tasks)
+    report = summarize(rps, len(tasks), results, started, window_end, args)
+    report["index_chunks"] = await index_chunks(client)
+    return report
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {"p50": None, "p99": None}
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {"p50": round(float(p50), 4), "p99": round(float(p99), 4)}
+
+
+def summarize(rps, sent, results, started, window_end, args) -> dict:
+    steady_from = started + args.duration / 2
+    completed = sum(1 for r in results if r["ok"] and steady_from <= r["done"] <= window_end)
+    arrived = sum(1 for r in results if steady_from <= r["done"] - r["latency"] <= window_end)
+    errors = [r for r in results if not r["ok"]]
+    report = {
+        "offered_rps": rps,
+        "sent": sent,
+        "throughput_rps": round(completed / (args.duration / 2), 3),
+        "error_rate": round(len(errors) / max(1, len(results)), 4),
+        "errors": sorted({e["error"] for e in errors}),
+        "drain_seconds": round(max((r["done"] for r in results), default=window_end) - window_end, 3),
+    }
+    for kind in ("chat", "ingest"):
+        latencies = [r["latency"] for r in results if r["kind"] == kind and r["ok"]]
+        if any(r["kind"] == kind for r in results):
+            report[kind] = {"count": len(latencies), **_percentiles(latencies)}
+    chat_p99 = report.get("chat", {}).get("p99")
+    report["sustainable"] = (
+        completed >= 0.9 * arrived
+        and report["error_rate"] <= args.max_errors
+        and (chat_p99 is None or chat_p99 <= args.slo_p99)
+    )
+    return report
+
+
+def print_report(report: dict):
+    chat = report.get("chat", {})
+    ingest = report.get("ingest", {})
+    print(
+        f"offered {report['offered_rps']:>6} rps | achieved {report['throughput_rps']:>7} rps | "
+        f"chat p50 {chat.get('p50')}s p99 {chat.get('p99')}s | "
+        + (f"ingest p50 {ingest.get('p50')}s p99 {ingest.get('p99')}s | " if ingest else "")
+        + f"errors {report['error_rate']:.2%} {report['errors'] or ''} | "
+        + f"index {report['index_chunks']} chunks | "
+        + ("ok" if report["sustainable"] else "SATURATED")
+    )
+
+
+async def main(args):
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    server = None if args.url else start_server(args)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    copies = IngestCopies(args.repo)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client)
+            print(f"Seeding index from {args.repo}")
+            seed = await client.post("/api/ingest", json={"repo_url": args.repo}, timeout=None)
+            seed.raise_for_status()
+            print(f"Index holds {await index_chunks(client)} chunks")
+
+            reports = []
+            for rps in [float(r) for r in args.rps.split(",")]:
+                report = await run_step(client, args, rps, copies)
+                print_report(report)
+                reports.append(report)
+                if args.stop_at_saturation and not report["sustainable"]:
+                    break
+
+        saturation = None
+        for report in reports:
+            if not report["sustainable"]:
+                break
+            saturation = report["offered_rps"]
+        print(f"Saturation point: {saturation} rps" if saturation else "Saturated at the lowest offered rate")
+        if args.json:
+            with open(args.json, "w") as out:
+                json.dump({"saturation_rps": saturation, "steps": reports}, out, indent=2)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        copies.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,39 @@
+import os
+import sys
+import asyncio
+import numpy as np
+import pytest
+
+# The app package lives next to this directory; stub providers keep tests offline and fast
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("STUB_EMBED_LATENCY_MS", "0")
+
+from app.services.numpy_vector_service import NumpyVectorService
+from app.services.content_store import ContentAddressedStore
+from app.utils.ast_utils import ASTChunker
+from app.utils.chunk_batch import ChunkBatch
+
+
+@pytest.fixture(params=["numpy", "content_store"])
+def vector_service(request, tmp_path, monkeypatch):
+    """An empty NumPy index, bare or behind the content-addressed store."""
+    monkeypatch.setenv("NUMPY_INDEX_PATH", str(tmp_path / "index"))
+    service = NumpyVectorService()
+    if request.param == "content_store":
+        service = ContentAddressedStore(service, str(tmp_path / "content_store.sqlite3"))
+    asyncio.run(service.initialize())
+    return service
+
+
+def chunk_files(repo_url: str, root: str, files: dict) -> ChunkBatch:
+    """Chunks {relative path: source} as ingestion would for a checkout at `root`."""
+    batch = ChunkBatch(repo_url, file_extension=".py", repo_root=root)
+    chunker = ASTChunker()
+    for rel_path, code in files.items():
+        chunker.chunk_into(batch, os.path.join(root, rel_path), code)
+    return batch
+
+
+def random_vectors(count: int, size: int = 768, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, size)).astype(np.float32)
@@ -0,0 +1,131 @@
+import os
+import json
+import numpy as np
+import pytest
+from app.services.numpy_vector_service import NumpyCollection
+
+VECTOR_SIZE = 4
+
+
+def _collection(path, read_only: bool = False) -> NumpyCollection:
+    collection = NumpyCollection(str(path), VECTOR_SIZE, read_only=read_only)
+    if not read_only:
+        collection.refresh()
+    return collection
+
+
+def _append(collection: NumpyCollection, ids, repo_url: str = "r1"):
+    vectors = np.random.default_rng(len(ids)).random((len(ids), VECTOR_SIZE))
+    collection.append(ids, vectors, [{"repo_url": repo_url, "point": point_id} for point_id in ids])
+
+
+def _meta(path) -> dict:
+    with open(os.path.join(path, "meta.json")) as f:
+        return json.load(f)
+
+
+def test_appends_are_visible_to_a_reader(tmp_path):
+    writer = _collection(tmp_path)
+    reader = _collection(tmp_path, read_only=True)
+    _append(writer, ["a", "b"])
+    _append(writer, ["c"], repo_url="r2")
+
+    reader.refresh()
+    assert reader.column("point").tolist() == ["a", "b", "c"]
+    assert reader.column("repo_url").tolist() == ["r1", "r1", "r2"]
+    assert reader.rows_for_ids(["c", "a"]) == [0, 2]
+    assert np.flatnonzero(reader.mask(repo_url="r2")).tolist() == [2]
+
+
+def test_refresh_reads_only_segments_published_since(tmp_path):
+    writer = _collection(tmp_path)
+    reader = _collection(tmp_path, read_only=True)
+    _append(writer, ["a", "b"])
+    reader.refresh()
+
+    # Neither the writer nor the reader may go back to a segment they already hold
+    os.remove(os.path.join(tmp_path, _meta(tmp_path)["segments"][0][0]))
+    _append(writer, ["c"])
+    reader.refresh()
+    assert reader.column("point").tolist() == ["a", "b", "c"]
+    assert writer.column("point").tolist() == ["a", "b", "c"]
+
+
+def test_delete_tombstones_rows(tmp_path, monkeypatch):
+    monkeypatch.setenv("NUMPY_TOMBSTONE_RATIO", "0.5")
+    writer = _collection(tmp_path)
+    reader = _collection(tmp_path, read_only=True)
+    _append(writer, ["a", "b", "c", "d"])
+    segments = _meta(tmp_path)["segments"]
+
+    mask = np.zeros(4, dtype=bool)
+    mask[1] = True
+    writer.delete(mask)
+    reader.refresh()
+
+    assert _meta(tmp_path)["segments"] == segments
+    assert reader.rows_for_ids(["a", "b", "c"]) == [0, 2]
+    assert np.flatnonzero(reader.mask(repo_url="r1")).tolist() == [0, 2, 3]
+    hits = reader.search(np.random.default_rng(4).random(VECTOR_SIZE), limit=4, mask=reader.mask())[0]
+    assert sorted(row for row, _ in hits) == [0, 2, 3]
+
+
+def test_tombstones_past_the_ratio_are_compacted(tmp_path, monkeypatch):
+    monkeypatch.setenv("NUMPY_TOMBSTONE_RATIO", "0.2")
+    writer = _collection(tmp_path)
+    _append(writer, ["a", "b", "c", "d"])
+    vector_c = np.asarray(writer._vectors[2]).copy()
+
+    writer.delete(writer.column("point") == "b")
+    writer.delete(writer.column("point") == "d")
+
+    reader = _collection(tmp_path, read_only=True)
+    reader.refresh()
+    assert reader.column("point").tolist() == ["a", "c"]
+    assert _meta(tmp_path)["deleted"] == []
+    assert len(_meta(tmp_path)["segments"]) == 1
+    np.testing.assert_array_equal(reader._vectors[1], vector_c)
+
+
+def test_set_values_writes_a_delta(tmp_path):
+    writer = _collection(tmp_path)
+    reader = _collection(tmp_path, read_only=True)
+    _append(writer, ["a", "b", "c"])
+    reader.refresh()
+    segments = _meta(tmp_path)["segments"]
+
+    writer.set_values([0, 2], "repo_url", ["r1", "r2"])
+    meta = _meta(tmp_path)
+    assert meta["segments"] == segments
+    assert len(meta["updates"]) == 1
+    with open(os.path.join(tmp_path, meta["updates"][0])) as f:
+        assert json.load(f) == {"key": "repo_url", "rows": [0, 2], "value": ["r1", "r2"]}
+
+    reader.refresh()
+    assert reader.column("repo_url").tolist() == [["r1", "r2"], "r1", ["r1", "r2"]]
+    assert np.flatnonzero(reader.mask(repo_url="r2")).tolist() == [0, 2]
+
+
+def test_segments_and_updates_fold_into_one(tmp_path, monkeypatch):
+    monkeypatch.setenv("NUMPY_MAX_SEGMENTS", "3")
+    writer = _collection(tmp_path)
+    _append(writer, ["a"])
+    _append(writer, ["b"])
+    writer.set_values([0], "repo_url", "r2")
+    _append(writer, ["c"])
+
+    meta = _meta(tmp_path)
+    assert len(meta["segments"]) == 1 and meta["updates"] == []
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith(".json")) == sorted(
+        [meta["segments"][0][0], "meta.json"]
+    )
+    reader = _collection(tmp_path, read_only=True)
+    reader.refresh()
+    assert reader.column("point").tolist() == ["a", "b", "c"]
+    assert reader.column("repo_url").tolist() == ["r2", "r1", "r1"]
+
+
+def test_read_only_collection_rejects_writes(tmp_path):
+    reader = _collection(tmp_path, read_only=True)
+    with pytest.raises(PermissionError):
+        _append(reader, ["a"])
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+
+# The agent clones through GitPython and embeds through the LangChain wrappers (stubbed offline)
+pytest.importorskip("git")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("tenacity")
+
+from app.agents.ingestion_agent import IngestionAgent
+from app.services.symbol_index import SymbolIndex
+from app.utils.symbol_graph import SymbolGraphStore
+
+FILES = {
+    "pkg/a.py": "def f():\n    return g()\n\ndef g():\n    return 1\n",
+    "pkg/b.py": "class B:\n    def m(self):\n        return 2\n",
+    "main.py": "from pkg.a import f\n\nprint(f())\n",
+}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    for rel_path, code in FILES.items():
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel_path).write_text(code)
+    return str(root)
+
+
+async def _counts(service, repo_url: str):
+    chunks = len(await service.scroll_payloads(["repo_url"], repo_url=repo_url))
+    files = await service.search_files([1.0] * 768, limit=100, repo_url=repo_url)
+    return chunks, sorted(f["file_path"] for f in files)
+
+
+def test_reingest_replaces_points(vector_service, repo, tmp_path):
+    agent = IngestionAgent(vector_service, SymbolGraphStore(str(tmp_path / "graphs")), SymbolIndex())
+
+    async def run():
+        first = await agent.ingest_repo(repo)
+        counts = await _counts(vector_service, repo)
+        second = await agent.ingest_repo(repo)
+        assert await _counts(vector_service, repo) == counts
+        assert first["chunks_created"] == second["chunks_created"] == counts[0]
+        assert len(counts[1]) == len(FILES)
+
+        hits = await vector_service.search_hierarchical([1.0] * 768, limit=100, repo_url=repo, file_limit=len(FILES))
+        assert len({h["chunk_id"] for h in hits}) == len(hits) == counts[0]
+
+    asyncio.run(run())
+    assert agent.symbol_index.lookup(repo, "B")
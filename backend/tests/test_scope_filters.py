@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from app.models.schemas import RetrievalScope
+from app.utils.path_scope import matches_scope
+from conftest import chunk_files, random_vectors
+
+ROOT = "/checkouts/repo"
+FILES = {
+    "app/svc/a.py": "def f():\n    return 1\n\nclass C:\n    def m(self):\n        return 2\n",
+    "application/b.py": "def h():\n    return 3\n",
+    "tests/test_a.py": "def test_f():\n    assert True\n",
+    "app/gen/x_pb2.py": "def k():\n    return 4\n",
+}
+
+
+@pytest.mark.parametrize("payload, scope, expected", [
+    ({"rel_path": "app/svc/a.py"}, RetrievalScope(path_prefix="app"), True),
+    ({"rel_path": "application/b.py"}, RetrievalScope(path_prefix="app"), False),
+    ({"rel_path": "app/svc/a.py"}, RetrievalScope(path_prefix="/app/svc/a.py"), True),
+    ({"rel_path": "app/svc/a.py"}, RetrievalScope(path_glob="app/*.py"), True),
+    ({"rel_path": "app/svc/a.py"}, RetrievalScope(path_glob="svc/*.py"), False),
+    ({"rel_path": "tests/test_a.py", "is_test": True}, RetrievalScope(exclude_tests=True), False),
+    ({"rel_path": "x_pb2.py", "is_generated": True}, RetrievalScope(exclude_generated=True), False),
+    ({"rel_path": "a.py", "chunk_type": "module"}, RetrievalScope(chunk_types=["function"]), False),
+    ({"rel_path": "a.py", "class_name": "C"}, RetrievalScope(class_name="C"), True),
+])
+def test_matches_scope(payload, scope, expected):
+    assert matches_scope(payload, scope) is expected
+
+
+def test_file_level_match_ignores_chunk_filters():
+    payload = {"rel_path": "a.py"}
+    assert matches_scope(payload, RetrievalScope(chunk_types=["method"], class_name="C"), files_only=True)
+
+
+@pytest.fixture
+def indexed(vector_service):
+    batch = chunk_files("r1", ROOT, FILES)
+    asyncio.run(vector_service.store_chunks(random_vectors(len(batch)), batch))
+    return vector_service
+
+
+def _search(service, scope):
+    """(rel_path, function_name) of the chunks a scope selects, via search and via scroll."""
+    async def run():
+        query = random_vectors(1, seed=1)[0].tolist()
+        hits = await service.search_similar(query, limit=50, repo_url="r1", scope=scope)
+        payloads = await service.scroll_payloads(["rel_path", "function_name"], repo_url="r1", scope=scope)
+        return (
+            sorted((h["rel_path"], h.get("function_name") or "") for h in hits),
+            sorted((p["rel_path"], p.get("function_name") or "") for p in payloads),
+        )
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("scope, expected", [
+    (RetrievalScope(path_prefix="app"), {"app/svc/a.py", "app/gen/x_pb2.py"}),
+    (RetrievalScope(path_prefix="app/svc/a.py"), {"app/svc/a.py"}),
+    (RetrievalScope(path_glob="app/*/a.py"), {"app/svc/a.py"}),
+    (RetrievalScope(path_glob="nomatch/*"), set()),
+    (RetrievalScope(exclude_tests=True, exclude_generated=True), {"app/svc/a.py", "application/b.py"}),
+])
+def test_path_scopes(indexed, scope, expected):
+    hits, payloads = _search(indexed, scope)
+    assert {rel_path for rel_path, _ in hits} == expected
+    assert hits == payloads
+
+
+def test_chunk_scopes(indexed):
+    # Methods are function chunks carrying their class name
+    hits, _ = _search(indexed, RetrievalScope(path_glob="app/svc/*", chunk_types=["function"]))
+    assert hits == [("app/svc/a.py", "f"), ("app/svc/a.py", "m")]
+    hits, payloads = _search(indexed, RetrievalScope(class_name="C", chunk_types=["function"]))
+    assert hits == payloads == [("app/svc/a.py", "m")]
@@ -0,0 +1,85 @@
+import os
+import asyncio
+import numpy as np
+import pytest
+
+# Export records the source commit and the embedding model
+pytest.importorskip("git")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("tenacity")
+
+from app.services.snapshot_service import SnapshotService
+from app.services.symbol_index import SymbolIndex
+from app.utils.ast_utils import ASTChunker
+from app.utils.chunk_batch import ChunkBatch
+from app.utils.symbol_graph import SymbolGraph, SymbolGraphStore
+from conftest import random_vectors
+
+REPO = "/checkouts/repo"
+CODE = "def f():\n    return g()\n\ndef g():\n    return 1\n\nclass C:\n    def m(self):\n        return f()\n"
+
+
+async def _index(service, graph_store):
+    batch = ChunkBatch(REPO, file_extension=".py", repo_root=REPO)
+    graph = SymbolGraph()
+    ASTChunker().chunk_into(batch, os.path.join(REPO, "pkg/a.py"), CODE, graph=graph)
+    graph.build()
+    graph_store.save(REPO, graph)
+    vectors = random_vectors(len(batch))
+    await service.store_chunks(vectors, batch)
+    await service.store_file_summaries(
+        [vectors.mean(axis=0).tolist()],
+        [{"repo_url": REPO, "file_path": os.path.join(REPO, "pkg/a.py"), "rel_path": "pkg/a.py"}]
+    )
+
+
+async def _contents(service, files: bool = False):
+    """(content or file path, vector) of every point of the repo, in a stable order."""
+    rows = []
+    async for vectors, payloads in service.iter_points(REPO, files=files):
+        for vector, payload in zip(vectors, payloads):
+            rows.append((payload.get("content") or payload["file_path"], np.round(vector, 5).tolist()))
+    return sorted(rows)
+
+
+@pytest.fixture
+def snapshots(vector_service, tmp_path):
+    graph_store = SymbolGraphStore(str(tmp_path / "graphs"))
+    asyncio.run(_index(vector_service, graph_store))
+    return SnapshotService(vector_service, graph_store, SymbolIndex(), str(tmp_path / "snapshots"))
+
+
+def test_export_import_round_trip(snapshots):
+    service = snapshots.vector_service
+
+    async def run():
+        chunks, files = await _contents(service), await _contents(service, files=True)
+        exported = await snapshots.export_repo(REPO)
+        await service.delete_repo(REPO)
+        assert await _contents(service) == []
+
+        imported = await snapshots.import_snapshot(snapshots.path_for(exported["name"]))
+        assert imported["chunks"] == exported["chunks"] == len(chunks)
+        assert imported["file_summaries"] == len(files) == 1
+        assert await _contents(service) == chunks
+        assert await _contents(service, files=True) == files
+
+    asyncio.run(run())
+    assert os.path.join(REPO, "pkg/a.py") + "::C.m" in snapshots.graph_store.load(REPO).qualnames
+    assert snapshots.symbol_index.lookup(REPO, "g")
+
+
+def test_truncated_snapshot_leaves_the_repo_intact(snapshots):
+    service = snapshots.vector_service
+
+    async def run():
+        chunks = await _contents(service)
+        exported = await snapshots.export_repo(REPO)
+        path = snapshots.path_for(exported["name"])
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 16)
+        with pytest.raises(ValueError):
+            await snapshots.import_snapshot(path)
+        assert await _contents(service) == chunks
+
+    asyncio.run(run())